@@ -7,7 +7,13 @@ import uvicorn
 
 from src.llms.unified_manager import unified_llm_manager
 from src.utils.logger import setup_logger
-from src.workflows import run_classify_graph, run_crawl
+from src.workflows import (
+    run_batch_backfill,
+    run_classify_graph,
+    run_crawl,
+    run_recompute,
+    run_reextract,
+)
 
 # 使用一个全局变量来确保日志只配置一次
 _logging_configured = False
@@ -31,6 +37,54 @@ def arg_parser():
         action="store_true",
         help="Enable crawl",
     )
+    parser.add_argument(
+        "--reextract",
+        action="store_true",
+        help="Rebuild entry content from archived html without crawling",
+    )
+    parser.add_argument(
+        "--batch-backfill",
+        action="store_true",
+        help="Classify and score entries through the provider's batch API",
+    )
+    parser.add_argument(
+        "--recompute",
+        action="store_true",
+        help="Re-run entries whose content, prompt or model changed",
+    )
+    parser.add_argument(
+        "--prompt-hash",
+        type=str,
+        default=None,
+        help="with --recompute, only results from this prompt hash",
+    )
+    parser.add_argument(
+        "--model-id",
+        type=str,
+        default=None,
+        help="with --recompute, only results from this model id",
+    )
+    parser.add_argument(
+        "--include-unversioned",
+        action="store_true",
+        help="with --recompute, also results stored without lineage",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="with --recompute, only count the stale entries",
+    )
+    parser.add_argument(
+        "--preclassifier-report",
+        action="store_true",
+        help="Show agreement between the local pre-classifier and the LLM",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="number of worker processes for re-extraction (default: 4)",
+    )
     parser.add_argument(
         "--ignore-limit",
         action="store_true",
@@ -99,14 +153,17 @@ def _log_llm_config(logger, config_info):
     # 输出池信息
     pools = config_info.get("pools", {})
     for pool_name, pool_info in pools.items():
-        healthy = pool_info.get("healthy_models", 0)
+        healthy = pool_info.get("healthy_models")
         total = pool_info.get("total_models", 0)
         strategy = pool_info.get("load_balance_strategy", "unknown")
         description = pool_info.get("description", "无描述")
+        # 启动时健康检查尚未运行，只显示模型数
+        if healthy is None:
+            models = f"{total} 个模型"
+        else:
+            models = f"{healthy}/{total} 健康模型"
 
-        logger.info(
-            f"  🔸 {pool_name}: {healthy}/{total} 健康模型 | {strategy} | {description}"
-        )
+        logger.info(f"  🔸 {pool_name}: {models} | {strategy} | {description}")
 
     # 输出节点映射
     node_mapping = config_info.get("node_mapping", {})
@@ -121,6 +178,24 @@ def _log_llm_config(logger, config_info):
         logger.info(f"🎯 默认池: {default_pool}")
 
 
+def _log_preclassifier_report(logger):
+    """输出预分类器与 LLM 的一致率，用于调整置信度阈值"""
+    from sqlalchemy.orm import Session
+
+    from src.models import db
+    from src.preclassifier import preclassifier
+
+    with Session(db) as session:
+        report = preclassifier.agreement_report(session)
+    for target, rows in report.items():
+        logger.info(f"📐 {target}:")
+        for row in rows:
+            logger.info(
+                f"  阈值 {row['threshold']}: 覆盖 {row['coverage']} | "
+                f"一致 {row['agreement']} | 对比样本 {row['compared']}"
+            )
+
+
 def main():
     args = arg_parser()
 
@@ -142,6 +217,29 @@ def main():
                 entry_nums=args.entry_nums, ignore_limit=args.ignore_limit
             )
         )
+    elif args.recompute:
+        logger.info("🔁 重新计算过期的分类与评分...")
+        result = asyncio.run(
+            run_recompute(
+                prompt_hash=args.prompt_hash,
+                model_id=args.model_id,
+                include_unversioned=args.include_unversioned,
+                dry_run=args.dry_run,
+            )
+        )
+        logger.info(f"📋 {result}")
+    elif args.batch_backfill:
+        logger.info("📦 通过批量 API 回填分类与评分...")
+        asyncio.run(
+            run_batch_backfill(
+                entry_nums=args.entry_nums, ignore_limit=args.ignore_limit
+            )
+        )
+    elif args.preclassifier_report:
+        _log_preclassifier_report(logger)
+    elif args.reextract:
+        logger.info("♻️ 从归档快照重新提取正文...")
+        asyncio.run(run_reextract(max_workers=args.workers))
     elif args.crawl:
         logger.info("🕷️ 开始爬虫任务...")
         asyncio.run(run_crawl())
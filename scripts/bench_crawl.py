@@ -0,0 +1,285 @@
+"""
+爬虫吞吐基准测试
+
+在本地启动一个 fixture HTTP 服务，提供录制的文章页面以及合成的慢响应、429、
+纯 JS 渲染页面，然后分别用 WebExtractorConfig 的 strict / balanced / fast
+预设驱动 scrape_multiple_websites，输出 URLs/min、p50/p95 延迟和峰值 RSS。
+
+用法:
+    python -m scripts.bench_crawl --presets fast balanced --repeat 2 \
+        --output bench_crawl.json
+
+结果为 JSON，便于在 CI 中对比回归。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import platform
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+FIXTURE_DIR = (
+    Path(__file__).resolve().parent.parent / "testdata" / "crawl_fixtures"
+)
+
+ARTICLES = ["article_zh.html", "article_en.html", "article_long.html"]
+
+PRESETS = {
+    "strict": "create_strict_config",
+    "balanced": "create_balanced_config",
+    "fast": "create_fast_config",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class FixtureServer:
+    """本地 fixture 服务，在独立线程的事件循环中运行
+
+    路由:
+        /articles/{name}            录制的文章页面
+        /slow/{name}?delay=秒       延迟后返回文章
+        /ratelimit/{name}?fail=次数  前若干次返回 429，之后返回文章
+        /js/{name}                  纯 JS 渲染页面
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, daemon=True
+        )
+        self._runner = None
+        self._hits: dict[str, int] = defaultdict(int)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _read_fixture(self, name: str) -> str:
+        path = (FIXTURE_DIR / name).resolve()
+        if path.parent != FIXTURE_DIR or not path.exists():
+            raise web.HTTPNotFound()
+        return path.read_text(encoding="utf-8")
+
+    async def _article(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self._read_fixture(request.match_info["name"]),
+            content_type="text/html",
+        )
+
+    async def _slow(self, request: web.Request) -> web.Response:
+        delay = float(request.query.get("delay", "3"))
+        await asyncio.sleep(delay)
+        return await self._article(request)
+
+    async def _ratelimit(self, request: web.Request) -> web.Response:
+        fail = int(request.query.get("fail", "1"))
+        self._hits[request.path_qs] += 1
+        if self._hits[request.path_qs] <= fail:
+            return web.Response(
+                status=429,
+                text="Too Many Requests",
+                headers={"Retry-After": "1"},
+            )
+        return await self._article(request)
+
+    async def _js_only(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self._read_fixture("js_only.html"), content_type="text/html"
+        )
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/articles/{name}", self._article)
+        app.router.add_get("/slow/{name}", self._slow)
+        app.router.add_get("/ratelimit/{name}", self._ratelimit)
+        app.router.add_get("/js/{name}", self._js_only)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def _stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def __enter__(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        logger.info(f"fixture 服务已启动: {self.base_url}")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+def build_urls(
+    base_url: str, repeat: int, slow_delay: float
+) -> dict[str, list[str]]:
+    """按页面类型生成待爬取的URL，repeat 控制每种页面的数量
+
+    查询参数中的序号保证每个URL唯一，避免被当作重复链接合并。
+    """
+    urls: dict[str, list[str]] = defaultdict(list)
+    for i in range(repeat):
+        for name in ARTICLES:
+            urls["article"].append(f"{base_url}/articles/{name}?n={i}")
+        urls["slow"].append(
+            f"{base_url}/slow/{ARTICLES[0]}?delay={slow_delay}&n={i}"
+        )
+        urls["rate_limited"].append(
+            f"{base_url}/ratelimit/{ARTICLES[1]}?fail=1&n={i}"
+        )
+        urls["js_only"].append(f"{base_url}/js/js_only.html?n={i}")
+    return dict(urls)
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """线性插值百分位数，values 为空时返回 None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _max_rss_mb(who: int) -> float:
+    """ru_maxrss 在 Linux 上单位为 KB，在 macOS 上为字节"""
+    rss = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":
+        return rss / 1024 / 1024
+    return rss / 1024
+
+
+def _run_preset(preset: str, urls_by_kind: dict[str, list[str]]) -> dict:
+    """在独立子进程中执行单个预设，保证峰值 RSS 互不干扰"""
+    logging.basicConfig(level=logging.WARNING)
+
+    from src.crawl.crawl import WebExtractorConfig, scrape_multiple_websites
+
+    config = getattr(WebExtractorConfig, PRESETS[preset])()
+    urls = [url for kind_urls in urls_by_kind.values() for url in kind_urls]
+
+    started_at = time.monotonic()
+    results = asyncio.run(scrape_multiple_websites(urls, config=config))
+    wall_time = time.monotonic() - started_at
+
+    latencies = [
+        r["elapsed"] for r in results.values() if r.get("elapsed") is not None
+    ]
+    by_kind = {}
+    for kind, kind_urls in urls_by_kind.items():
+        kind_results = [results.get(url, {}) for url in kind_urls]
+        kind_latencies = [
+            r["elapsed"] for r in kind_results if r.get("elapsed") is not None
+        ]
+        by_kind[kind] = {
+            "urls": len(kind_urls),
+            "success": sum(1 for r in kind_results if r.get("success")),
+            "p50_latency_s": percentile(kind_latencies, 50),
+            "p95_latency_s": percentile(kind_latencies, 95),
+        }
+
+    return {
+        "preset": preset,
+        "config": str(config),
+        "urls": len(urls),
+        "success": sum(1 for r in results.values() if r.get("success")),
+        "wall_time_s": wall_time,
+        "urls_per_min": len(urls) / wall_time * 60 if wall_time > 0 else None,
+        "p50_latency_s": percentile(latencies, 50),
+        "p95_latency_s": percentile(latencies, 95),
+        "peak_rss_mb": _max_rss_mb(resource.RUSAGE_SELF),
+        "peak_rss_children_mb": _max_rss_mb(resource.RUSAGE_CHILDREN),
+        "by_kind": by_kind,
+    }
+
+
+def run_benchmark(
+    presets: list[str], repeat: int = 1, slow_delay: float = 3.0
+) -> dict[str, Any]:
+    """启动 fixture 服务并依次运行各个预设"""
+    ctx = multiprocessing.get_context("spawn")
+    report: dict[str, Any] = {
+        "benchmark": "crawl_throughput",
+        "started_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "slow_delay_s": slow_delay,
+        "results": [],
+    }
+    with FixtureServer() as server:
+        for preset in presets:
+            # 每个预设使用新的URL，避免 429 计数在预设之间串扰
+            urls_by_kind = build_urls(
+                f"{server.base_url}", repeat=repeat, slow_delay=slow_delay
+            )
+            urls_by_kind = {
+                kind: [f"{url}&preset={preset}" for url in kind_urls]
+                for kind, kind_urls in urls_by_kind.items()
+            }
+            logger.info(f"运行预设 {preset}")
+            with ctx.Pool(processes=1) as pool:
+                result = pool.apply(_run_preset, (preset, urls_by_kind))
+            report["results"].append(result)
+    return report
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="crawl throughput benchmark")
+    parser.add_argument(
+        "--presets",
+        nargs="+",
+        choices=list(PRESETS.keys()),
+        default=list(PRESETS.keys()),
+        help="要运行的配置预设",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="每种页面生成的URL数量"
+    )
+    parser.add_argument(
+        "--slow-delay", type=float, default=3.0, help="慢页面的响应延迟（秒）"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="结果输出文件，默认输出到stdout",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = arg_parser()
+    logging.basicConfig(level=logging.INFO)
+    report = run_benchmark(
+        presets=args.presets, repeat=args.repeat, slow_delay=args.slow_delay
+    )
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+LLM 池负载测试
+
+在本地启动 mock LLM 服务（见 scripts/mock_llm_server.py），为每个 profile
+创建一个部署组成模型池，按目标速率把分类和评分提示词通过 PoolManager 的池
+发送出去，输出吞吐、延迟分位数和错误放大倍数（mock 服务收到的请求数与发起的
+调用数之比，反映 Router 重试带来的额外负载）。
+
+提示词默认由 testdata/crawl_fixtures 中录制的文章页面按 tagger / score 节点
+的格式生成，也可以用 --prompts 指定 JSONL 文件，每行为
+{"node": "tagger", "messages": [...]}。
+
+--strategies、--concurrency 和 --batch-sizes 可以传入多个值，依次运行所有
+组合，便于对比。
+
+用法:
+    python -m scripts.bench_llm --profiles profiles.json --rate 20 \
+        --duration 30 --strategies simple-shuffle adaptive \
+        --concurrency 8 16 --batch-sizes 1 4 --output bench_llm.json
+
+结果为 JSON，便于在 CI 中对比回归。
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import asdict
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import html2text
+
+from scripts.bench_crawl import ARTICLES, FIXTURE_DIR, percentile
+from scripts.mock_llm_server import (
+    MockLLMServer,
+    add_profile_arguments,
+    load_profiles,
+    profiles_from_args,
+)
+
+logger = logging.getLogger(__name__)
+
+BENCH_POOL = "bench"
+NODE_PROMPTS = {
+    "tagger": ("tagger", "tagger_batch"),
+    "score": ("scorer", "scorer_batch"),
+}
+
+
+def _fixture_texts() -> list[str]:
+    converter = html2text.HTML2Text()
+    converter.ignore_images = True
+    return [
+        converter.handle((FIXTURE_DIR / name).read_text(encoding="utf-8"))
+        for name in ARTICLES
+    ]
+
+
+def build_fixture_prompts(batch_size: int = 1) -> list[dict[str, Any]]:
+    """按 tagger / score 节点的格式，用录制的文章生成提示词"""
+    from src.graph.batch import build_batch_message
+    from src.models.rss_entry import RssEntry
+    from src.prompts.prompts import get_prompt, get_prompt_version
+
+    texts = _fixture_texts()
+    prompts = []
+    for node, (single, batch) in NODE_PROMPTS.items():
+        if batch_size <= 1:
+            for text in texts:
+                instruction = (
+                    f"现在请对原始内容进行分类，并给出你的分类结果\n\n"
+                    f"原始内容:{text}"
+                    if node == "tagger"
+                    else f"请为以下内容进行评分和总结:\n{text}"
+                )
+                prompts.append(
+                    {
+                        "node": node,
+                        "prompt_version": get_prompt_version(single),
+                        "messages": get_prompt(single)
+                        + [{"role": "user", "content": instruction}],
+                    }
+                )
+            continue
+        entries = [
+            RssEntry(id=i, content=texts[i % len(texts)])
+            for i in range(batch_size)
+        ]
+        instruction = (
+            "现在请对以下原始内容逐条进行分类，并给出分类结果"
+            if node == "tagger"
+            else "请为以下内容逐篇进行评分和总结"
+        )
+        prompts.append(
+            {
+                "node": node,
+                "prompt_version": get_prompt_version(batch),
+                "messages": get_prompt(batch)
+                + [
+                    {
+                        "role": "user",
+                        "content": build_batch_message(entries, instruction),
+                    }
+                ],
+            }
+        )
+    return prompts
+
+
+def load_prompts(path: str) -> list[dict[str, Any]]:
+    prompts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                prompts.append(json.loads(line))
+    return prompts
+
+
+def build_pool(
+    server: MockLLMServer,
+    deployments: list[str],
+    strategy: str,
+    concurrency: int,
+    args: argparse.Namespace,
+):
+    """每个 profile 作为一个部署，创建独立的池管理器，不影响全局配置"""
+    from src.llms.litellm_factory import ModelConfig
+    from src.llms.pool_manager import PoolConfig, PoolManager
+
+    manager = PoolManager()
+    manager.create_pool(
+        BENCH_POOL,
+        [
+            ModelConfig(
+                provider="openai",
+                model=f"mock-{profile}",
+                api_key="mock",
+                api_base=server.api_base(profile),
+                timeout=args.timeout,
+            )
+            for profile in deployments
+        ],
+        load_balance_strategy=strategy,
+        pool_config=PoolConfig(
+            max_retries=args.max_retries,
+            timeout=args.timeout,
+            concurrent_limit=concurrency,
+            cache=False,
+            hedge_max_rate=args.hedge_max_rate,
+        ),
+    )
+    return manager
+
+
+async def _drive(
+    llm,
+    prompts: list[dict[str, Any]],
+    rate: float,
+    duration: float,
+    concurrency: int,
+    poisson: bool,
+) -> list[dict[str, Any]]:
+    """开环发送请求：按目标速率到达，超过并发上限的请求排队等待"""
+    semaphore = asyncio.Semaphore(concurrency)
+    results: list[dict[str, Any]] = []
+
+    async def one(prompt: dict[str, Any], arrived: float):
+        async with semaphore:
+            started = time.monotonic()
+            error = None
+            try:
+                await llm.ainvoke(
+                    prompt["messages"],
+                    prompt_version=prompt.get("prompt_version"),
+                )
+            except Exception as e:
+                error = type(e).__name__
+            ended = time.monotonic()
+        results.append(
+            {
+                "node": prompt.get("node"),
+                "latency": ended - arrived,
+                "service": ended - started,
+                "error": error,
+            }
+        )
+
+    tasks = []
+    begin = time.monotonic()
+    offset = 0.0
+    for i in itertools.count():
+        offset = offset + random.expovariate(rate) if poisson else i / rate
+        if offset >= duration:
+            break
+        await asyncio.sleep(max(begin + offset - time.monotonic(), 0))
+        tasks.append(
+            asyncio.create_task(
+                one(prompts[i % len(prompts)], time.monotonic())
+            )
+        )
+    await asyncio.gather(*tasks)
+    return results
+
+
+def _summarize(
+    results: list[dict[str, Any]],
+    wall_time: float,
+    upstream: dict[str, dict[str, int]],
+) -> dict[str, Any]:
+    latencies = [r["latency"] for r in results if r["error"] is None]
+    services = [r["service"] for r in results if r["error"] is None]
+    upstream_requests = sum(
+        stats.get("requests", 0) for stats in upstream.values()
+    )
+    return {
+        "calls": len(results),
+        "success": len(latencies),
+        "errors": dict(Counter(r["error"] for r in results if r["error"])),
+        "wall_time_s": wall_time,
+        "throughput_per_s": (
+            len(latencies) / wall_time if wall_time > 0 else None
+        ),
+        "p50_latency_s": percentile(latencies, 50),
+        "p90_latency_s": percentile(latencies, 90),
+        "p99_latency_s": percentile(latencies, 99),
+        "p50_service_s": percentile(services, 50),
+        "p99_service_s": percentile(services, 99),
+        "upstream_requests": upstream_requests,
+        "error_amplification": (
+            upstream_requests / len(results) if results else None
+        ),
+        "upstream": upstream,
+    }
+
+
+def run_case(
+    server: MockLLMServer,
+    deployments: list[str],
+    prompts: list[dict[str, Any]],
+    strategy: str,
+    concurrency: int,
+    batch_size: int,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    from src.llms.adaptive_routing import adaptive_stats
+    from src.llms.circuit_breaker import circuit_breakers
+    from src.llms.hedging import hedge_manager
+
+    # 每个组合从相同的初始状态开始
+    server.reset()
+    adaptive_stats.clear()
+    circuit_breakers.clear()
+    hedge_manager.clear()
+
+    manager = build_pool(server, deployments, strategy, concurrency, args)
+    llm = manager.pools[BENCH_POOL].get_model()
+    started_at = time.monotonic()
+    results = asyncio.run(
+        _drive(
+            llm,
+            prompts,
+            rate=args.rate,
+            duration=args.duration,
+            concurrency=concurrency,
+            poisson=args.poisson,
+        )
+    )
+    wall_time = time.monotonic() - started_at
+    status = manager.list_pools()[BENCH_POOL]
+    summary = _summarize(results, wall_time, server.get_stats())
+    return {
+        "strategy": strategy,
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        **summary,
+        # 批量调用每次处理 batch_size 个条目
+        "items_per_s": (
+            summary["throughput_per_s"] * batch_size
+            if summary["throughput_per_s"] is not None and not args.prompts
+            else None
+        ),
+        "circuit_breakers": status["circuit_breakers"],
+        "hedging": status["hedging"],
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    """启动 mock 服务并依次运行所有组合"""
+    from src.llms.adaptive_routing import adaptive_stats
+    from src.llms.call_log import call_logger
+
+    # 测试产生的调用记录和路由统计不写入正式的数据库和统计文件
+    call_logger.flush_every = sys.maxsize
+    adaptive_stats.path = str(
+        Path(tempfile.mkdtemp(prefix="bench_llm_")) / "routing_stats.json"
+    )
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    report: dict[str, Any] = {
+        "benchmark": "llm_pool_load",
+        "started_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rate_per_s": args.rate,
+        "duration_s": args.duration,
+        "poisson": args.poisson,
+        "max_retries": args.max_retries,
+        "results": [],
+    }
+    with MockLLMServer(profiles_from_args(args), seed=args.seed) as server:
+        # 指定了 profile 文件时只使用文件中的 profile 作为部署
+        deployments = list(load_profiles(args.profiles) or server.profiles)
+        report["profiles"] = {
+            name: asdict(server.profiles[name]) for name in deployments
+        }
+        for strategy, concurrency, batch_size in itertools.product(
+            args.strategies, args.concurrency, args.batch_sizes
+        ):
+            prompts = (
+                load_prompts(args.prompts)
+                if args.prompts
+                else build_fixture_prompts(batch_size)
+            )
+            logger.info(
+                f"运行 strategy={strategy} concurrency={concurrency} "
+                f"batch_size={batch_size}"
+            )
+            report["results"].append(
+                run_case(
+                    server,
+                    deployments,
+                    prompts,
+                    strategy,
+                    concurrency,
+                    batch_size,
+                    args,
+                )
+            )
+    return report
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="LLM pool load benchmark")
+    add_profile_arguments(parser)
+    parser.add_argument(
+        "--prompts", type=str, default=None, help="录制的提示词（JSONL）"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=10.0, help="目标调用速率（次/秒）"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="发送请求的时长（秒）"
+    )
+    parser.add_argument(
+        "--poisson", action="store_true", help="按泊松过程生成到达时间"
+    )
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        default=["simple-shuffle"],
+        help="要对比的负载均衡策略",
+    )
+    parser.add_argument(
+        "--concurrency",
+        nargs="+",
+        type=int,
+        default=[10],
+        help="要对比的并发上限（concurrent_limit）",
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        nargs="+",
+        type=int,
+        default=[1],
+        help="要对比的批量大小，使用 --prompts 时不生效",
+    )
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--timeout", type=int, default=30)
+    parser.add_argument(
+        "--hedge-max-rate", type=float, default=None, help="对冲比例上限"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="结果输出文件，默认输出到stdout",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = arg_parser()
+    logging.basicConfig(level=logging.INFO)
+    for name in ("LiteLLM", "LiteLLM Router", "httpx"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    report = run_benchmark(args)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
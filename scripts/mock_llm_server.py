@@ -0,0 +1,540 @@
+"""
+OpenAI 兼容的本地 mock LLM 服务
+
+提供 /v1/chat/completions，按配置的延迟分布返回与提示词匹配的结果（分类、
+评分及其批量格式），可以注入 500 错误和 429，并按 tpm / rpm 限流。不同的
+部署可以使用不同的配置（profile），通过路径前缀区分：
+
+    http://127.0.0.1:9000/v1               使用 default 配置
+    http://127.0.0.1:9000/{profile}/v1     使用对应 profile 的配置
+
+同时提供 OpenAI 批量 API 的最小实现（/v1/files、/v1/batches），批量任务在
+提交 batch_delay 秒后完成，其中的每个请求按 error_rate 失败并写入错误文件。
+
+GET /stats 返回各 profile 收到的请求数和状态码分布。
+
+用法:
+    python -m scripts.mock_llm_server --port 9000 --latency lognormal:0.8,0.5 \
+        --error-rate 0.02 --rate-limit-rate 0.01 --rpm 600
+
+    # profile 配置文件为 JSON，键为 profile 名，值为 MockProfile 的字段
+    python -m scripts.mock_llm_server --profiles profiles.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = "default"
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "exponential")
+
+
+def parse_latency(spec: str) -> tuple[str, list[float]]:
+    """
+    解析延迟分布，单位为秒
+
+        fixed:0.5              固定延迟
+        uniform:0.2,1.5        均匀分布
+        lognormal:0.8,0.5      对数正态分布，参数为中位数和 sigma
+        exponential:0.5        指数分布，参数为均值
+    """
+    name, _, params = spec.partition(":")
+    if name not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(f"未知的延迟分布: {name}")
+    values = [float(value) for value in params.split(",") if value]
+    expected = {"fixed": 1, "uniform": 2, "lognormal": 2, "exponential": 1}
+    if len(values) != expected[name]:
+        raise ValueError(f"延迟分布 {name} 需要 {expected[name]} 个参数")
+    return name, values
+
+
+@dataclass
+class MockProfile:
+    """一个 mock 部署的行为"""
+
+    latency: str = "fixed:0.2"
+    seconds_per_1k_tokens: float = 0.0  # 按输入 token 数增加的延迟
+    error_rate: float = 0.0  # 返回 500 的概率
+    rate_limit_rate: float = 0.0  # 随机返回 429 的概率
+    tpm: Optional[int] = None
+    rpm: Optional[int] = None
+    completion_tokens: int = 50
+    batch_delay: float = 0.0  # 批量任务从提交到完成的时间（秒）
+
+    def __post_init__(self):
+        self._distribution = parse_latency(self.latency)
+
+    def sample_latency(self, prompt_tokens: int) -> float:
+        name, params = self._distribution
+        if name == "fixed":
+            latency = params[0]
+        elif name == "uniform":
+            latency = random.uniform(params[0], params[1])
+        elif name == "lognormal":
+            latency = params[0] * random.lognormvariate(0, params[1])
+        else:
+            latency = random.expovariate(1 / params[0])
+        return latency + prompt_tokens / 1000 * self.seconds_per_1k_tokens
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "MockProfile":
+        names = {f.name for f in fields(cls)}
+        unknown = set(data) - names
+        if unknown:
+            raise ValueError(f"未知的 profile 字段: {sorted(unknown)}")
+        return cls(**data)
+
+
+@dataclass
+class _Usage:
+    """最近 60 秒内的请求和 token，用于 tpm / rpm 限流"""
+
+    requests: deque = field(default_factory=deque)
+    tokens: deque = field(default_factory=deque)
+
+    def prune(self, now: float):
+        for window in (self.requests, self.tokens):
+            while window and now - window[0][0] >= 60:
+                window.popleft()
+
+    def retry_after(
+        self, now: float, tokens: int, tpm: Optional[int], rpm: Optional[int]
+    ) -> Optional[float]:
+        """超出限额时返回需要等待的秒数"""
+        self.prune(now)
+        if rpm is not None and len(self.requests) >= rpm:
+            return 60 - (now - self.requests[0][0])
+        used = sum(count for _, count in self.tokens)
+        if tpm is not None and self.tokens and used + tokens > tpm:
+            return 60 - (now - self.tokens[0][0])
+        return None
+
+    def add(self, now: float, tokens: int):
+        self.requests.append((now, 1))
+        self.tokens.append((now, tokens))
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """按 4 个字符一个 token 粗略估计"""
+    return max(sum(len(str(m.get("content", ""))) for m in messages) // 4, 1)
+
+
+def mock_content(messages: list[dict]) -> str:
+    """根据系统提示词返回对应格式的结果，批量格式按输入中的条目 id 生成"""
+    system = " ".join(
+        str(m.get("content", "")) for m in messages if m.get("role") == "system"
+    )
+    user = " ".join(
+        str(m.get("content", "")) for m in messages if m.get("role") != "system"
+    )
+    ids = [
+        int(entry_id) for entry_id in re.findall(r'<entry id="(\d+)">', user)
+    ]
+    if "tag: 标签" in system:
+        item = {"tag": "systematic", "summary": "mock 摘要"}
+    elif "classification_rationale" in system:
+        item = {"name": "tech", "classification_rationale": "mock 分类理由"}
+    else:
+        return "ok"
+    if "JSON数组" in system:
+        return json.dumps(
+            [{"id": entry_id, **item} for entry_id in ids], ensure_ascii=False
+        )
+    return json.dumps(item, ensure_ascii=False)
+
+
+class MockLLMServer:
+    """
+    mock LLM 服务，在独立线程的事件循环中运行
+
+    Args:
+        profiles: profile 名到配置的映射，缺少 default 时使用默认配置
+        host: 监听地址
+        port: 监听端口，0 表示随机端口
+        seed: 随机数种子，便于复现
+    """
+
+    def __init__(
+        self,
+        profiles: Optional[dict[str, MockProfile]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        self.profiles = dict(profiles or {})
+        self.profiles.setdefault(DEFAULT_PROFILE, MockProfile())
+        self.host = host
+        self.port = port
+        if seed is not None:
+            random.seed(seed)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, daemon=True
+        )
+        self._runner = None
+        self._usage: dict[str, _Usage] = defaultdict(_Usage)
+        self._stats: dict[str, dict[str, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._files: dict[str, bytes] = {}
+        self._batches: dict[str, dict[str, Any]] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def api_base(self, profile: str = DEFAULT_PROFILE) -> str:
+        if profile == DEFAULT_PROFILE:
+            return f"{self.base_url}/v1"
+        return f"{self.base_url}/{profile}/v1"
+
+    def get_stats(self) -> dict[str, dict[str, int]]:
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def reset(self):
+        """清空计数和限流窗口，供多轮测试之间使用"""
+        self._usage.clear()
+        self._stats.clear()
+        self._files.clear()
+        self._batches.clear()
+
+    @staticmethod
+    def _error(status: int, message: str, **headers) -> web.Response:
+        return web.json_response(
+            {"error": {"message": message, "type": "mock_error"}},
+            status=status,
+            headers=headers,
+        )
+
+    async def _chat(self, request: web.Request) -> web.Response:
+        name = request.match_info.get("profile", DEFAULT_PROFILE)
+        profile = self.profiles.get(name)
+        if profile is None:
+            return self._error(404, f"profile {name} 不存在")
+        body = await request.json()
+        messages = body.get("messages") or []
+        prompt_tokens = estimate_tokens(messages)
+        stats = self._stats[name]
+        stats["requests"] += 1
+
+        now = time.monotonic()
+        retry_after = self._usage[name].retry_after(
+            now,
+            prompt_tokens + profile.completion_tokens,
+            profile.tpm,
+            profile.rpm,
+        )
+        if retry_after is not None or random.random() < profile.rate_limit_rate:
+            stats["429"] += 1
+            return self._error(
+                429,
+                "Rate limit exceeded",
+                **{"Retry-After": str(max(int(retry_after or 1), 1))},
+            )
+        self._usage[name].add(now, prompt_tokens + profile.completion_tokens)
+
+        await asyncio.sleep(profile.sample_latency(prompt_tokens))
+        if random.random() < profile.error_rate:
+            stats["500"] += 1
+            return self._error(500, "Internal server error")
+
+        stats["200"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        return web.json_response(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": mock_content(messages),
+                        },
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": profile.completion_tokens,
+                    "total_tokens": prompt_tokens + profile.completion_tokens,
+                },
+            }
+        )
+
+    async def _get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.get_stats())
+
+    # ------------------------------------------------------------------
+    # 批量 API
+    # ------------------------------------------------------------------
+
+    def _file_object(self, file_id: str, purpose: str) -> dict[str, Any]:
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(self._files[file_id]),
+            "created_at": int(time.time()),
+            "filename": f"{file_id}.jsonl",
+            "purpose": purpose,
+        }
+
+    def _store_file(self, lines: list[dict]) -> Optional[str]:
+        if not lines:
+            return None
+        file_id = f"file-{uuid.uuid4().hex}"
+        self._files[file_id] = "".join(
+            json.dumps(line, ensure_ascii=False) + "\n" for line in lines
+        ).encode()
+        return file_id
+
+    async def _upload_file(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        upload = data.get("file")
+        if upload is None:
+            return self._error(400, "缺少 file")
+        file_id = f"file-{uuid.uuid4().hex}"
+        self._files[file_id] = upload.file.read()
+        return web.json_response(
+            self._file_object(file_id, data.get("purpose", "batch"))
+        )
+
+    async def _file_content(self, request: web.Request) -> web.Response:
+        content = self._files.get(request.match_info["file_id"])
+        if content is None:
+            return self._error(404, "文件不存在")
+        return web.Response(body=content, content_type="application/jsonl")
+
+    async def _create_batch(self, request: web.Request) -> web.Response:
+        name = request.match_info.get("profile", DEFAULT_PROFILE)
+        if name not in self.profiles:
+            return self._error(404, f"profile {name} 不存在")
+        body = await request.json()
+        if body.get("input_file_id") not in self._files:
+            return self._error(400, "input_file_id 不存在")
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self._batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "completed_at": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "metadata": body.get("metadata"),
+            "_profile": name,
+            "_submitted": time.monotonic(),
+        }
+        self._stats[name]["batches"] += 1
+        return web.json_response(self._batch_object(batch_id))
+
+    def _complete_batch(self, batch: dict[str, Any]):
+        """逐行生成结果，按 error_rate 把请求写入错误文件"""
+        profile = self.profiles[batch["_profile"]]
+        stats = self._stats[batch["_profile"]]
+        outputs, errors = [], []
+        for line in self._files[batch["input_file_id"]].decode().splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            messages = request.get("body", {}).get("messages") or []
+            result = {
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": request.get("custom_id"),
+                "error": None,
+            }
+            stats["batch_requests"] += 1
+            if random.random() < profile.error_rate:
+                stats["batch_500"] += 1
+                result["response"] = {
+                    "status_code": 500,
+                    "body": {"error": {"message": "Internal server error"}},
+                }
+                errors.append(result)
+                continue
+            stats["batch_200"] += 1
+            result["response"] = {
+                "status_code": 200,
+                "body": {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "model": request.get("body", {}).get("model", "mock"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": mock_content(messages),
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                },
+            }
+            outputs.append(result)
+        batch.update(
+            status="completed",
+            output_file_id=self._store_file(outputs),
+            error_file_id=self._store_file(errors),
+            completed_at=int(time.time()),
+            request_counts={
+                "total": len(outputs) + len(errors),
+                "completed": len(outputs),
+                "failed": len(errors),
+            },
+        )
+
+    def _batch_object(self, batch_id: str) -> dict[str, Any]:
+        return {
+            key: value
+            for key, value in self._batches[batch_id].items()
+            if not key.startswith("_")
+        }
+
+    async def _get_batch(self, request: web.Request) -> web.Response:
+        batch = self._batches.get(request.match_info["batch_id"])
+        if batch is None:
+            return self._error(404, "批量任务不存在")
+        delay = self.profiles[batch["_profile"]].batch_delay
+        if (
+            batch["status"] == "in_progress"
+            and time.monotonic() - batch["_submitted"] >= delay
+        ):
+            self._complete_batch(batch)
+        return web.json_response(self._batch_object(batch["id"]))
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        for prefix in ("", "/{profile}"):
+            app.router.add_post(f"{prefix}/v1/chat/completions", self._chat)
+            app.router.add_post(f"{prefix}/v1/files", self._upload_file)
+            app.router.add_get(
+                f"{prefix}/v1/files/{{file_id}}/content", self._file_content
+            )
+            app.router.add_post(f"{prefix}/v1/batches", self._create_batch)
+            app.router.add_get(
+                f"{prefix}/v1/batches/{{batch_id}}", self._get_batch
+            )
+        app.router.add_get("/stats", self._get_stats)
+        return app
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def _stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def __enter__(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        logger.info(f"mock LLM 服务已启动: {self.base_url}")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+def load_profiles(path: Optional[str]) -> dict[str, MockProfile]:
+    """从 JSON 文件读取 profile 配置"""
+    if not path:
+        return {}
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {
+        name: MockProfile.from_dict(values) for name, values in data.items()
+    }
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """default profile 的命令行参数，与基准测试脚本共用"""
+    parser.add_argument(
+        "--profiles", type=str, default=None, help="profile 配置文件（JSON）"
+    )
+    parser.add_argument(
+        "--latency",
+        type=str,
+        default="fixed:0.2",
+        help="延迟分布，如 fixed:0.5、uniform:0.2,1.5、lognormal:0.8,0.5",
+    )
+    parser.add_argument(
+        "--seconds-per-1k-tokens",
+        type=float,
+        default=0.0,
+        help="每 1000 个输入 token 增加的延迟（秒）",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="返回 500 的概率"
+    )
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0.0, help="随机返回 429 的概率"
+    )
+    parser.add_argument(
+        "--tpm", type=int, default=None, help="每分钟 token 上限"
+    )
+    parser.add_argument("--rpm", type=int, default=None, help="每分钟请求上限")
+    parser.add_argument("--seed", type=int, default=None, help="随机数种子")
+
+
+def profiles_from_args(args: argparse.Namespace) -> dict[str, MockProfile]:
+    profiles = load_profiles(args.profiles)
+    profiles.setdefault(
+        DEFAULT_PROFILE,
+        MockProfile(
+            latency=args.latency,
+            seconds_per_1k_tokens=args.seconds_per_1k_tokens,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            tpm=args.tpm,
+            rpm=args.rpm,
+        ),
+    )
+    return profiles
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="mock OpenAI-compatible LLM")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = arg_parser()
+    logging.basicConfig(level=logging.INFO)
+    server = MockLLMServer(
+        profiles_from_args(args), host=args.host, port=args.port, seed=args.seed
+    )
+    for name in server.profiles:
+        logger.info(f"profile {name}: {server.api_base(name)}")
+    web.run_app(server.build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 import logging
 from contextlib import asynccontextmanager
+from datetime import datetime
 
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from fastapi import FastAPI
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response
 
+from src.llms.adaptive_routing import adaptive_stats
+from src.llms.call_log import call_logger
+from src.llms.pool_manager import pool_manager
+from src.llms.response_cache import response_cache
 from src.llms.unified_manager import unified_llm_manager
 from src.models import get_db_url
-from src.workflows import fetch_task
+from src.websub import websub_manager
+from src.workflows import fetch_task, websub_task
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +24,8 @@ async def lifespan(app: FastAPI):
     # 初始化统一LLM管理器
     unified_llm_manager.initialize()
     logger.info("统一LLM管理器已初始化")
+    pool_manager.health_checker.start()
+    unified_llm_manager.config_watcher.start()
 
     scheduler = AsyncIOScheduler(
         {"default": SQLAlchemyJobStore(url=get_db_url())}
@@ -30,10 +39,24 @@ async def lifespan(app: FastAPI):
         # minutes=1,
         id="tagger task",
     )
+    if websub_manager.enabled:
+        scheduler.add_job(
+            websub_task,
+            "interval",
+            hours=1,
+            id="websub task",
+            replace_existing=True,
+            next_run_time=datetime.now(),
+        )
     scheduler.start()
     logger.info("fastapi started")
     yield
     scheduler.shutdown()
+    await unified_llm_manager.config_watcher.stop()
+    await pool_manager.health_checker.stop()
+    call_logger.flush()
+    response_cache.flush_hits()
+    adaptive_stats.save()
 
 
 app = FastAPI(lifespan=lifespan, title="yuanzhi ai-extractor web API")
@@ -44,5 +67,41 @@ async def index():
     return "hello world"
 
 
+@app.get("/websub/callback/{token}")
+async def websub_verify(token: str, request: Request):
+    """hub 的订阅确认请求，确认时原样返回 challenge"""
+    params = request.query_params
+    try:
+        lease_seconds = int(params.get("hub.lease_seconds", 0)) or None
+    except ValueError:
+        lease_seconds = None
+    challenge = websub_manager.verify_intent(
+        token=token,
+        mode=params.get("hub.mode", ""),
+        topic=params.get("hub.topic", ""),
+        challenge=params.get("hub.challenge"),
+        lease_seconds=lease_seconds,
+    )
+    if challenge is None:
+        raise HTTPException(status_code=404)
+    return PlainTextResponse(challenge)
+
+
+@app.post("/websub/callback/{token}", status_code=202)
+async def websub_push(
+    token: str, request: Request, background_tasks: BackgroundTasks
+):
+    """hub 推送的 feed 内容，签名校验失败的内容直接忽略"""
+    body = await request.body()
+    source_url = websub_manager.accept_push(
+        token=token,
+        body=body,
+        signature=request.headers.get("X-Hub-Signature"),
+    )
+    if source_url is not None:
+        background_tasks.add_task(websub_manager.process_push, source_url, body)
+    return Response(status_code=202)
+
+
 async def sample_task():
     pass
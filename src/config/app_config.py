@@ -12,6 +12,37 @@ class AppConfig(BaseSettings):
     SQLITE_URL: str = Field(
         description="SQLite URL", default="sqlite:///app.db"
     )
+    HTML_ARCHIVE_ENABLED: bool = Field(
+        description="是否归档抓取到的原始 HTML", default=True
+    )
+    WEBSUB_CALLBACK_URL: str = Field(
+        description="WebSub 回调的公网地址，如 'https://example.com'，为空时不订阅",
+        default="",
+    )
+    WEBSUB_LEASE_SECONDS: int = Field(
+        description="WebSub 订阅请求的租约时长（秒）", default=7 * 24 * 3600
+    )
+    WEBSUB_POLL_FALLBACK_HOURS: int = Field(
+        description="WebSub 订阅有效但超过该时长没有推送时，回退为轮询",
+        default=24,
+    )
+    PRECLASSIFIER_ENABLED: bool = Field(
+        description="是否在调用 LLM 前使用本地预分类器", default=False
+    )
+    PRECLASSIFIER_THRESHOLD: float = Field(
+        description="预分类器直接写入结果的置信度阈值", default=0.9
+    )
+    PRECLASSIFIER_SAMPLE_RATE: float = Field(
+        description="置信度达到阈值时仍交给 LLM 处理的抽样比例，用于统计一致率",
+        default=0.1,
+    )
+    PRECLASSIFIER_MIN_SAMPLES: int = Field(
+        description="训练样本少于该数量时不使用预分类器", default=200
+    )
+    PRIORITY_FRESH_DAYS: int = Field(
+        description="发布时间在该天数内的条目按 fresh 通道调用 LLM，更早的按 backfill 通道",
+        default=7,
+    )
     LANGFUSE_SECRET_KEY: str = Field(
         description="Langfuse secret key", default=""
     )
@@ -0,0 +1,317 @@
+import logging
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from sqlalchemy.orm import Session
+
+from src.models import db
+from src.models.html_snapshot import CompressionDict, HtmlSnapshot
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 取决于运行环境
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# 不影响页面内容的跟踪参数，规范化 URL 时移除
+TRACKING_PARAMS = {
+    "chksm",
+    "mpshare",
+    "scene",
+    "srcid",
+    "sharer_sharetime",
+    "sharer_shareid",
+    "sharer_shareinfo",
+    "sharer_shareinfo_first",
+    "from",
+    "isappinstalled",
+    "spm",
+    "ref",
+}
+
+# zlib 预设字典最多使用 32KB 窗口
+ZLIB_MAX_DICT_SIZE = 32 * 1024
+
+
+def canonicalize_url(url: str) -> str:
+    """规范化 URL，作为快照的键
+
+    - scheme 和域名转为小写
+    - 去掉 fragment 和 utm_* 等跟踪参数
+    - 查询参数按键排序
+    """
+    parsed = urlparse(url.strip())
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    ]
+    query.sort()
+    return urlunparse(
+        (
+            parsed.scheme.lower(),
+            parsed.netloc.lower(),
+            parsed.path or "/",
+            parsed.params,
+            urlencode(query),
+            "",
+        )
+    )
+
+
+class HtmlArchive:
+    """原始 HTML 快照归档
+
+    快照按 (规范化URL, 抓取时间) 存储在数据库中，内容使用 zstd 压缩；
+    每个域名积累到 dict_min_samples 个快照后，会用最近的样本训练该域名的
+    压缩字典，之后的快照使用字典压缩。同一站点的页面共享大量模板代码，
+    字典压缩能显著降低体积。
+
+    未安装 zstandard 时退化为 zlib 预设字典，字典取样本中高频出现的行；
+    zlib 只能利用 32KB 的字典窗口。
+
+    Args:
+        dict_min_samples: 训练字典所需的最少样本数
+        dict_size: zstd 字典大小（字节）
+        dict_retrain_every: 距上次训练新增多少快照后重新训练
+    """
+
+    def __init__(
+        self,
+        dict_min_samples: int = 20,
+        dict_size: int = 64 * 1024,
+        dict_retrain_every: int = 500,
+    ):
+        self.dict_min_samples = dict_min_samples
+        self.dict_size = dict_size
+        self.dict_retrain_every = dict_retrain_every
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self._dict_cache: dict[int, bytes] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_domain(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    # ------------------------------------------------------------------
+    # 压缩与解压
+    # ------------------------------------------------------------------
+
+    def _compress(
+        self, raw: bytes, codec: str, dict_data: Optional[bytes]
+    ) -> bytes:
+        if codec == "zstd":
+            if dict_data:
+                zdict = zstandard.ZstdCompressionDict(dict_data)
+                compressor = zstandard.ZstdCompressor(level=10, dict_data=zdict)
+            else:
+                compressor = zstandard.ZstdCompressor(level=10)
+            return compressor.compress(raw)
+
+        if dict_data:
+            compressor = zlib.compressobj(level=9, zdict=dict_data)
+        else:
+            compressor = zlib.compressobj(level=9)
+        return compressor.compress(raw) + compressor.flush()
+
+    def _decompress(
+        self, data: bytes, codec: str, dict_data: Optional[bytes]
+    ) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("解压 zstd 快照需要安装 zstandard")
+            if dict_data:
+                zdict = zstandard.ZstdCompressionDict(dict_data)
+                decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+            else:
+                decompressor = zstandard.ZstdDecompressor()
+            return decompressor.decompress(data)
+
+        if dict_data:
+            decompressor = zlib.decompressobj(zdict=dict_data)
+        else:
+            decompressor = zlib.decompressobj()
+        return decompressor.decompress(data) + decompressor.flush()
+
+    def _get_dict_data(
+        self, session: Session, dict_id: Optional[int]
+    ) -> Optional[bytes]:
+        if dict_id is None:
+            return None
+        with self._lock:
+            if dict_id in self._dict_cache:
+                return self._dict_cache[dict_id]
+        record = session.get(CompressionDict, dict_id)
+        if record is None:
+            raise ValueError(f"压缩字典 {dict_id} 不存在")
+        with self._lock:
+            self._dict_cache[dict_id] = record.data
+        return record.data
+
+    # ------------------------------------------------------------------
+    # 字典训练
+    # ------------------------------------------------------------------
+
+    def _latest_dict(
+        self, session: Session, domain: str
+    ) -> Optional[CompressionDict]:
+        return (
+            session.query(CompressionDict)
+            .filter(
+                CompressionDict.domain == domain,
+                CompressionDict.codec == self.codec,
+            )
+            .order_by(CompressionDict.id.desc())
+            .first()
+        )
+
+    def _build_common_lines_dict(self, samples: list[bytes]) -> bytes:
+        """用跨样本出现次数最多的行构造字典，高频内容放在末尾"""
+        line_counts: Counter = Counter()
+        for sample in samples:
+            line_counts.update(
+                {line.strip() for line in sample.splitlines() if line.strip()}
+            )
+        common = [
+            line for line, count in line_counts.most_common() if count > 1
+        ]
+        selected: list[bytes] = []
+        size = 0
+        max_size = (
+            ZLIB_MAX_DICT_SIZE if self.codec == "zlib" else self.dict_size
+        )
+        for line in common:
+            if size + len(line) + 1 > max_size:
+                break
+            selected.append(line)
+            size += len(line) + 1
+        return b"\n".join(reversed(selected))
+
+    def _train_dict(self, samples: list[bytes]) -> bytes:
+        if self.codec == "zstd":
+            # 样本总量太小时 zstd 无法训练指定大小的字典，退化为原始内容字典
+            dict_size = min(self.dict_size, sum(map(len, samples)) // 4)
+            try:
+                return zstandard.train_dictionary(dict_size, samples).as_bytes()
+            except zstandard.ZstdError:
+                logger.warning("zstd 字典训练失败，使用高频行构造原始内容字典")
+        return self._build_common_lines_dict(samples)
+
+    def _maybe_train_dict(
+        self, session: Session, domain: str
+    ) -> Optional[CompressionDict]:
+        """样本足够时为域名训练新字典，返回当前应使用的字典"""
+        current = self._latest_dict(session, domain)
+        query = session.query(HtmlSnapshot).filter(
+            HtmlSnapshot.domain == domain
+        )
+        if current is not None:
+            new_samples = query.filter(
+                HtmlSnapshot.fetched_at > current.created_at
+            ).count()
+            if new_samples < self.dict_retrain_every:
+                return current
+        elif query.count() < self.dict_min_samples:
+            return None
+
+        snapshots = (
+            query.order_by(HtmlSnapshot.fetched_at.desc())
+            .limit(max(self.dict_min_samples * 5, 100))
+            .all()
+        )
+        samples = []
+        for snapshot in snapshots:
+            dict_data = self._get_dict_data(session, snapshot.dict_id)
+            samples.append(
+                self._decompress(snapshot.content, snapshot.codec, dict_data)
+            )
+
+        try:
+            dict_data = self._train_dict(samples)
+        except Exception:
+            logger.exception(f"训练域名 {domain} 的压缩字典失败")
+            return current
+        if not dict_data:
+            return current
+
+        record = CompressionDict(
+            domain=domain,
+            codec=self.codec,
+            sample_count=len(samples),
+            data=dict_data,
+        )
+        session.add(record)
+        session.flush()
+        logger.info(
+            f"为域名 {domain} 训练压缩字典 {record.id}: "
+            f"{len(samples)} 个样本, {len(dict_data)} 字节"
+        )
+        return record
+
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+
+    def store(
+        self, url: str, html: str, fetched_at: Optional[datetime] = None
+    ) -> Optional[int]:
+        """保存一份 HTML 快照，返回快照 ID"""
+        if not html:
+            return None
+
+        canonical_url = canonicalize_url(url)
+        domain = self.get_domain(canonical_url)
+        raw = html.encode("utf-8")
+        fetched_at = fetched_at or datetime.now()
+
+        with Session(db) as session:
+            try:
+                compression_dict = self._maybe_train_dict(session, domain)
+                dict_data = compression_dict.data if compression_dict else None
+                snapshot = HtmlSnapshot(
+                    canonical_url=canonical_url,
+                    domain=domain,
+                    fetched_at=fetched_at,
+                    codec=self.codec,
+                    dict_id=compression_dict.id if compression_dict else None,
+                    raw_size=len(raw),
+                    content=self._compress(raw, self.codec, dict_data),
+                )
+                session.add(snapshot)
+                session.commit()
+                logger.debug(
+                    f"归档快照 {canonical_url}: {len(raw)} -> "
+                    f"{len(snapshot.content)} 字节"
+                )
+                return snapshot.id
+            except Exception:
+                session.rollback()
+                logger.exception(f"归档快照失败 {url}")
+                return None
+
+    def load(self, snapshot: HtmlSnapshot, session: Session) -> str:
+        """解压快照内容"""
+        dict_data = self._get_dict_data(session, snapshot.dict_id)
+        raw = self._decompress(snapshot.content, snapshot.codec, dict_data)
+        return raw.decode("utf-8")
+
+    def load_latest(self, url: str) -> Optional[str]:
+        """读取某个 URL 最近一次抓取的 HTML"""
+        with Session(db) as session:
+            snapshot = (
+                session.query(HtmlSnapshot)
+                .filter(HtmlSnapshot.canonical_url == canonicalize_url(url))
+                .order_by(HtmlSnapshot.fetched_at.desc())
+                .first()
+            )
+            if snapshot is None:
+                return None
+            return self.load(snapshot, session)
+
+
+html_archive = HtmlArchive()
@@ -566,6 +566,7 @@ class WebContentExtractor:
         self, url: str, use_readability: bool = True
     ) -> dict[str, Any]:
         """提取网页主要内容"""
+        started_at = time.monotonic()
         try:
             # 爬取配置
             crawl_config = {
@@ -590,6 +591,7 @@ class WebContentExtractor:
                     "content": None,
                     "title": None,
                     "url": url,
+                    "elapsed": time.monotonic() - started_at,
                 }
 
             # 获取markdown内容
@@ -624,6 +626,8 @@ class WebContentExtractor:
                     if hasattr(result, "extracted_at")
                     else None
                 ),
+                "elapsed": time.monotonic() - started_at,
+                "html": getattr(result, "html", None),
             }
 
         except Exception as e:
@@ -634,8 +638,58 @@ class WebContentExtractor:
                 "content": None,
                 "title": None,
                 "url": url,
+                "elapsed": time.monotonic() - started_at,
             }
 
+    def extract_from_html(self, url: str, html: str) -> dict[str, Any]:
+        """从已抓取的原始HTML离线提取正文，不发起任何网络请求
+
+        与 extract_main_content 相同，使用 crawl4ai 的清洗策略和默认的
+        Markdown 生成器，生成结果为空时再用 html2text 转换清洗后的HTML。
+        移除弹窗等需要浏览器执行的处理无法离线复现，因此结果可能与抓取时
+        略有差异。
+        """
+        try:
+            from crawl4ai.content_scraping_strategy import (
+                WebScrapingStrategy,
+            )
+
+            scraped = WebScrapingStrategy().scrap(
+                url, html, word_count_threshold=50
+            )
+            cleaned_html = scraped.cleaned_html or html
+        except Exception:
+            logger.warning(f"离线清洗HTML失败，使用原始HTML: {url}")
+            cleaned_html = html
+
+        try:
+            from crawl4ai.markdown_generation_strategy import (
+                DefaultMarkdownGenerator,
+            )
+
+            markdown_content = (
+                DefaultMarkdownGenerator()
+                .generate_markdown(cleaned_html, base_url=url)
+                .fit_markdown
+            )
+        except Exception:
+            logger.warning(f"离线生成Markdown失败，使用简单转换: {url}")
+            markdown_content = ""
+        if not markdown_content:
+            markdown_content = self._html_to_markdown_simple(cleaned_html)
+
+        clean_markdown = self.clean_markdown(markdown_content)
+        title_match = re.search(
+            r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL
+        )
+        return {
+            "success": bool(clean_markdown),
+            "content": clean_markdown,
+            "title": title_match.group(1).strip() if title_match else None,
+            "url": url,
+            "word_count": len(clean_markdown.split()) if clean_markdown else 0,
+        }
+
     def _extract_title(self, result) -> Optional[str]:
         """提取页面标题"""
         # 优先使用metadata中的标题
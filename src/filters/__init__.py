@@ -0,0 +1,27 @@
+"""
+filters package - LLM 分类前的规则过滤
+"""
+
+from .engine import FilterEngine
+from .rules import (
+    FeedList,
+    FilterResult,
+    FilterRule,
+    FilterTarget,
+    KeywordRule,
+    LanguageRule,
+    MinLengthRule,
+    RegexRule,
+)
+
+__all__ = [
+    "FeedList",
+    "FilterEngine",
+    "FilterResult",
+    "FilterRule",
+    "FilterTarget",
+    "KeywordRule",
+    "LanguageRule",
+    "MinLengthRule",
+    "RegexRule",
+]
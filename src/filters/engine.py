@@ -0,0 +1,82 @@
+import logging
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+from .rules import RULE_TYPES, FeedList, FilterResult, FilterRule, FilterTarget
+
+logger = logging.getLogger(__name__)
+
+
+class FilterEngine:
+    """
+    LLM 分类前的规则过滤
+
+    规则按配置顺序执行，任意规则拒绝即判定为噪音；
+    feed 允许列表中的条目跳过所有规则，拒绝列表中的条目直接判定为噪音。
+    """
+
+    def __init__(
+        self,
+        rules: Optional[list[FilterRule]] = None,
+        feeds: Optional[FeedList] = None,
+        enabled: bool = True,
+    ):
+        self.rules = rules or []
+        self.feeds = feeds or FeedList()
+        self.enabled = enabled
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "FilterEngine":
+        if not data:
+            return cls(enabled=False)
+
+        rules = []
+        for i, rule_data in enumerate(data.get("rules", [])):
+            rule_type = rule_data.get("type")
+            if rule_type not in RULE_TYPES:
+                raise ValueError(
+                    f"规则 {i} 的类型 '{rule_type}' 无效，"
+                    f"支持的类型: {list(RULE_TYPES)}"
+                )
+            rules.append(RULE_TYPES[rule_type].from_dict(rule_data))
+
+        feeds_data = data.get("feeds", {}) or {}
+        feeds = FeedList(
+            allow=feeds_data.get("allow", []) or [],
+            deny=feeds_data.get("deny", []) or [],
+        )
+        return cls(rules=rules, feeds=feeds, enabled=data.get("enabled", True))
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "FilterEngine":
+        """从 yaml 文件加载规则，文件不存在时返回未启用的引擎"""
+        path = Path(path)
+        if not path.exists():
+            logger.info(f"过滤规则文件 {path} 不存在，跳过规则过滤")
+            return cls(enabled=False)
+
+        with open(path, encoding="utf-8") as f:
+            engine = cls.from_dict(yaml.safe_load(f))
+        logger.info(f"加载 {len(engine.rules)} 条过滤规则: {path}")
+        return engine
+
+    def evaluate(self, target: FilterTarget) -> Optional[FilterResult]:
+        """执行规则，返回拒绝结果，通过时返回 None"""
+        if not self.enabled:
+            return None
+        if self.feeds.is_allowed(target):
+            return None
+        if self.feeds.is_denied(target):
+            return FilterResult(rule="feed_deny", reason="feed is in deny list")
+
+        for rule in self.rules:
+            try:
+                reason = rule.check(target)
+            except Exception:
+                logger.exception(f"执行过滤规则 {rule.name} 失败")
+                continue
+            if reason:
+                return FilterResult(rule=rule.name, reason=reason)
+        return None
@@ -0,0 +1,188 @@
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.utils.text import count_words, detect_language
+
+
+@dataclass
+class FilterTarget:
+    """规则判断所需的条目信息，与数据库模型解耦"""
+
+    title: str = ""
+    content: str = ""
+    link: str = ""
+    feed_id: Optional[int] = None
+    feed_title: str = ""
+    feed_link: str = ""
+
+
+@dataclass
+class FilterResult:
+    """被规则拒绝的结果"""
+
+    rule: str
+    reason: str
+
+    def to_reason(self) -> str:
+        return f"rule:{self.rule}: {self.reason}"[:255]
+
+
+class FilterRule(ABC):
+    """过滤规则基类，check 返回拒绝原因，通过时返回 None"""
+
+    type_name = ""
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name or self.type_name
+
+    @abstractmethod
+    def check(self, target: FilterTarget) -> Optional[str]:
+        """返回拒绝原因，通过时返回 None"""
+
+    @classmethod
+    @abstractmethod
+    def from_dict(cls, data: dict) -> "FilterRule":
+        """从配置字典创建规则"""
+
+
+class MinLengthRule(FilterRule):
+    """正文字数低于阈值时拒绝"""
+
+    type_name = "min_length"
+
+    def __init__(self, min_words: int, name: Optional[str] = None):
+        super().__init__(name)
+        if min_words < 0:
+            raise ValueError("min_words must not be negative")
+        self.min_words = min_words
+
+    def check(self, target: FilterTarget) -> Optional[str]:
+        words = count_words(target.content)
+        if words < self.min_words:
+            return f"content has {words} words, less than {self.min_words}"
+        return None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MinLengthRule":
+        return cls(min_words=int(data["min_words"]), name=data.get("name"))
+
+
+class LanguageRule(FilterRule):
+    """正文语言不在允许列表中时拒绝，无法判断语言时放行"""
+
+    type_name = "language"
+
+    def __init__(self, allowed: list[str], name: Optional[str] = None):
+        super().__init__(name)
+        if not allowed:
+            raise ValueError("allowed languages must not be empty")
+        self.allowed = {lang.casefold() for lang in allowed}
+
+    def check(self, target: FilterTarget) -> Optional[str]:
+        language = detect_language(f"{target.title}\n{target.content}")
+        if language is not None and language not in self.allowed:
+            return f"language {language} not in {sorted(self.allowed)}"
+        return None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LanguageRule":
+        return cls(allowed=data["allowed"], name=data.get("name"))
+
+
+class KeywordRule(FilterRule):
+    """指定字段包含任一关键词时拒绝，大小写不敏感"""
+
+    type_name = "keyword"
+
+    def __init__(
+        self,
+        keywords: list[str],
+        fields: Optional[list[str]] = None,
+        name: Optional[str] = None,
+    ):
+        super().__init__(name)
+        if not keywords:
+            raise ValueError("keywords must not be empty")
+        self.keywords = [keyword.casefold() for keyword in keywords]
+        self.fields = fields or ["title", "content"]
+
+    def check(self, target: FilterTarget) -> Optional[str]:
+        for field_name in self.fields:
+            value = (getattr(target, field_name, "") or "").casefold()
+            for keyword in self.keywords:
+                if keyword in value:
+                    return f"{field_name} contains keyword '{keyword}'"
+        return None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KeywordRule":
+        return cls(
+            keywords=data["keywords"],
+            fields=data.get("fields"),
+            name=data.get("name"),
+        )
+
+
+class RegexRule(FilterRule):
+    """指定字段匹配任一正则时拒绝"""
+
+    type_name = "regex"
+
+    def __init__(
+        self,
+        patterns: list[str],
+        fields: Optional[list[str]] = None,
+        name: Optional[str] = None,
+    ):
+        super().__init__(name)
+        if not patterns:
+            raise ValueError("patterns must not be empty")
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.fields = fields or ["title", "content"]
+
+    def check(self, target: FilterTarget) -> Optional[str]:
+        for field_name in self.fields:
+            value = getattr(target, field_name, "") or ""
+            for pattern in self.patterns:
+                if pattern.search(value):
+                    return f"{field_name} matches /{pattern.pattern}/"
+        return None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RegexRule":
+        return cls(
+            patterns=data["patterns"],
+            fields=data.get("fields"),
+            name=data.get("name"),
+        )
+
+
+@dataclass
+class FeedList:
+    """按 feed 的允许/拒绝列表，可以填写 feed id、链接或标题"""
+
+    allow: list[str] = field(default_factory=list)
+    deny: list[str] = field(default_factory=list)
+
+    @staticmethod
+    def _matches(target: FilterTarget, items: list[str]) -> bool:
+        keys = {
+            str(target.feed_id) if target.feed_id is not None else "",
+            target.feed_link,
+            target.feed_title,
+        } - {""}
+        return any(str(item) in keys for item in items)
+
+    def is_allowed(self, target: FilterTarget) -> bool:
+        return self._matches(target, self.allow)
+
+    def is_denied(self, target: FilterTarget) -> bool:
+        return self._matches(target, self.deny)
+
+
+RULE_TYPES: dict[str, type[FilterRule]] = {
+    rule_cls.type_name: rule_cls
+    for rule_cls in (MinLengthRule, LanguageRule, KeywordRule, RegexRule)
+}
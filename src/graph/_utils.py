@@ -1,10 +1,15 @@
 import json
 import logging
+from datetime import datetime, timedelta
 from typing import Any, Optional
 
 from langchain_core.messages import BaseMessage
 from sqlalchemy.orm import Session
 
+from src.config import config
+from src.llms.priority import BACKFILL, FRESH
+from src.prompts.prompts import VALID_SCORES
+
 logger = logging.getLogger(__name__)
 
 
@@ -87,6 +92,35 @@ def extract_scorer_fields(response_text: str) -> tuple[str, str]:
     return score, summary
 
 
+def normalize_scorer_fields(score, summary) -> tuple[str, str]:
+    """
+    校验并清理评分结果
+    Args:
+        score: LLM 给出的标签
+        summary: LLM 给出的摘要
+    Returns:
+        tuple[str, str]: (score, summary)，标签不区分大小写，无效标签视为 noise
+    """
+    if isinstance(score, str) and score.casefold() in VALID_SCORES:
+        score = score.casefold()
+    else:
+        logger.warning(f"Invalid score tag: {score}, defaulting to 'noise'")
+        score = "noise"
+
+    if not summary or (isinstance(summary, str) and summary.strip() == ""):
+        logger.warning("Empty summary, setting default")
+        summary = "无有效摘要"
+
+    # 确保summary是单一字符串，不是列表或其他格式
+    if isinstance(summary, list):
+        logger.warning("Summary is a list, taking first element")
+        summary = summary[0] if summary else "无有效摘要"
+    elif not isinstance(summary, str):
+        logger.warning(f"Summary is not a string: {type(summary)}, converting")
+        summary = str(summary)
+    return score, summary
+
+
 def extract_category_from_review(
     response_data: dict, tag_result_data: dict
 ) -> str:
@@ -115,6 +149,21 @@ def extract_category_from_review(
         return "other"
 
 
+def entry_priority_lane(entry: Any) -> str:
+    """
+    条目调用 LLM 时使用的优先级通道
+    Args:
+        entry: RssEntry
+    Returns:
+        str: 近期发布的条目为 fresh，更早的条目为 backfill
+    """
+    published_at = getattr(entry, "published_at", None)
+    if published_at is None:
+        return FRESH
+    cutoff = datetime.now() - timedelta(days=config.PRIORITY_FRESH_DAYS)
+    return FRESH if published_at >= cutoff else BACKFILL
+
+
 def upsert_record(
     session: Session,
     model_class: type,
@@ -0,0 +1,330 @@
+import asyncio
+import json
+import logging
+from collections.abc import Callable
+from typing import Optional
+
+from langchain_core.messages import HumanMessage
+from sqlalchemy.orm import Session
+
+from src.graph._utils import entry_priority_lane, upsert_record
+from src.graph.input_prep import prepare_input
+from src.graph.lineage import result_lineage, served_model_id
+from src.llms.pool_manager import pool_manager
+from src.llms.priority import BACKFILL, FRESH, priority_lane
+from src.llms.unified_manager import unified_llm_manager
+from src.models import db
+from src.models.entry_summary import EntrySummary
+from src.models.rss_entry import RssEntry
+from src.models.score import EntryScore
+from src.models.tags import EntryCategory
+from src.prompts.prompts import (
+    VALID_CATEGORIES,
+    VALID_SCORES,
+    get_prompt,
+    get_prompt_version,
+)
+
+logger = logging.getLogger(__name__)
+
+# 超过该长度的条目不放入批量请求，交给单条目流程处理
+BATCH_ITEM_MAX_CHARS = 6000
+
+
+def _chunks(items: list, size: int) -> list[list]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def build_batch_message(
+    entries: list[RssEntry],
+    instruction: str,
+    contents: Optional[dict[int, str]] = None,
+) -> str:
+    """
+    将多个条目拼接为一条用户消息，每个条目以 id 标识
+
+    Args:
+        contents: 预处理后的正文，按条目 id 索引，缺省时使用原始正文
+    """
+    contents = contents or {}
+    blocks = [
+        f'<entry id="{entry.id}">\n'
+        f'{contents.get(entry.id, entry.content or "").strip()}\n</entry>'
+        for entry in entries
+    ]
+    return f"{instruction}\n\n" + "\n\n".join(blocks)
+
+
+def parse_batch_response(
+    response_text: str,
+    expected_ids: set[int],
+    validate: Callable[[dict], bool],
+) -> dict[int, dict]:
+    """
+    解析批量响应中的 JSON 数组，逐项校验
+
+    Args:
+        response_text: LLM 的文本响应
+        expected_ids: 本批次的条目 id，不在其中的结果会被丢弃
+        validate: 单项校验函数
+    Returns:
+        dict[int, dict]: 校验通过的结果，按条目 id 索引
+    """
+    text = (response_text or "").strip()
+    text = text.removeprefix("```json").removesuffix("```").strip()
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        logger.warning("批量响应中没有找到 JSON 数组")
+        return {}
+    try:
+        items = json.loads(text[start : end + 1])
+    except json.JSONDecodeError as e:
+        logger.warning(f"批量响应 JSON 解析失败: {e}")
+        return {}
+
+    results: dict[int, dict] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            entry_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if entry_id not in expected_ids or entry_id in results:
+            continue
+        if validate(item):
+            results[entry_id] = item
+    return results
+
+
+def _valid_tag_item(item: dict) -> bool:
+    return (
+        isinstance(item.get("name"), str)
+        and item["name"].casefold() in VALID_CATEGORIES
+        and isinstance(item.get("classification_rationale"), str)
+    )
+
+
+def _valid_score_item(item: dict) -> bool:
+    return (
+        isinstance(item.get("tag"), str)
+        and item["tag"].casefold() in VALID_SCORES
+        and isinstance(item.get("summary"), str)
+        and item["summary"].strip() != ""
+    )
+
+
+def save_category_results(results: dict[int, dict], lineages: dict[int, dict]):
+    """写入校验通过的分类结果及其来源，重复写入同一条目时覆盖"""
+    with Session(db) as session:
+        for entry_id, item in results.items():
+            upsert_record(
+                session=session,
+                model_class=EntryCategory,
+                filter_kwargs={"entry_id": entry_id},
+                update_kwargs={
+                    "category": item["name"].casefold(),
+                    "reason": item["classification_rationale"],
+                    **lineages[entry_id],
+                },
+            )
+        session.commit()
+
+
+def save_score_results(results: dict[int, dict], lineages: dict[int, dict]):
+    """写入校验通过的评分、摘要及其来源，重复写入同一条目时覆盖"""
+    with Session(db) as session:
+        for entry_id, item in results.items():
+            upsert_record(
+                session=session,
+                model_class=EntryScore,
+                filter_kwargs={"entry_id": entry_id},
+                update_kwargs={
+                    "score": item["tag"].casefold(),
+                    **lineages[entry_id],
+                },
+            )
+            upsert_record(
+                session=session,
+                model_class=EntrySummary,
+                filter_kwargs={"entry_id": entry_id},
+                update_kwargs={
+                    "ai_summary": item["summary"].strip(),
+                    **lineages[entry_id],
+                },
+            )
+        session.commit()
+
+
+async def _tag_batch(
+    entries: list[RssEntry], contents: dict[int, str]
+) -> set[int]:
+    llm = unified_llm_manager.get_llm(node_name="tagger")
+    messages = get_prompt("tagger_batch")
+    messages.append(
+        HumanMessage(
+            build_batch_message(
+                entries,
+                "现在请对以下原始内容逐条进行分类，并给出分类结果",
+                contents,
+            )
+        )
+    )
+    try:
+        response = await llm.ainvoke(
+            messages, prompt_version=get_prompt_version("tagger_batch")
+        )
+    except Exception:
+        logger.exception("批量分类调用失败，回退到单条目分类")
+        return set()
+
+    results = parse_batch_response(
+        response.content, {entry.id for entry in entries}, _valid_tag_item
+    )
+    save_category_results(
+        results,
+        {
+            entry.id: result_lineage(
+                "tagger",
+                "tagger_batch",
+                entry.content,
+                served_model_id(response),
+            )
+            for entry in entries
+        },
+    )
+    logger.info(f"批量分类完成 {len(results)}/{len(entries)} 条")
+    return set(results)
+
+
+async def _score_batch(
+    entries: list[RssEntry], contents: dict[int, str]
+) -> set[int]:
+    llm = unified_llm_manager.get_llm(node_name="score")
+    messages = get_prompt("scorer_batch")
+    messages.append(
+        HumanMessage(
+            build_batch_message(
+                entries, "请为以下内容逐篇进行评分和总结", contents
+            )
+        )
+    )
+    try:
+        response = await llm.ainvoke(
+            messages, prompt_version=get_prompt_version("scorer_batch")
+        )
+    except Exception:
+        logger.exception("批量评分调用失败，回退到单条目评分")
+        return set()
+
+    results = parse_batch_response(
+        response.content, {entry.id for entry in entries}, _valid_score_item
+    )
+    save_score_results(
+        results,
+        {
+            entry.id: result_lineage(
+                "score",
+                "scorer_batch",
+                entry.content,
+                served_model_id(response),
+            )
+            for entry in entries
+        },
+    )
+    logger.info(f"批量评分完成 {len(results)}/{len(entries)} 条")
+    return set(results)
+
+
+async def _run_batches(
+    node_name: str,
+    entries: list[RssEntry],
+    handler: Callable,
+    max_concurrent: Optional[int] = None,
+) -> set[int]:
+    batch_size = pool_manager.get_batch_size(node_name)
+    if batch_size <= 1:
+        return set()
+
+    # 需要压缩的长条目交给单条目流程，避免挤占同批次其他条目的上下文
+    contents: dict[int, str] = {}
+    batchable = []
+    for entry in entries:
+        prepared = prepare_input(entry.content, node_name)
+        if prepared.trimmed or len(prepared.text) > BATCH_ITEM_MAX_CHARS:
+            continue
+        contents[entry.id] = prepared.text
+        batchable.append(entry)
+    if len(batchable) < 2:
+        return set()
+
+    semaphore = asyncio.Semaphore(
+        max_concurrent or pool_manager.get_concurrent_limit(node_name)
+    )
+
+    async def run(chunk: list[RssEntry]) -> set[int]:
+        # 批次中有新条目时按 fresh 通道调用
+        lanes = {entry_priority_lane(entry) for entry in chunk}
+        lane = FRESH if FRESH in lanes else BACKFILL
+        async with semaphore:
+            with priority_lane(lane):
+                return await handler(chunk, contents)
+
+    results = await asyncio.gather(
+        *[run(chunk) for chunk in _chunks(batchable, batch_size)]
+    )
+    return set().union(*results)
+
+
+async def run_batch_prepass(
+    entries: list[RssEntry], max_concurrent: Optional[int] = None
+) -> dict[str, int]:
+    """
+    批量分类与评分的预处理
+
+    对尚未分类的条目按池配置的 batch_size 批量分类，再对已分类且尚未评分的
+    条目批量评分。未通过校验或没有出现在响应中的条目保持原状，之后由单条目
+    的分类图处理。
+
+    Returns:
+        dict: 批量分类和评分成功的条目数
+    """
+    if not entries:
+        return {"tagged": 0, "scored": 0}
+
+    entry_ids = [entry.id for entry in entries]
+    with Session(db) as session:
+        categories = dict(
+            session.query(EntryCategory.entry_id, EntryCategory.category)
+            .filter(EntryCategory.entry_id.in_(entry_ids))
+            .all()
+        )
+    to_tag = [entry for entry in entries if entry.id not in categories]
+    tagged = await _run_batches("tagger", to_tag, _tag_batch, max_concurrent)
+
+    with Session(db) as session:
+        categories = dict(
+            session.query(EntryCategory.entry_id, EntryCategory.category)
+            .filter(EntryCategory.entry_id.in_(entry_ids))
+            .all()
+        )
+        scored_ids = {
+            entry_id
+            for (entry_id,) in session.query(EntryScore.entry_id).filter(
+                EntryScore.entry_id.in_(entry_ids)
+            )
+        }
+    to_score = [
+        entry
+        for entry in entries
+        if entry.id in categories
+        and categories[entry.id] != "other"
+        and entry.id not in scored_ids
+    ]
+    scored = await _run_batches("score", to_score, _score_batch, max_concurrent)
+
+    logger.info(
+        f"批量预处理: 分类 {len(tagged)}/{len(to_tag)}, "
+        f"评分 {len(scored)}/{len(to_score)}"
+    )
+    return {"tagged": len(tagged), "scored": len(scored)}
@@ -0,0 +1,405 @@
+import asyncio
+import json
+import logging
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from openai import AsyncOpenAI
+from sqlalchemy.orm import Session
+
+from src.graph.batch import (
+    _chunks,
+    _valid_score_item,
+    _valid_tag_item,
+    build_batch_message,
+    parse_batch_response,
+    save_category_results,
+    save_score_results,
+)
+from src.graph.input_prep import prepare_input
+from src.graph.lineage import result_lineage
+from src.llms.litellm_factory import ModelConfig
+from src.llms.pool_manager import pool_manager
+from src.models import db
+from src.models.llm_batch_job import LLMBatchJob
+from src.models.rss_entry import RssEntry
+from src.models.score import EntryScore
+from src.models.tags import EntryCategory
+from src.prompts.prompts import get_prompt
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_DIR = Path("data/batches")
+# 批量 API 任务的终止状态，之后不会再有新的结果
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# 结果已写入数据库的任务
+INGESTED = "ingested"
+# 提交时使用的模型池已不存在，无法再取回结果的任务
+ORPHANED = "orphaned"
+BATCH_POLL_INTERVAL = 60
+# 每个条目最多提交的次数，超过后留给单条目流程处理
+BATCH_MAX_ATTEMPTS = 3
+# 单个批量任务的请求数上限
+BATCH_MAX_REQUESTS = 50000
+
+
+@dataclass
+class BatchNode:
+    """节点在批量 API 中使用的提示词、校验和写入方式"""
+
+    prompt_name: str
+    instruction: str
+    validate: Callable[[dict], bool]
+    save: Callable[[dict[int, dict], dict[int, dict]], None]
+
+
+BATCH_NODES = {
+    "tagger": BatchNode(
+        prompt_name="tagger_batch",
+        instruction="现在请对以下原始内容逐条进行分类，并给出分类结果",
+        validate=_valid_tag_item,
+        save=save_category_results,
+    ),
+    "score": BatchNode(
+        prompt_name="scorer_batch",
+        instruction="请为以下内容逐篇进行评分和总结",
+        validate=_valid_score_item,
+        save=save_score_results,
+    ),
+}
+
+
+def _pool_model(pool_name: str) -> Optional[ModelConfig]:
+    pool = pool_manager.pools.get(pool_name)
+    if pool is None or not pool.models:
+        return None
+    return pool.models[0]
+
+
+def _client(model: ModelConfig) -> AsyncOpenAI:
+    return AsyncOpenAI(
+        api_key=model.api_key or "EMPTY",
+        base_url=model.api_base,
+        timeout=model.timeout,
+    )
+
+
+def build_requests(
+    node_name: str, entries: list[RssEntry], model: ModelConfig
+) -> list[dict[str, Any]]:
+    """
+    生成批量 API 的请求，每个条目一行，custom_id 为 {node}-{entry_id}
+
+    使用批量提示词，单个条目的响应同样按 JSON 数组解析和校验
+    """
+    node = BATCH_NODES[node_name]
+    requests = []
+    for entry in entries:
+        prepared = prepare_input(entry.content, node_name)
+        messages = get_prompt(node.prompt_name, model_name=model.model)
+        messages.append(
+            {
+                "role": "user",
+                "content": build_batch_message(
+                    [entry], node.instruction, {entry.id: prepared.text}
+                ),
+            }
+        )
+        requests.append(
+            {
+                "custom_id": f"{node_name}-{entry.id}",
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": model.model,
+                    "temperature": model.temperature,
+                    "messages": messages,
+                },
+            }
+        )
+    return requests
+
+
+def parse_custom_id(custom_id: str) -> Optional[int]:
+    _, _, entry_id = (custom_id or "").rpartition("-")
+    try:
+        return int(entry_id)
+    except ValueError:
+        return None
+
+
+def _attempts(session: Session, node_name: str) -> Counter:
+    """统计每个条目已经提交过的次数，无法取回结果的任务不计入"""
+    attempts: Counter = Counter()
+    for (entry_ids,) in session.query(LLMBatchJob.entry_ids).filter(
+        LLMBatchJob.node == node_name, LLMBatchJob.status != ORPHANED
+    ):
+        attempts.update(json.loads(entry_ids))
+    return attempts
+
+
+async def submit_batch(
+    node_name: str, entries: list[RssEntry]
+) -> Optional[LLMBatchJob]:
+    """写入 JSONL 文件并提交批量任务，任务记录保存到数据库"""
+    pool_name = pool_manager.get_pool_name(node_name)
+    model = _pool_model(pool_name) if pool_name else None
+    if model is None:
+        logger.warning(f"节点 {node_name} 没有可用的模型池，跳过批量提交")
+        return None
+
+    requests = build_requests(node_name, entries, model)
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    path = BATCH_DIR / f"{node_name}-{datetime.now():%Y%m%d%H%M%S%f}.jsonl"
+    path.write_text(
+        "".join(
+            json.dumps(request, ensure_ascii=False) + "\n"
+            for request in requests
+        ),
+        encoding="utf-8",
+    )
+
+    client = _client(model)
+    input_file = await client.files.create(
+        file=(path.name, path.read_bytes()), purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+        metadata={"node": node_name},
+    )
+    job = LLMBatchJob(
+        batch_id=batch.id,
+        node=node_name,
+        pool=pool_name,
+        model=model.model,
+        input_file_id=input_file.id,
+        entry_ids=json.dumps([entry.id for entry in entries]),
+        status=batch.status,
+    )
+    with Session(db) as session:
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        session.expunge(job)
+    logger.info(
+        f"已提交批量任务 {batch.id}: 节点 {node_name}, {len(entries)} 个条目"
+    )
+    return job
+
+
+def _mark_orphaned(job: LLMBatchJob):
+    """模型池不存在时把任务标记为 orphaned，之后不再继续处理"""
+    logger.warning(
+        f"批量任务 {job.batch_id} 的模型池 {job.pool} 不存在，不再继续处理"
+    )
+    with Session(db) as session:
+        record = session.get(LLMBatchJob, job.id)
+        record.status = ORPHANED
+        record.completed_at = datetime.now()
+        session.commit()
+
+
+async def wait_for_batch(
+    job: LLMBatchJob, poll_interval: float = BATCH_POLL_INTERVAL
+) -> Optional[LLMBatchJob]:
+    """
+    轮询批量任务直到终止状态，更新任务记录中的状态和结果文件
+
+    模型池已不存在时任务标记为 orphaned 并返回 None
+    """
+    model = _pool_model(job.pool)
+    if model is None:
+        _mark_orphaned(job)
+        return None
+    client = _client(model)
+    while True:
+        batch = await client.batches.retrieve(job.batch_id)
+        if batch.status in TERMINAL_STATUSES:
+            break
+        logger.debug(f"批量任务 {job.batch_id} 状态: {batch.status}")
+        await asyncio.sleep(poll_interval)
+
+    with Session(db) as session:
+        record = session.get(LLMBatchJob, job.id)
+        record.status = batch.status
+        record.output_file_id = batch.output_file_id
+        record.error_file_id = batch.error_file_id
+        session.commit()
+        session.refresh(record)
+        session.expunge(record)
+    if batch.status != "completed":
+        logger.warning(f"批量任务 {job.batch_id} 结束状态为 {batch.status}")
+    return record
+
+
+async def ingest_batch(job: LLMBatchJob) -> set[int]:
+    """
+    读取批量任务的结果文件，校验后写入数据库
+
+    写入按条目覆盖，中断后重复写入同一任务的结果不会产生重复记录。失败和
+    未通过校验的条目不写入，之后重新提交。
+
+    Returns:
+        set[int]: 写入成功的条目 id
+    """
+    model = _pool_model(job.pool)
+    if model is None:
+        _mark_orphaned(job)
+        return set()
+    client = _client(model)
+    node = BATCH_NODES[job.node]
+    entry_ids = set(json.loads(job.entry_ids))
+
+    results: dict[int, dict] = {}
+    if job.output_file_id:
+        content = await client.files.content(job.output_file_id)
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            entry_id = parse_custom_id(item.get("custom_id"))
+            response = item.get("response") or {}
+            if entry_id not in entry_ids or response.get("status_code") != 200:
+                continue
+            try:
+                text = response["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                continue
+            results.update(
+                parse_batch_response(text, {entry_id}, node.validate)
+            )
+    if job.error_file_id:
+        content = await client.files.content(job.error_file_id)
+        errors = [line for line in content.text.splitlines() if line.strip()]
+        logger.warning(f"批量任务 {job.batch_id} 有 {len(errors)} 个请求失败")
+
+    with Session(db) as session:
+        contents = dict(
+            session.query(RssEntry.id, RssEntry.content).filter(
+                RssEntry.id.in_(list(results))
+            )
+        )
+    # 批量任务提交给池内第一个模型
+    model_id = f"{model.provider}/{model.model}"
+    node.save(
+        results,
+        {
+            entry_id: result_lineage(
+                job.node, node.prompt_name, contents.get(entry_id), model_id
+            )
+            for entry_id in results
+        },
+    )
+    with Session(db) as session:
+        record = session.get(LLMBatchJob, job.id)
+        record.status = INGESTED
+        record.succeeded = len(results)
+        record.failed = len(entry_ids) - len(results)
+        record.completed_at = datetime.now()
+        session.commit()
+    logger.info(
+        f"批量任务 {job.batch_id} 写入完成 {len(results)}/{len(entry_ids)} 条"
+    )
+    return set(results)
+
+
+async def _resume_jobs(poll_interval: float) -> Counter:
+    """处理上次运行中已提交但尚未写入结果的任务，返回各节点写入的条目数"""
+    with Session(db) as session:
+        jobs = (
+            session.query(LLMBatchJob)
+            .filter(LLMBatchJob.status.not_in([INGESTED, ORPHANED]))
+            .order_by(LLMBatchJob.id)
+            .all()
+        )
+        session.expunge_all()
+    ingested: Counter = Counter()
+    for job in jobs:
+        logger.info(f"继续处理未完成的批量任务 {job.batch_id}")
+        job = await wait_for_batch(job, poll_interval)
+        if job is not None:
+            ingested[job.node] += len(await ingest_batch(job))
+    return ingested
+
+
+def _pending(node_name: str, entries: list[RssEntry]) -> list[RssEntry]:
+    """尚未得到该节点结果的条目，评分只处理已分类且不是 other 的条目"""
+    entry_ids = [entry.id for entry in entries]
+    with Session(db) as session:
+        categories = dict(
+            session.query(EntryCategory.entry_id, EntryCategory.category)
+            .filter(EntryCategory.entry_id.in_(entry_ids))
+            .all()
+        )
+        if node_name == "tagger":
+            return [entry for entry in entries if entry.id not in categories]
+        scored_ids = {
+            entry_id
+            for (entry_id,) in session.query(EntryScore.entry_id).filter(
+                EntryScore.entry_id.in_(entry_ids)
+            )
+        }
+    return [
+        entry
+        for entry in entries
+        if entry.id in categories
+        and categories[entry.id] != "other"
+        and entry.id not in scored_ids
+    ]
+
+
+async def run_batch_api_backfill(
+    entries: list[RssEntry],
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    max_attempts: int = BATCH_MAX_ATTEMPTS,
+) -> dict[str, int]:
+    """
+    通过批量 API 分类和评分，用于不要求时效的历史回填
+
+    先分类再评分，每个阶段提交批量任务、轮询到结束后写入结果，失败的条目
+    在同一阶段重新提交，直到成功或达到 max_attempts 次。每次提交都记录在
+    LLMBatchJob 中，中断后再次运行时先处理未完成的任务，已提交的次数继续
+    累计。模型池已不存在的任务标记为 orphaned，不再处理，其中的条目不计
+    提交次数。仍然失败的条目保持原状，由单条目的分类图处理。
+
+    Returns:
+        dict: 分类、评分成功的条目数和放弃的条目数
+    """
+    resumed = await _resume_jobs(poll_interval)
+
+    summary = {"tagged": 0, "scored": 0, "gave_up": 0}
+    for node_name, key in (("tagger", "tagged"), ("score", "scored")):
+        summary[key] += resumed[node_name]
+        while True:
+            with Session(db) as session:
+                attempts = _attempts(session, node_name)
+            pending = _pending(node_name, entries)
+            to_submit = [
+                entry for entry in pending if attempts[entry.id] < max_attempts
+            ]
+            if not to_submit:
+                summary["gave_up"] += len(pending)
+                break
+            jobs = [
+                await submit_batch(node_name, chunk)
+                for chunk in _chunks(to_submit, BATCH_MAX_REQUESTS)
+            ]
+            if None in jobs:
+                break
+            for job in jobs:
+                job = await wait_for_batch(job, poll_interval)
+                if job is not None:
+                    summary[key] += len(await ingest_batch(job))
+
+    logger.info(
+        f"批量 API 回填: 分类 {summary['tagged']} 条, "
+        f"评分 {summary['scored']} 条, 放弃 {summary['gave_up']} 条"
+    )
+    return summary
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import re
+from typing import Optional
+
+from langchain_core.messages import HumanMessage
+
+from src.graph.input_prep import count_tokens
+from src.llms.pool_manager import pool_manager
+from src.llms.response_cache import ALWAYS
+from src.llms.unified_manager import unified_llm_manager
+from src.prompts.prompts import get_prompt, get_prompt_version
+
+logger = logging.getLogger(__name__)
+
+_HEADING_RE = re.compile(r"^#{1,6}\s", re.MULTILINE)
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"[^。！？!?.\n]+[。！？!?.]?\s*")
+
+# 片段总结表示没有实际内容时的输出，reduce 时跳过
+EMPTY_SUMMARY = "无有效信息"
+
+
+def _split_by(pattern: re.Pattern, text: str) -> list[str]:
+    """按正则切分，切分点属于后一段"""
+    starts = [0] + [m.start() for m in pattern.finditer(text) if m.start()]
+    ends = starts[1:] + [len(text)]
+    return [text[s:e] for s, e in zip(starts, ends) if text[s:e].strip()]
+
+
+def _split_oversized(
+    text: str, chunk_tokens: int, model: Optional[str]
+) -> list[str]:
+    """依次按段落、句子、字符切分超出大小的内容"""
+    if count_tokens(text, model) <= chunk_tokens:
+        return [text]
+    for splitter in (
+        lambda t: [p for p in _PARAGRAPH_RE.split(t) if p.strip()],
+        lambda t: [s for s in _SENTENCE_RE.findall(t) if s.strip()],
+    ):
+        parts = splitter(text)
+        if len(parts) > 1:
+            return [
+                piece
+                for part in parts
+                for piece in _split_oversized(part, chunk_tokens, model)
+            ]
+    # 无法再按语义切分时按字符切分，按 1 token 至少 1 个字符估算
+    return [
+        text[i : i + chunk_tokens] for i in range(0, len(text), chunk_tokens)
+    ]
+
+
+def split_into_chunks(
+    text: str, chunk_tokens: int, model: Optional[str] = None
+) -> list[str]:
+    """
+    将长文切分为不超过 chunk_tokens 的片段
+
+    优先按 markdown 标题切分，超出大小的章节再按段落和句子切分，
+    之后将相邻的小片段合并，尽量填满每个片段。
+    """
+    pieces = [
+        piece
+        for section in _split_by(_HEADING_RE, text)
+        for piece in _split_oversized(section, chunk_tokens, model)
+    ]
+
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        tokens = count_tokens(piece, model)
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece.strip())
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+async def summarize_chunks(
+    chunks: list[str], node_name: str = "score"
+) -> list[str]:
+    """
+    并发总结各个片段
+
+    片段总结总是写入响应缓存（不受 cache.enabled 和池的 cache 配置影响），
+    缓存键由片段内容决定，重新运行或文章部分修改时只有变化的片段需要重新
+    调用模型。
+    """
+    llm = unified_llm_manager.get_llm(node_name=node_name)
+    semaphore = asyncio.Semaphore(pool_manager.get_concurrent_limit(node_name))
+    prompt_version = get_prompt_version("chunk_summary")
+
+    async def summarize(index: int, chunk: str) -> str:
+        messages = get_prompt("chunk_summary")
+        messages.append(
+            HumanMessage(
+                f"""
+                请总结以下片段:
+                {chunk}
+                """
+            )
+        )
+        async with semaphore:
+            try:
+                response = await llm.ainvoke(
+                    messages, prompt_version=prompt_version, cache=ALWAYS
+                )
+            except Exception:
+                logger.exception(f"第 {index + 1} 个片段总结失败")
+                return ""
+        return response.content.strip()
+
+    return await asyncio.gather(
+        *[summarize(i, chunk) for i, chunk in enumerate(chunks)]
+    )
+
+
+def build_reduce_content(summaries: list[str]) -> str:
+    """将片段总结按原文顺序拼接为 reduce 调用的输入"""
+    return "\n\n".join(
+        f"第 {i} 部分: {summary}"
+        for i, summary in enumerate(summaries, start=1)
+        if summary and summary != EMPTY_SUMMARY
+    )
@@ -1,15 +1,20 @@
 import logging
+from typing import Optional
 
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from sqlalchemy.orm import Session
 
+from src.graph.classify_score import classify_score_node
+from src.graph.lineage import STALE_CATEGORY, STALE_SCORE
 from src.graph.score import score_node
 from src.graph.state import ClassifyState
 from src.graph.tagger import tagger_node
+from src.llms.call_log import call_context
+from src.llms.pool_manager import pool_manager
 from src.models import db
 from src.models.rss_entry import RssEntry
-from src.models.score import EntryScore
+from src.models.score import EntryScore, Score
 from src.models.tags import EntryCategory
 
 logger = logging.getLogger(__name__)
@@ -33,15 +38,31 @@ def get_classification_graph() -> CompiledStateGraph:
                 .filter(EntryScore.entry_id == state["entry"].id)
                 .first()
             )
+            # 重新计算时忽略过期的结果，节点写入时覆盖
+            recompute = state.get("recompute")
+            if recompute == STALE_CATEGORY:
+                entry_category = entry_score = None
+            elif recompute == STALE_SCORE:
+                entry_score = None
             if entry_category and entry_score:
                 return "already_processed"
+            elif entry_score and entry_score.score == Score.NOISE:
+                # 已被规则过滤判定为噪音
+                return "already_processed"
+            elif entry_category and entry_category.category == "other":
+                # 与 tagger 节点一致，"other" 不再评分
+                return "already_processed"
             elif entry_category:
                 return "category_exist"
+            elif pool_manager.has_node("classify_score"):
+                # 配置了合并节点时，一次调用完成分类和评分
+                return "start_to_classify_score"
             else:
                 return "start_to_tagger"
 
     builder.add_node("tagger", tagger_node)
     builder.add_node("score", score_node)
+    builder.add_node("classify_score", classify_score_node)
 
     # builder.add_edge(START, "tagger")
     builder.add_conditional_edges(
@@ -50,6 +71,7 @@ def get_classification_graph() -> CompiledStateGraph:
         {
             "category_exist": "score",
             "start_to_tagger": "tagger",
+            "start_to_classify_score": "classify_score",
             "already_processed": END,
         },
     )
@@ -57,7 +79,17 @@ def get_classification_graph() -> CompiledStateGraph:
     return builder.compile()
 
 
-async def run_classification_graph(entry: RssEntry):
+async def run_classification_graph(
+    entry: RssEntry, recompute: Optional[str] = None
+):
+    """
+    run the graph for a single entry
+
+    Args:
+        entry: the entry to classify and score
+        recompute: STALE_CATEGORY / STALE_SCORE to overwrite the existing
+            results instead of skipping them
+    """
     graph = get_classification_graph()
 
     # try:
@@ -66,14 +98,18 @@ async def run_classification_graph(entry: RssEntry):
     #     logger.error(f"Error: {e}")
 
     init_state = {"entry": entry, "tagger_retry_count": 0}
-    async for s in graph.astream(input=init_state, stream_mode="values"):
-        try:
-            if isinstance(s, dict) and "message" in s:
-                message = s["message"]
-                if isinstance(message, tuple):
-                    logger.info(f"message: {message}")
-                else:
-                    message.pretty_print()
-        except Exception as e:
-            logger.exception("Error:")
-            break
+    if recompute:
+        init_state["recompute"] = recompute
+    # 本条目的 LLM 调用记录都带上 entry_id
+    with call_context(entry_id=entry.id):
+        async for s in graph.astream(input=init_state, stream_mode="values"):
+            try:
+                if isinstance(s, dict) and "message" in s:
+                    message = s["message"]
+                    if isinstance(message, tuple):
+                        logger.info(f"message: {message}")
+                    else:
+                        message.pretty_print()
+            except Exception as e:
+                logger.exception("Error:")
+                break
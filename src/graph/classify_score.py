@@ -0,0 +1,127 @@
+import logging
+
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+from sqlalchemy.orm import Session
+
+from src.graph._utils import (
+    normalize_scorer_fields,
+    parse_llm_json_response,
+    upsert_record,
+)
+from src.graph.input_prep import prepare_input
+from src.graph.lineage import (
+    clear_score_results,
+    result_lineage,
+    served_model_id,
+)
+from src.graph.state import ClassifyState
+from src.llms.unified_manager import unified_llm_manager
+from src.models import db
+from src.models.entry_summary import EntrySummary
+from src.models.score import EntryScore
+from src.models.tags import EntryCategory
+from src.prompts.prompts import (
+    VALID_CATEGORIES,
+    get_prompt,
+    get_prompt_version,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def classify_score_node(state: ClassifyState) -> Command:
+    """
+    classify and score the entry in a single LLM call
+    the records written are the same as tagger_node followed by score_node,
+    falls back to the separate nodes when the response can not be used
+    """
+    logger.info("classify_score node start")
+    entry_id = state["entry"].id
+
+    prepared = prepare_input(state["entry"].content, "classify_score")
+    token_counts = {"classify_score": prepared.to_dict()}
+    messages = get_prompt("classify_score")
+    llm = unified_llm_manager.get_llm(node_name="classify_score")
+    messages.append(
+        HumanMessage(
+            f"""
+            现在请对原始内容进行分类、评分和总结
+
+            原始内容:{prepared.text}
+            """
+        )
+    )
+
+    try:
+        with prepared.token_context():
+            response = await llm.ainvoke(
+                messages, prompt_version=get_prompt_version("classify_score")
+            )
+        logger.info(f"classify_score node response: \n{response.content}")
+        result = parse_llm_json_response(response.content)
+    except Exception:
+        logger.exception("LLM调用失败，回退到单独的分类和评分节点")
+        return Command(goto="tagger")
+
+    category = str(result.get("name", "")).casefold()
+    rationale = result.get("classification_rationale")
+    if category not in VALID_CATEGORIES or not isinstance(rationale, str):
+        logger.warning(f"entry {entry_id} 的合并结果无效，回退到分类节点")
+        return Command(goto="tagger")
+
+    lineage = result_lineage(
+        "classify_score",
+        "classify_score",
+        state["entry"].content,
+        served_model_id(response),
+    )
+    with Session(db) as session:
+        upsert_record(
+            session=session,
+            model_class=EntryCategory,
+            filter_kwargs={"entry_id": entry_id},
+            update_kwargs={
+                "category": category,
+                "reason": rationale,
+                **lineage,
+            },
+        )
+        if category == "other" and state.get("recompute"):
+            clear_score_results(session, entry_id)
+        session.commit()
+
+    if category == "other":
+        return Command(update={"token_counts": token_counts}, goto="__end__")
+
+    if result.get("tag") is None:
+        # 只缺少评分时单独调用评分节点
+        return Command(
+            update={"category": category, "token_counts": token_counts},
+            goto="score",
+        )
+
+    score, summary = normalize_scorer_fields(
+        result.get("tag"), result.get("summary")
+    )
+    logger.info(f"Processed score: {score}, summary length: {len(summary)}")
+
+    with Session(db) as session:
+        upsert_record(
+            session=session,
+            model_class=EntryScore,
+            filter_kwargs={"entry_id": entry_id},
+            update_kwargs={"score": score, **lineage},
+        )
+        upsert_record(
+            session=session,
+            model_class=EntrySummary,
+            filter_kwargs={"entry_id": entry_id},
+            update_kwargs={"ai_summary": summary, **lineage},
+        )
+        session.commit()
+
+    return Command(
+        update={"category": category, "token_counts": token_counts},
+        goto="__end__",
+    )
@@ -0,0 +1,196 @@
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+import litellm
+
+from src.llms.call_log import call_context
+from src.llms.pool_manager import pool_manager
+
+logger = logging.getLogger(__name__)
+
+_IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK_RE = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_URL_RE = re.compile(r"<?https?://[^\s)>\]]+>?")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_SPACES_RE = re.compile(r"(?<=\S)[ \t]{2,}")
+_SENTENCE_RE = re.compile(r"[^。！？!?.\n]+[。！？!?.]?")
+_TERM_RE = re.compile(r"[A-Za-z][A-Za-z0-9_\-]+|[一-鿿]{2}")
+
+# 截断后的内容中用于标记省略的位置
+ELLIPSIS = "\n……\n"
+# 预算中留给开头部分的比例，其余用于关键句
+HEAD_RATIO = 0.6
+
+
+@dataclass
+class PreparedInput:
+    """预处理后的 LLM 输入"""
+
+    text: str
+    original_tokens: int
+    prepared_tokens: int
+    trimmed: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "original_tokens": self.original_tokens,
+            "prepared_tokens": self.prepared_tokens,
+            "trimmed": self.trimmed,
+        }
+
+    def token_context(self, sent_tokens: Optional[int] = None):
+        """上下文中的 LLM 调用记录带上预处理前和实际发送的 token 数"""
+        return call_context(
+            input_tokens_original=self.original_tokens,
+            input_tokens_sent=(
+                self.prepared_tokens if sent_tokens is None else sent_tokens
+            ),
+        )
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """使用目标模型的 tokenizer 计数，无法获取 tokenizer 时按字符估算"""
+    if not text:
+        return 0
+    try:
+        return litellm.token_counter(model=model or "", text=text)
+    except Exception:
+        logger.debug(f"无法使用 {model} 的 tokenizer 计数，按字符估算")
+        return len(text) // 2 + 1
+
+
+def clean_content(text: str) -> str:
+    """
+    去掉对分类和评分没有帮助的内容
+    - markdown 图片和链接地址（保留链接文字）
+    - 裸 URL
+    - 重复出现的行（如导航、版权声明的残留）
+    """
+    if not text:
+        return ""
+    text = _IMAGE_RE.sub("", text)
+    text = _LINK_RE.sub(r"\1", text)
+    text = _URL_RE.sub("", text)
+
+    seen: set[str] = set()
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped:
+            key = re.sub(r"\s+", " ", stripped).casefold()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(_SPACES_RE.sub(" ", line.rstrip()))
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _take_within(
+    parts: list[str], budget: int, model: Optional[str], sep: str = "\n"
+) -> list[str]:
+    """按顺序取出不超过预算的部分"""
+    taken: list[str] = []
+    used = 0
+    for part in parts:
+        tokens = count_tokens(part, model)
+        if used + tokens > budget:
+            break
+        taken.append(part)
+        used += tokens + count_tokens(sep, model)
+    return taken
+
+
+def trim_to_budget(text: str, budget: int, model: Optional[str] = None) -> str:
+    """
+    将内容压缩到 token 预算内：保留开头部分，再用抽取式方法从剩余内容中
+    选出关键词权重最高的句子，按原文顺序拼接
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    head = _take_within(lines, int(budget * HEAD_RATIO), model)
+    if not head:
+        # 第一行就超出预算时按字符截断
+        return text[: max(budget, 1)]
+
+    rest = "\n".join(lines[len(head) :])
+    sentences = [s.strip() for s in _SENTENCE_RE.findall(rest) if s.strip()]
+    if not sentences:
+        return "\n".join(head)
+
+    # 以句为单位的 tf-idf：在大多数句子中都出现的词（模板、填充内容）权重接近 0
+    all_terms = [
+        [term.casefold() for term in _TERM_RE.findall(sentence)]
+        for sentence in _SENTENCE_RE.findall(text)
+    ]
+    frequencies = Counter(term for terms in all_terms for term in terms)
+    doc_frequencies = Counter(
+        term for terms in all_terms for term in set(terms)
+    )
+    total = max(len(all_terms), 1)
+
+    def sentence_score(sentence: str) -> float:
+        terms = {term.casefold() for term in _TERM_RE.findall(sentence)}
+        if not terms:
+            return 0.0
+        weight = sum(
+            frequencies[term] * math.log(total / doc_frequencies[term])
+            for term in terms
+        )
+        return weight / len(terms) ** 0.5
+
+    head_tokens = count_tokens("\n".join(head), model)
+    remaining = budget - head_tokens - count_tokens(ELLIPSIS, model)
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: sentence_score(sentences[i]),
+        reverse=True,
+    )
+    selected: list[int] = []
+    used = 0
+    for i in ranked:
+        tokens = count_tokens(sentences[i], model) + 1
+        if used + tokens > remaining:
+            continue
+        selected.append(i)
+        used += tokens
+
+    if not selected:
+        return "\n".join(head)
+    key_sentences = " ".join(sentences[i] for i in sorted(selected))
+    return "\n".join(head) + ELLIPSIS + key_sentences
+
+
+def prepare_input(content: str, node_name: str) -> PreparedInput:
+    """
+    为节点准备 LLM 输入：清理内容，并在超出池的 max_input_tokens 时压缩
+
+    Args:
+        content: 原始正文
+        node_name: 节点名称，用于确定池的 tokenizer 和预算
+    """
+    model = pool_manager.get_primary_model(node_name)
+    budget = pool_manager.get_pool_config(node_name).max_input_tokens
+
+    original_tokens = count_tokens(content or "", model)
+    text = clean_content(content or "")
+    tokens = count_tokens(text, model)
+    trimmed = False
+    if budget and tokens > budget:
+        text = trim_to_budget(text, budget, model)
+        tokens = count_tokens(text, model)
+        trimmed = True
+
+    prepared = PreparedInput(
+        text=text,
+        original_tokens=original_tokens,
+        prepared_tokens=tokens,
+        trimmed=trimmed,
+    )
+    logger.info(
+        f"{node_name} input tokens: {original_tokens} -> {tokens}"
+        f"{' (trimmed)' if trimmed else ''}"
+    )
+    return prepared
@@ -0,0 +1,170 @@
+import hashlib
+import logging
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from src.llms.pool_manager import pool_manager
+from src.models.entry_summary import EntrySummary
+from src.models.rss_entry import RssEntry
+from src.models.score import EntryScore
+from src.models.tags import EntryCategory
+from src.prompts.prompts import get_prompt_hash
+
+logger = logging.getLogger(__name__)
+
+# 产生分类和评分结果的节点及其使用的提示词
+CATEGORY_SOURCES = {
+    "tagger": ("tagger", "tagger_batch"),
+    "classify_score": ("classify_score",),
+}
+SCORE_SOURCES = {
+    "score": ("scorer", "scorer_batch"),
+    "classify_score": ("classify_score",),
+}
+
+# 需要重新计算的结果：category 时分类和评分都重新计算，score 时只重新评分
+STALE_CATEGORY = "category"
+STALE_SCORE = "score"
+
+
+def content_hash(text: Optional[str]) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def served_model_id(response) -> Optional[str]:
+    """池返回的 AIMessage 中记录的实际响应模型，级联时为最终采用的层级"""
+    metadata = getattr(response, "response_metadata", None) or {}
+    return metadata.get("model_id")
+
+
+def result_lineage(
+    node_name: str,
+    prompt_name: str,
+    content: Optional[str],
+    model_id: Optional[str] = None,
+) -> dict[str, Optional[str]]:
+    """
+    结果行的来源字段，与结果一起写入
+
+    Args:
+        node_name: 产生结果的节点，用于获取模型池的模型标识
+        prompt_name: 使用的提示词模板
+        content: 条目的原始正文
+        model_id: 实际响应的模型标识，缺省时使用节点当前对应的池
+    """
+    return {
+        "prompt_hash": get_prompt_hash(prompt_name),
+        "model_id": model_id or pool_manager.get_model_id(node_name),
+        "content_hash": content_hash(content),
+    }
+
+
+def clear_score_results(session: Session, entry_id: int):
+    """重新分类为 other 后删除旧的评分和摘要，other 不再评分"""
+    session.query(EntryScore).filter(EntryScore.entry_id == entry_id).delete(
+        synchronize_session=False
+    )
+    session.query(EntrySummary).filter(
+        EntrySummary.entry_id == entry_id
+    ).delete(synchronize_session=False)
+
+
+def _current(sources: dict[str, tuple]) -> tuple[set[str], set[str]]:
+    """当前配置下可能产生结果的提示词哈希和模型标识"""
+    prompt_hashes, model_ids = set(), set()
+    for node_name, prompt_names in sources.items():
+        if node_name == "classify_score" and not pool_manager.has_node(
+            node_name
+        ):
+            continue
+        prompt_hashes.update(get_prompt_hash(name) for name in prompt_names)
+        model_ids.update(pool_manager.get_model_ids(node_name))
+    return prompt_hashes, model_ids
+
+
+class StaleChecker:
+    """
+    判断结果行是否需要重新计算
+
+    正文哈希与条目当前正文不一致的结果总是需要重新计算。指定了
+    prompt_hash / model_id 时，由该提示词或模型产生的结果需要重新计算；
+    都未指定时，提示词或模型与当前配置不一致的结果需要重新计算。没有来源
+    信息的结果（规则过滤、预分类器写入的结果和引入来源字段之前的结果）只在
+    include_unversioned 时重新计算。
+    """
+
+    def __init__(
+        self,
+        sources: dict[str, tuple],
+        prompt_hash: Optional[str] = None,
+        model_id: Optional[str] = None,
+        include_unversioned: bool = False,
+    ):
+        self.prompt_hash = prompt_hash
+        self.model_id = model_id
+        self.include_unversioned = include_unversioned
+        self.current_prompts, self.current_models = _current(sources)
+
+    def is_stale(self, row, content: Optional[str]) -> bool:
+        if row.prompt_hash is None:
+            return self.include_unversioned
+        if row.content_hash != content_hash(content):
+            return True
+        if self.prompt_hash or self.model_id:
+            return (
+                self.prompt_hash is not None
+                and row.prompt_hash == self.prompt_hash
+            ) or (self.model_id is not None and row.model_id == self.model_id)
+        return (
+            row.prompt_hash not in self.current_prompts
+            or row.model_id not in self.current_models
+        )
+
+
+def find_stale(
+    session: Session,
+    entries: list[RssEntry],
+    prompt_hash: Optional[str] = None,
+    model_id: Optional[str] = None,
+    include_unversioned: bool = False,
+) -> dict[int, str]:
+    """
+    找出需要重新计算的条目
+
+    Returns:
+        dict[int, str]: 条目 id 到 STALE_CATEGORY / STALE_SCORE 的映射
+    """
+    options = {
+        "prompt_hash": prompt_hash,
+        "model_id": model_id,
+        "include_unversioned": include_unversioned,
+    }
+    category_checker = StaleChecker(CATEGORY_SOURCES, **options)
+    score_checker = StaleChecker(SCORE_SOURCES, **options)
+
+    entry_ids = [entry.id for entry in entries]
+    categories = {
+        row.entry_id: row
+        for row in session.query(EntryCategory).filter(
+            EntryCategory.entry_id.in_(entry_ids)
+        )
+    }
+    scores = {
+        row.entry_id: row
+        for row in session.query(EntryScore).filter(
+            EntryScore.entry_id.in_(entry_ids)
+        )
+    }
+
+    stale: dict[int, str] = {}
+    for entry in entries:
+        category = categories.get(entry.id)
+        score = scores.get(entry.id)
+        if category is not None and category_checker.is_stale(
+            category, entry.content
+        ):
+            stale[entry.id] = STALE_CATEGORY
+        elif score is not None and score_checker.is_stale(score, entry.content):
+            stale[entry.id] = STALE_SCORE
+    return stale
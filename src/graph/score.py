@@ -5,19 +5,31 @@ from langgraph.types import Command
 from sqlalchemy.orm import Session
 
 from src.config import config as app_config
-from src.graph._utils import extract_scorer_fields, upsert_record
+from src.graph._utils import (
+    extract_scorer_fields,
+    normalize_scorer_fields,
+    upsert_record,
+)
+from src.graph.chunked_summary import (
+    build_reduce_content,
+    split_into_chunks,
+    summarize_chunks,
+)
+from src.graph.input_prep import clean_content, count_tokens, prepare_input
+from src.graph.lineage import result_lineage, served_model_id
 from src.graph.state import ClassifyState
+from src.llms.pool_manager import pool_manager
 from src.llms.unified_manager import unified_llm_manager
 from src.models import db
 from src.models.entry_summary import EntrySummary
 from src.models.score import EntryScore
 from src.models.tags import EntryCategory
-from src.prompts.prompts import get_prompt
+from src.prompts.prompts import get_prompt, get_prompt_version
 
 logger = logging.getLogger(__name__)
 
 
-def score_node(state: ClassifyState):
+async def score_node(state: ClassifyState):
     """
     score the entry
     Args:
@@ -42,51 +54,72 @@ def score_node(state: ClassifyState):
             else:
                 raise ValueError("No category found in state or database")
 
+    prepared = prepare_input(state["entry"].content, "score")
+    token_counts = {"score": prepared.to_dict()}
+    chunk_tokens = pool_manager.get_pool_config("score").chunk_tokens
+    reduce_content = None
+    sent_tokens = None
+    if prepared.trimmed and chunk_tokens:
+        # 长文分片总结后再评分，避免压缩丢失信息
+        chunks = split_into_chunks(
+            clean_content(state["entry"].content),
+            chunk_tokens,
+            pool_manager.get_primary_model("score"),
+        )
+        logger.info(f"entry {state['entry'].id} 分为 {len(chunks)} 个片段总结")
+        reduce_content = build_reduce_content(await summarize_chunks(chunks))
+        token_counts["score"]["chunks"] = len(chunks)
+        if reduce_content:
+            sent_tokens = count_tokens(
+                reduce_content, pool_manager.get_primary_model("score")
+            )
+
     # 使用 HumanMessage 构造消息
     messages = get_prompt("scorer")
     # 使用统一LLM管理器，为score节点获取专用模型
     llm = unified_llm_manager.get_llm(node_name="score")
-    messages.append(
-        HumanMessage(
-            content=f"""
+    if reduce_content:
+        messages.append(
+            HumanMessage(
+                content=f"""
+        以下是一篇长文按原文顺序分段总结的结果，请基于这些总结为整篇文章进行评分和总结:
+          {reduce_content}
+          """
+            )
+        )
+    else:
+        messages.append(
+            HumanMessage(
+                content=f"""
         请为以下内容进行评分和总结:
-          {state['entry'].content}
+          {prepared.text}
           """
+            )
+        )
+    with prepared.token_context(sent_tokens):
+        response = await llm.ainvoke(
+            messages, prompt_version=get_prompt_version("scorer")
         )
-    )
-    response = llm.invoke(messages)
     logger.info(f"score node response: \n{response.content}")
 
     # 使用工具函数处理response
     score, summary = extract_scorer_fields(response.content)
 
     # 验证和清理结果
-    valid_tags = ["actionable", "systematic", "noise"]
-    if score not in valid_tags:
-        logger.warning(f"Invalid score tag: {score}, defaulting to 'noise'")
-        score = "noise"
-
-    if not summary or summary.strip() == "":
-        logger.warning("Empty summary, setting default")
-        summary = "无有效摘要"
-
-    # 确保summary是单一字符串，不是列表或其他格式
-    if isinstance(summary, list):
-        logger.warning("Summary is a list, taking first element")
-        summary = summary[0] if summary else "无有效摘要"
-    elif not isinstance(summary, str):
-        logger.warning(f"Summary is not a string: {type(summary)}, converting")
-        summary = str(summary)
+    score, summary = normalize_scorer_fields(score, summary)
 
     logger.info(f"Processed score: {score}, summary length: {len(summary)}")
 
+    lineage = result_lineage(
+        "score", "scorer", state["entry"].content, served_model_id(response)
+    )
     with Session(db) as session:
         # 使用upsert处理EntryScore
         score_record, score_created = upsert_record(
             session=session,
             model_class=EntryScore,
             filter_kwargs={"entry_id": state["entry"].id},
-            update_kwargs={"score": score},
+            update_kwargs={"score": score, **lineage},
         )
         logger.info(
             f"{'Created' if score_created else 'Updated'} score for entry {state['entry'].id}"
@@ -97,7 +130,7 @@ def score_node(state: ClassifyState):
             session=session,
             model_class=EntrySummary,
             filter_kwargs={"entry_id": state["entry"].id},
-            update_kwargs={"ai_summary": summary},
+            update_kwargs={"ai_summary": summary, **lineage},
         )
         logger.info(
             f"{'Created' if summary_created else 'Updated'} summary for entry {state['entry'].id}"
@@ -105,5 +138,8 @@ def score_node(state: ClassifyState):
 
         session.commit()
     if score == "noise":
-        return Command(goto="__end__")
-    return {"result": {"tag": score, "summary": summary}}
+        return Command(update={"token_counts": token_counts}, goto="__end__")
+    return {
+        "result": {"tag": score, "summary": summary},
+        "token_counts": token_counts,
+    }
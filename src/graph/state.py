@@ -1,9 +1,16 @@
+from typing import Annotated
+
 from typing_extensions import TypedDict
 
 from src.graph.types import TagResult
 from src.models.rss_entry import RssEntry
 
 
+def merge_token_counts(left: dict, right: dict) -> dict:
+    """合并各节点记录的输入 token 数"""
+    return {**(left or {}), **(right or {})}
+
+
 class ClassifyState(TypedDict):
     """
     State for the tagger node.
@@ -13,6 +20,10 @@ class ClassifyState(TypedDict):
     entry: RssEntry
     category: str
     tag_result: TagResult
+    # 重新计算过期结果时为 category 或 score，忽略已有的对应结果并覆盖写入
+    recompute: str
+    # 节点名 -> 输入预处理前后的 token 数
+    token_counts: Annotated[dict[str, dict], merge_token_counts]
 
 
 class DeduplicateState(TypedDict):
@@ -8,16 +8,23 @@ from src.graph._utils import (
     parse_llm_json_response,
     upsert_record,
 )
+from src.graph.input_prep import prepare_input
+from src.graph.lineage import (
+    STALE_CATEGORY,
+    clear_score_results,
+    result_lineage,
+    served_model_id,
+)
 from src.graph.state import ClassifyState
 from src.llms.unified_manager import unified_llm_manager
 from src.models import db
 from src.models.tags import EntryCategory
-from src.prompts.prompts import get_prompt
+from src.prompts.prompts import get_prompt, get_prompt_version
 
 logger = logging.getLogger(__name__)
 
 
-def tagger_node(state: ClassifyState, config: RunnableConfig) -> Command:
+async def tagger_node(state: ClassifyState, config: RunnableConfig) -> Command:
     logger.info("tagger node start")
 
     with Session(db) as session:
@@ -26,14 +33,15 @@ def tagger_node(state: ClassifyState, config: RunnableConfig) -> Command:
             .filter(EntryCategory.entry_id == state["entry"].id)
             .first()
         )
-        # 已存在分类，直接跳过
-        if entry_category:
+        # 已存在分类，直接跳过；重新计算时覆盖
+        if entry_category and state.get("recompute") != STALE_CATEGORY:
             logger.info(f"entry {state['entry'].id} has been tagged")
             logger.info(f"Existing category: {entry_category.category}")
             return Command(
                 update={"category": entry_category.category}, goto="score"
             )
 
+    prepared = prepare_input(state["entry"].content, "tagger")
     messages = get_prompt("tagger")
     # 使用统一LLM管理器，为tagger节点获取专用模型
     llm = unified_llm_manager.get_llm(node_name="tagger")
@@ -42,13 +50,16 @@ def tagger_node(state: ClassifyState, config: RunnableConfig) -> Command:
             f"""
             现在请对原始内容进行分类，并给出你的分类结果
             
-            原始内容:{state['entry'].content}
+            原始内容:{prepared.text}
             """
         )
     )
 
     try:
-        response = llm.invoke(messages)
+        with prepared.token_context():
+            response = await llm.ainvoke(
+                messages, prompt_version=get_prompt_version("tagger")
+            )
         logger.info(f"tagger node response: \n{response.content}")
 
         # 解析响应
@@ -66,16 +77,26 @@ def tagger_node(state: ClassifyState, config: RunnableConfig) -> Command:
             update_kwargs={
                 "category": tag_result_data["name"],
                 "reason": tag_result_data["classification_rationale"],
+                **result_lineage(
+                    "tagger",
+                    "tagger",
+                    state["entry"].content,
+                    served_model_id(response),
+                ),
             },
         )
+        if tag_result_data["name"] == "other" and state.get("recompute"):
+            clear_score_results(session, state["entry"].id)
         session.commit()
 
+    token_counts = {"tagger": prepared.to_dict()}
     if tag_result_data["name"] == "other":
-        return Command(goto="__end__")
+        return Command(update={"token_counts": token_counts}, goto="__end__")
 
     return Command(
         update={
             "category": tag_result_data["name"],
+            "token_counts": token_counts,
         },
         goto="score",
     )
@@ -0,0 +1,377 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import litellm
+from litellm import Router
+from litellm.integrations.custom_logger import CustomLogger
+from litellm.router_utils.cooldown_handlers import _get_cooldown_deployments
+from litellm.types.router import CustomRoutingStrategyBase, RouterRateLimitError
+
+logger = logging.getLogger(__name__)
+
+ADAPTIVE_STRATEGY = "adaptive"
+ROUTING_STATS_PATH = "data/routing_stats.json"
+# 没有观测数据的部署按该延迟（秒）估计，再按权重折算
+DEFAULT_LATENCY = 5.0
+# 错误率的上限，避免全部失败的部署期望时间无穷大后再也无法恢复
+MAX_ERROR_RATE = 0.9
+# 超过该时长仍未收到完成事件的进行中请求视为已丢失
+STALE_IN_FLIGHT_SECONDS = 600
+# 调用 metadata 中记录由自适应策略选定并计入进行中请求的部署
+STARTED_METADATA_KEY = "adaptive_routing_started"
+
+
+@dataclass
+class DeploymentStats:
+    """单个部署的观测数据，latency 和 error_rate 为 EWMA"""
+
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    samples: int = 0
+    updated_at: float = 0.0
+    # 进行中请求的开始时间，按先进先出近似对应完成事件，不持久化
+    in_flight: deque = field(default_factory=deque)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "samples": self.samples,
+            "updated_at": self.updated_at,
+        }
+
+
+class AdaptiveRoutingStats(CustomLogger):
+    """
+    按部署记录延迟、错误率和进行中请求数
+
+    作为 litellm 回调注册，从每次调用的成功、失败事件中更新 EWMA；统计按部署
+    id 保存，多个池中的同一部署共用一份数据，并定期写入 JSON 文件，重启后
+    不需要重新学习。
+
+    Args:
+        path: 统计文件路径
+        alpha: EWMA 中新样本的权重
+        save_every: 每完成多少次调用写入一次文件
+    """
+
+    def __init__(
+        self,
+        path: str = ROUTING_STATS_PATH,
+        alpha: float = 0.3,
+        save_every: int = 50,
+    ):
+        super().__init__()
+        self.path = path
+        self.alpha = alpha
+        self.save_every = save_every
+        self._stats: dict[str, DeploymentStats] = defaultdict(DeploymentStats)
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._loaded = False
+
+    def register(self):
+        """加载历史统计并注册为 litellm 回调"""
+        if not self._loaded:
+            self.load()
+        if self not in litellm.callbacks:
+            litellm.callbacks.append(self)
+
+    def load(self):
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            logger.exception(f"读取路由统计文件 {self.path} 失败")
+            return
+        with self._lock:
+            for deployment_id, values in data.items():
+                self._stats[deployment_id] = DeploymentStats(
+                    latency=values.get("latency"),
+                    error_rate=values.get("error_rate", 0.0),
+                    samples=values.get("samples", 0),
+                    updated_at=values.get("updated_at", 0.0),
+                )
+        logger.info(f"加载了 {len(data)} 个部署的路由统计")
+
+    def save(self):
+        # 没有池使用自适应策略时不写文件
+        if not self._loaded:
+            return
+        with self._lock:
+            data = {
+                deployment_id: stats.to_dict()
+                for deployment_id, stats in self._stats.items()
+                if stats.samples
+            }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            logger.exception(f"写入路由统计文件 {self.path} 失败")
+
+    # ------------------------------------------------------------------
+    # 记录
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _prune(stats: DeploymentStats, now: float):
+        while stats.in_flight and (
+            now - stats.in_flight[0] > STALE_IN_FLIGHT_SECONDS
+        ):
+            stats.in_flight.popleft()
+
+    def started(self, deployment_id: str):
+        """路由选定部署时调用"""
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats[deployment_id]
+            self._prune(stats, now)
+            stats.in_flight.append(now)
+
+    def finished(
+        self,
+        deployment_id: str,
+        latency: float,
+        error: bool,
+        started: bool = True,
+    ):
+        """
+        调用结束时更新统计，started 为 False 表示调用没有经过 started
+        （如其他策略的池中同一部署的调用），不减少进行中的请求数
+        """
+        with self._lock:
+            stats = self._stats[deployment_id]
+            if started and stats.in_flight:
+                stats.in_flight.popleft()
+            # 失败的请求通常很快返回，只更新错误率，不拉低延迟估计
+            if not error:
+                stats.latency = (
+                    latency
+                    if stats.latency is None
+                    else self.alpha * latency + (1 - self.alpha) * stats.latency
+                )
+            stats.error_rate = (
+                self.alpha * float(error) + (1 - self.alpha) * stats.error_rate
+            )
+            stats.samples += 1
+            stats.updated_at = time.time()
+            self._completed += 1
+            should_save = self._completed % self.save_every == 0
+        if should_save:
+            self.save()
+
+    @staticmethod
+    def _deployment_id(kwargs: dict) -> Optional[str]:
+        litellm_params = kwargs.get("litellm_params") or {}
+        model_info = litellm_params.get("model_info") or {}
+        return model_info.get("id")
+
+    def _record(self, kwargs: dict, start_time, end_time, error: bool):
+        deployment_id = self._deployment_id(kwargs)
+        # 不经过 Router 的调用（如健康检查）没有部署 id
+        if deployment_id is None:
+            return
+        try:
+            latency = (end_time - start_time).total_seconds()
+        except Exception:
+            latency = 0.0
+        metadata = (kwargs.get("litellm_params") or {}).get("metadata") or {}
+        started = metadata.get(STARTED_METADATA_KEY) == deployment_id
+        self.finished(deployment_id, latency, error, started)
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        self._record(kwargs, start_time, end_time, error=False)
+
+    def log_failure_event(self, kwargs, response_obj, start_time, end_time):
+        self._record(kwargs, start_time, end_time, error=True)
+
+    async def async_log_success_event(
+        self, kwargs, response_obj, start_time, end_time
+    ):
+        self._record(kwargs, start_time, end_time, error=False)
+
+    async def async_log_failure_event(
+        self, kwargs, response_obj, start_time, end_time
+    ):
+        self._record(kwargs, start_time, end_time, error=True)
+
+    # ------------------------------------------------------------------
+    # 估计
+    # ------------------------------------------------------------------
+
+    def expected_time(
+        self, deployment_id: str, weight: float, prior: float
+    ) -> float:
+        """
+        估计新请求在该部署上的完成时间
+
+        延迟取 EWMA 与最早的进行中请求已耗时中的较大值，供应商变慢时无需等
+        请求完成就能感知；再按进行中请求数、失败重试的期望次数和权重折算。
+        """
+        with self._lock:
+            stats = self._stats.get(deployment_id)
+            if stats is None:
+                return prior / weight
+            latency = stats.latency if stats.latency is not None else prior
+            now = time.monotonic()
+            self._prune(stats, now)
+            if stats.in_flight:
+                latency = max(latency, now - stats.in_flight[0])
+            attempts = 1 / (1 - min(stats.error_rate, MAX_ERROR_RATE))
+            return latency * attempts * (1 + len(stats.in_flight)) / weight
+
+    def get_stats(self, deployment_ids: list[str]) -> dict[str, dict]:
+        with self._lock:
+            return {
+                deployment_id: {
+                    **self._stats[deployment_id].to_dict(),
+                    "in_flight": len(self._stats[deployment_id].in_flight),
+                }
+                for deployment_id in deployment_ids
+                if deployment_id in self._stats
+            }
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+            self._completed = 0
+
+
+class AdaptiveRoutingStrategy(CustomRoutingStrategyBase):
+    """
+    选择期望完成时间最短的部署
+
+    候选部署沿用 Router 的过滤（冷却、pre-call 检查等），模型配置中的 weight
+    作为先验：没有观测数据时按默认延迟除以权重估计。以 explore_rate 的概率
+    按权重随机选择，使长时间未被选中的部署也能更新统计。
+
+    Args:
+        router: 所属的 Router
+        stats: 部署统计
+        explore_rate: 随机探索的概率
+    """
+
+    def __init__(
+        self,
+        router: Router,
+        stats: AdaptiveRoutingStats,
+        explore_rate: float = 0.05,
+    ):
+        self.router = router
+        self.stats = stats
+        self.explore_rate = explore_rate
+
+    @staticmethod
+    def _weight(deployment: dict) -> float:
+        weight = deployment.get("weight")
+        if weight is None:
+            weight = deployment.get("litellm_params", {}).get("weight", 1)
+        return max(float(weight or 1), 0.01)
+
+    def _start(self, deployment: dict, request_kwargs: Optional[dict]) -> dict:
+        """计入进行中的请求，并在调用的 metadata 中标记，完成事件据此对应"""
+        deployment_id = deployment["model_info"]["id"]
+        self.stats.started(deployment_id)
+        if request_kwargs is not None:
+            metadata = request_kwargs.setdefault("metadata", {})
+            metadata[STARTED_METADATA_KEY] = deployment_id
+        return deployment
+
+    def choose(
+        self, deployments: list[dict], request_kwargs: Optional[dict] = None
+    ) -> dict:
+        weights = [self._weight(deployment) for deployment in deployments]
+        if len(deployments) > 1 and random.random() < self.explore_rate:
+            deployment = random.choices(deployments, weights=weights)[0]
+        else:
+            # 先验延迟取已观测部署的中位数，避免新部署总被优先或总被忽略
+            observed = sorted(
+                stats["latency"]
+                for stats in self.stats.get_stats(
+                    [d["model_info"]["id"] for d in deployments]
+                ).values()
+                if stats["latency"] is not None
+            )
+            prior = (
+                observed[len(observed) // 2] if observed else DEFAULT_LATENCY
+            )
+            deployment = min(
+                zip(deployments, weights),
+                key=lambda item: self.stats.expected_time(
+                    item[0]["model_info"]["id"], item[1], prior
+                ),
+            )[0]
+        return self._start(deployment, request_kwargs)
+
+    async def async_get_available_deployment(
+        self,
+        model: str,
+        messages: Optional[list[dict[str, str]]] = None,
+        input: Optional[str | list] = None,
+        specific_deployment: Optional[bool] = False,
+        request_kwargs: Optional[dict] = None,
+    ):
+        deployments = await self.router.async_get_healthy_deployments(
+            model=model,
+            request_kwargs=request_kwargs or {},
+            messages=messages,
+            input=input,
+            specific_deployment=specific_deployment,
+        )
+        if isinstance(deployments, dict):
+            # 指定部署的调用（如对冲请求）也计入进行中的请求
+            return self._start(deployments, request_kwargs)
+        return self.choose(deployments, request_kwargs)
+
+    def get_available_deployment(
+        self,
+        model: str,
+        messages: Optional[list[dict[str, str]]] = None,
+        input: Optional[str | list] = None,
+        specific_deployment: Optional[bool] = False,
+        request_kwargs: Optional[dict] = None,
+    ):
+        model, deployments = self.router._common_checks_available_deployment(
+            model=model,
+            messages=messages,
+            input=input,
+            specific_deployment=specific_deployment,
+        )
+        if isinstance(deployments, dict):
+            return self._start(deployments, request_kwargs)
+        cooldown_deployments = _get_cooldown_deployments(
+            litellm_router_instance=self.router, parent_otel_span=None
+        )
+        deployments = self.router._filter_cooldown_deployments(
+            healthy_deployments=deployments,
+            cooldown_deployments=cooldown_deployments,
+        )
+        if not deployments:
+            raise RouterRateLimitError(
+                model=model,
+                cooldown_time=self.router.cooldown_cache.get_min_cooldown(
+                    model_ids=self.router.get_model_ids(model_name=model),
+                    parent_otel_span=None,
+                ),
+                enable_pre_call_checks=self.router.enable_pre_call_checks,
+                cooldown_list=cooldown_deployments,
+            )
+        return self.choose(deployments, request_kwargs)
+
+
+# 创建全局实例
+adaptive_stats = AdaptiveRoutingStats()
@@ -0,0 +1,302 @@
+import logging
+import math
+import threading
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import litellm
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from src.models import db
+from src.models.llm_call_log import LLMCallLog
+
+logger = logging.getLogger(__name__)
+
+# 当前调用所属的条目等信息，asyncio 任务之间互不影响
+_call_context: ContextVar[Optional[dict[str, Any]]] = ContextVar(
+    "llm_call_context", default=None
+)
+
+PERCENTILES = (50, 90, 99)
+
+
+@contextmanager
+def call_context(**kwargs) -> Iterator[None]:
+    """在上下文中发起的 LLM 调用都会带上这些字段，如 entry_id"""
+    token = _call_context.set({**get_call_context(), **kwargs})
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def get_call_context() -> dict[str, Any]:
+    return _call_context.get() or {}
+
+
+def _usage_fields(response: Any) -> dict[str, Optional[int]]:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "cached_tokens": None,
+        }
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None),
+    }
+
+
+def _estimate_cost(response: Any, hidden: dict) -> Optional[float]:
+    cost = hidden.get("response_cost")
+    if cost is not None:
+        return float(cost)
+    try:
+        return float(litellm.completion_cost(completion_response=response))
+    except Exception:
+        # 价格表中没有的模型（如本地 ollama）无法估算
+        return None
+
+
+class CallLogger:
+    """
+    记录每次 LLM 调用的 token、延迟、部署、重试和费用
+
+    记录先写入内存缓冲，达到 flush_every 条时在后台线程中批量写入数据库，
+    不阻塞发起调用的事件循环；查询统计和退出时同步写入剩余记录。
+
+    Args:
+        flush_every: 缓冲多少条记录后写入数据库
+    """
+
+    def __init__(self, flush_every: int = 20):
+        self.flush_every = flush_every
+        self._buffer: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def _append(self, record: dict[str, Any]):
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) < self.flush_every:
+                return
+            # 后台写入进行中时记录留在缓冲中，由下一次写入带走
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._write_buffer, name="llm-call-log", daemon=True
+            )
+            self._flusher.start()
+
+    def record_response(
+        self,
+        response: Any,
+        pool: str,
+        node: Optional[str],
+        prompt_version: Optional[str],
+        latency: float,
+    ):
+        hidden = getattr(response, "_hidden_params", None) or {}
+        headers = hidden.get("additional_headers") or {}
+        self._append(
+            {
+                **self._base(pool, node, prompt_version, latency),
+                **_usage_fields(response),
+                "deployment": hidden.get("model_id")
+                or hidden.get("litellm_model_name")
+                or getattr(response, "model", None),
+                "retries": int(headers.get("x-litellm-attempted-retries") or 0),
+                "cost": _estimate_cost(response, hidden),
+                "status": "success",
+            }
+        )
+
+    def record_error(
+        self,
+        error: Exception,
+        pool: str,
+        node: Optional[str],
+        prompt_version: Optional[str],
+        latency: float,
+    ):
+        self._append(
+            {
+                **self._base(pool, node, prompt_version, latency),
+                "status": "error",
+                "error": f"{type(error).__name__}: {error}"[:255],
+            }
+        )
+
+    @staticmethod
+    def _base(
+        pool: str,
+        node: Optional[str],
+        prompt_version: Optional[str],
+        latency: float,
+    ) -> dict[str, Any]:
+        return {
+            "pool": pool,
+            "node": node,
+            "entry_id": get_call_context().get("entry_id"),
+            "input_tokens_original": get_call_context().get(
+                "input_tokens_original"
+            ),
+            "input_tokens_sent": get_call_context().get("input_tokens_sent"),
+            "prompt_version": prompt_version,
+            "latency_ms": round(latency * 1000, 1),
+            "created_at": datetime.now(),
+        }
+
+    def flush(self):
+        """等待后台写入完成，并写入缓冲中剩余的记录"""
+        flusher = self._flusher
+        if flusher is not None:
+            flusher.join()
+        self._write_buffer()
+
+    def _write_buffer(self):
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if not records:
+            return
+        try:
+            with Session(db) as session:
+                session.add_all(LLMCallLog(**record) for record in records)
+                session.commit()
+        except Exception:
+            logger.exception("写入 LLM 调用记录失败")
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _nearest_rank(
+        session: Session, where: list, count: int
+    ) -> Optional[dict[str, float]]:
+        """成功调用延迟的分位数，按最近秩逐个取值，不加载全部记录"""
+        if not count:
+            return None
+        result = {}
+        for p in PERCENTILES:
+            offset = max(math.ceil(p / 100 * count) - 1, 0)
+            value = session.execute(
+                select(LLMCallLog.latency_ms)
+                .where(*where, LLMCallLog.status == "success")
+                .order_by(LLMCallLog.latency_ms)
+                .limit(1)
+                .offset(offset)
+            ).scalar()
+            result[f"p{p}"] = round(float(value), 1)
+        return result
+
+    def _aggregate(
+        self,
+        session: Session,
+        since: datetime,
+        columns: list,
+        percentiles: bool = True,
+    ) -> dict[tuple, dict[str, Any]]:
+        """按 columns 分组，在数据库中汇总调用次数、平均值和总量"""
+        success = LLMCallLog.status == "success"
+
+        def on_success(column):
+            return case((success, column))
+
+        rows = session.execute(
+            select(
+                *columns,
+                func.count(LLMCallLog.id),
+                func.sum(case((success, 0), else_=1)),
+                func.coalesce(func.sum(LLMCallLog.retries), 0),
+                func.count(on_success(LLMCallLog.latency_ms)),
+                func.avg(on_success(LLMCallLog.latency_ms)),
+                func.avg(on_success(LLMCallLog.prompt_tokens)),
+                func.avg(on_success(LLMCallLog.completion_tokens)),
+                func.coalesce(
+                    func.sum(on_success(LLMCallLog.cached_tokens)), 0
+                ),
+                func.sum(on_success(LLMCallLog.cost)),
+                func.sum(LLMCallLog.input_tokens_original),
+                func.sum(LLMCallLog.input_tokens_sent),
+            )
+            .where(LLMCallLog.created_at >= since)
+            .group_by(*columns)
+        ).all()
+
+        def rounded(value: Optional[float], digits: int = 1):
+            return round(float(value), digits) if value is not None else None
+
+        summaries = {}
+        for row in rows:
+            key = tuple(row[: len(columns)])
+            (
+                calls,
+                errors,
+                retries,
+                successes,
+                latency,
+                prompt_tokens,
+                completion_tokens,
+                cached_tokens,
+                cost,
+                input_tokens_original,
+                input_tokens_sent,
+            ) = row[len(columns) :]
+            summary = {
+                "calls": calls,
+                "errors": int(errors or 0),
+                "retries": int(retries),
+                "avg_latency_ms": rounded(latency),
+                "avg_prompt_tokens": rounded(prompt_tokens),
+                "avg_completion_tokens": rounded(completion_tokens),
+                "cached_tokens": int(cached_tokens),
+                "cost": rounded(cost, 6),
+                "input_tokens_original": int(input_tokens_original or 0),
+                "input_tokens_sent": int(input_tokens_sent or 0),
+            }
+            if percentiles:
+                where = [LLMCallLog.created_at >= since] + [
+                    column.is_(None) if value is None else column == value
+                    for column, value in zip(columns, key)
+                ]
+                summary["latency_ms"] = self._nearest_rank(
+                    session, where, successes
+                )
+            summaries[key] = summary
+        return summaries
+
+    def get_stats(self, window_hours: int = 24) -> dict[str, Any]:
+        """按节点、池和池内部署汇总最近 window_hours 小时的调用"""
+        self.flush()
+        since = datetime.now() - timedelta(hours=window_hours)
+        with Session(db) as session:
+            nodes = self._aggregate(session, since, [LLMCallLog.node])
+            pools = self._aggregate(session, since, [LLMCallLog.pool])
+            deployments = self._aggregate(
+                session,
+                since,
+                [LLMCallLog.pool, LLMCallLog.deployment],
+                percentiles=False,
+            )
+        by_deployment: dict[str, dict] = defaultdict(dict)
+        for (pool, deployment), summary in deployments.items():
+            by_deployment[pool][deployment or "unknown"] = summary
+        return {
+            "window_hours": window_hours,
+            "nodes": {node or "unknown": v for (node,), v in nodes.items()},
+            "pools": {pool: v for (pool,), v in pools.items()},
+            "deployments": dict(by_deployment),
+        }
+
+
+# 创建全局实例
+call_logger = CallLogger()
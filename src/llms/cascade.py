@@ -0,0 +1,310 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from src.prompts.prompts import VALID_CATEGORIES, VALID_SCORES
+
+logger = logging.getLogger(__name__)
+
+# 各提示词的输出字段：取值集合，None 表示非空字符串
+OUTPUT_SCHEMAS: dict[str, dict[str, Optional[set]]] = {
+    "tagger": {"name": VALID_CATEGORIES, "classification_rationale": None},
+    "scorer": {"tag": VALID_SCORES, "summary": None},
+    "classify_score": {
+        "name": VALID_CATEGORIES,
+        "classification_rationale": None,
+        "tag": VALID_SCORES,
+        "summary": None,
+    },
+    "tagger_batch": {
+        "name": VALID_CATEGORIES,
+        "classification_rationale": None,
+    },
+    "scorer_batch": {"tag": VALID_SCORES, "summary": None},
+}
+BATCH_PROMPTS = {"tagger_batch", "scorer_batch"}
+
+CONFIDENCE_INSTRUCTION = (
+    "\n另外,请在输出的每个JSON对象中额外加入 confidence 字段,"
+    "取值为 0 到 1 之间的小数,表示你对本次判断的把握程度。\n"
+)
+
+
+@dataclass
+class CascadeConfig:
+    """
+    节点的级联配置
+
+    Args:
+        tiers: 按顺序尝试的池，通常先快速/便宜的池，再高质量的池
+        min_confidence: 模型自评的置信度低于该值时升级，None 表示不检查
+        escalate_on: 字段 -> 取值列表，输出命中时升级（如需要复核的标签）
+    """
+
+    tiers: list[str]
+    min_confidence: Optional[float] = None
+    escalate_on: dict[str, list[str]] = field(default_factory=dict)
+
+
+@dataclass
+class TierStats:
+    calls: int = 0
+    finished: int = 0
+    errors: int = 0
+    latency_total: float = 0.0
+    escalations: dict[str, int] = field(
+        default_factory=lambda: defaultdict(int)
+    )
+
+    def to_dict(self) -> dict[str, Any]:
+        escalated = sum(self.escalations.values())
+        return {
+            "calls": self.calls,
+            "finished": self.finished,
+            "errors": self.errors,
+            "escalated": escalated,
+            "escalation_rate": (
+                round(escalated / self.calls, 4) if self.calls else None
+            ),
+            "escalation_reasons": dict(self.escalations),
+            "avg_latency": (
+                round(self.latency_total / self.calls, 3)
+                if self.calls
+                else None
+            ),
+        }
+
+
+class CascadeStats:
+    """按节点和层级统计调用次数、升级次数与延迟"""
+
+    def __init__(self):
+        self._stats: dict[str, dict[str, TierStats]] = defaultdict(
+            lambda: defaultdict(TierStats)
+        )
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        node_name: str,
+        tier: str,
+        latency: float,
+        escalation: Optional[str] = None,
+        error: bool = False,
+    ):
+        with self._lock:
+            stats = self._stats[node_name][tier]
+            stats.calls += 1
+            stats.latency_total += latency
+            if error:
+                stats.errors += 1
+            if escalation:
+                stats.escalations[escalation] += 1
+            else:
+                stats.finished += 1
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                node_name: {
+                    tier: stats.to_dict() for tier, stats in tiers.items()
+                }
+                for node_name, tiers in self._stats.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _parse_json(text: str) -> Any:
+    """解析响应中的 JSON 对象或数组，忽略 markdown 代码块"""
+    text = (text or "").strip()
+    text = text.removeprefix("```json").removesuffix("```").strip()
+    start = min(
+        (i for i in (text.find("{"), text.find("[")) if i != -1), default=-1
+    )
+    if start == -1:
+        return None
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text[start:])
+        return value
+    except json.JSONDecodeError:
+        return None
+
+
+def check_output(
+    content: str, prompt_name: Optional[str], config: CascadeConfig
+) -> Optional[str]:
+    """
+    检查一次响应是否需要升级
+
+    Returns:
+        升级原因，不需要升级时返回 None
+    """
+    schema = OUTPUT_SCHEMAS.get(prompt_name or "")
+    if schema is None:
+        # 没有已知输出格式的调用（如分片总结）只在出错时升级
+        return None
+
+    parsed = _parse_json(content)
+    if prompt_name in BATCH_PROMPTS:
+        items = parsed if isinstance(parsed, list) and parsed else None
+    else:
+        items = [parsed] if isinstance(parsed, dict) else None
+    if items is None or not all(isinstance(item, dict) for item in items):
+        return "invalid_json"
+
+    for item in items:
+        for key, allowed in schema.items():
+            value = item.get(key)
+            if allowed is None:
+                if not isinstance(value, str) or not value.strip():
+                    return f"invalid_{key}"
+            elif str(value).casefold() not in allowed:
+                return f"invalid_{key}"
+
+        for key, values in config.escalate_on.items():
+            if str(item.get(key, "")).casefold() in {
+                str(value).casefold() for value in values
+            }:
+                return f"rule_{key}"
+
+        if config.min_confidence is not None:
+            try:
+                confidence = float(item.get("confidence"))
+            except (TypeError, ValueError):
+                return "missing_confidence"
+            if confidence < config.min_confidence:
+                return "low_confidence"
+    return None
+
+
+class CascadeLLM:
+    """
+    按层级依次调用多个池
+
+    先调用第一层的池，响应未通过校验、自评置信度过低、命中升级规则或调用
+    失败时，再调用下一层；最后一层的结果直接返回。
+
+    Args:
+        node_name: 节点名称
+        tiers: (池名, 池的模型实例) 列表
+        config: 级联配置
+        stats: 统计记录
+    """
+
+    def __init__(
+        self,
+        node_name: str,
+        tiers: list[tuple[str, Any]],
+        config: CascadeConfig,
+        stats: CascadeStats,
+    ):
+        self.node_name = node_name
+        self.tiers = tiers
+        self.config = config
+        self.stats = stats
+
+    def _prepare(self, messages: list, prompt_name: Optional[str]) -> list:
+        """需要自评置信度时，在系统提示词末尾追加说明"""
+        if (
+            self.config.min_confidence is None
+            or prompt_name not in OUTPUT_SCHEMAS
+            or not messages
+        ):
+            return messages
+        first = messages[0]
+        if isinstance(first, dict) and first.get("role") == "system":
+            first = {
+                **first,
+                "content": first["content"] + CONFIDENCE_INSTRUCTION,
+            }
+            return [first, *messages[1:]]
+        return messages
+
+    def _after_call(
+        self,
+        index: int,
+        tier: str,
+        started: float,
+        response: Optional[AIMessage],
+        prompt_name: Optional[str],
+        error: Optional[Exception] = None,
+    ) -> bool:
+        """记录统计，返回是否需要升级到下一层"""
+        latency = time.monotonic() - started
+        is_last = index == len(self.tiers) - 1
+        if error is not None:
+            reason = "error"
+        else:
+            reason = check_output(response.content, prompt_name, self.config)
+        if reason is None or is_last:
+            self.stats.record(
+                self.node_name, tier, latency, error=error is not None
+            )
+            if reason and is_last:
+                logger.warning(
+                    f"节点 {self.node_name} 在最后一层 {tier} 仍未通过检查: "
+                    f"{reason}"
+                )
+            return False
+        self.stats.record(
+            self.node_name,
+            tier,
+            latency,
+            escalation=reason,
+            error=error is not None,
+        )
+        logger.info(
+            f"节点 {self.node_name} 从 {tier} 升级到下一层，原因: {reason}"
+        )
+        return True
+
+    async def ainvoke(self, messages: list[BaseMessage], **kwargs) -> AIMessage:
+        prompt_name = (kwargs.get("prompt_version") or "").split(":")[0]
+        messages = self._prepare(messages, prompt_name)
+        for index, (tier, llm) in enumerate(self.tiers):
+            started = time.monotonic()
+            try:
+                response = await llm.ainvoke(messages, **kwargs)
+            except Exception as e:
+                if not self._after_call(
+                    index, tier, started, None, prompt_name, e
+                ):
+                    raise
+                continue
+            if not self._after_call(
+                index, tier, started, response, prompt_name
+            ):
+                return response
+        raise RuntimeError(f"节点 {self.node_name} 的级联没有可用的层级")
+
+    def invoke(self, messages: list[BaseMessage], **kwargs) -> AIMessage:
+        prompt_name = (kwargs.get("prompt_version") or "").split(":")[0]
+        messages = self._prepare(messages, prompt_name)
+        for index, (tier, llm) in enumerate(self.tiers):
+            started = time.monotonic()
+            try:
+                response = llm.invoke(messages, **kwargs)
+            except Exception as e:
+                if not self._after_call(
+                    index, tier, started, None, prompt_name, e
+                ):
+                    raise
+                continue
+            if not self._after_call(
+                index, tier, started, response, prompt_name
+            ):
+                return response
+        raise RuntimeError(f"节点 {self.node_name} 的级联没有可用的层级")
+
+
+# 创建全局实例
+cascade_stats = CascadeStats()
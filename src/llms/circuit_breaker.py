@@ -0,0 +1,247 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import litellm
+from litellm.integrations.custom_logger import CustomLogger
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 计入熔断的错误：超时、连接失败和服务端错误；请求本身的错误（4xx）不计入
+BREAKER_ERRORS = (
+    litellm.Timeout,
+    litellm.APIConnectionError,
+    litellm.InternalServerError,
+    litellm.ServiceUnavailableError,
+)
+
+
+class CircuitOpenError(litellm.ServiceUnavailableError):
+    """部署处于熔断状态，Router 会重试其他部署"""
+
+
+@dataclass
+class Breaker:
+    """单个部署的熔断器"""
+
+    threshold: int = 5
+    recovery_time: float = 60
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    trial_in_flight: bool = False
+    trial_started: float = 0.0
+    times_opened: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "retry_in": (
+                max(
+                    round(self.opened_at + self.recovery_time - time.time(), 1),
+                    0,
+                )
+                if self.state == OPEN
+                else None
+            ),
+        }
+
+
+class CircuitBreakerRegistry(CustomLogger):
+    """
+    部署级熔断器
+
+    连续 threshold 次超时或服务端错误后熔断（open），熔断期间路由时直接跳过
+    该部署，池内所有部署都熔断时立即失败，不再等待超时和重试；经过
+    recovery_time 秒后进入半开（half_open），只放行一个试探请求，成功则恢复
+    （closed），失败则重新熔断。
+
+    作为 litellm 回调注册：从成功、失败事件中更新状态，在过滤候选部署和
+    pre-call 检查时拦截熔断的部署。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._breakers: dict[str, Breaker] = {}
+        self._lock = threading.Lock()
+
+    def register(self):
+        if self not in litellm.callbacks:
+            litellm.callbacks.append(self)
+
+    def configure(
+        self, deployment_id: str, threshold: int, recovery_time: float
+    ):
+        """设置部署的熔断参数，同一部署在多个池中时以最后创建的池为准"""
+        with self._lock:
+            breaker = self._breakers.setdefault(deployment_id, Breaker())
+            breaker.threshold = threshold
+            breaker.recovery_time = recovery_time
+
+    # ------------------------------------------------------------------
+    # 状态更新
+    # ------------------------------------------------------------------
+
+    def record_success(self, deployment_id: str):
+        with self._lock:
+            breaker = self._breakers.get(deployment_id)
+            if breaker is None:
+                return
+            if breaker.state != CLOSED:
+                logger.info(f"部署 {deployment_id} 试探成功，熔断恢复")
+            breaker.state = CLOSED
+            breaker.failures = 0
+            breaker.trial_in_flight = False
+
+    def record_failure(self, deployment_id: str, error: Any = None):
+        with self._lock:
+            breaker = self._breakers.get(deployment_id)
+            if breaker is None:
+                return
+            breaker.failures += 1
+            breaker.trial_in_flight = False
+            if breaker.state == HALF_OPEN or (
+                breaker.state == CLOSED
+                and breaker.failures >= breaker.threshold
+            ):
+                breaker.state = OPEN
+                breaker.opened_at = time.time()
+                breaker.times_opened += 1
+                logger.warning(
+                    f"部署 {deployment_id} 连续失败 {breaker.failures} 次，"
+                    f"熔断 {breaker.recovery_time} 秒: {error}"
+                )
+
+    def _is_available(self, breaker: Breaker) -> bool:
+        if breaker.state == CLOSED:
+            return True
+        now = time.time()
+        if breaker.state == OPEN:
+            return now - breaker.opened_at >= breaker.recovery_time
+        # 试探请求被取消时收不到结果，超过 recovery_time 后允许再次试探
+        return (
+            not breaker.trial_in_flight
+            or now - breaker.trial_started >= breaker.recovery_time
+        )
+
+    def allow(self, deployment_id: str) -> bool:
+        """是否允许向该部署发出请求，半开状态只放行一个试探请求"""
+        with self._lock:
+            breaker = self._breakers.get(deployment_id)
+            if breaker is None or breaker.state == CLOSED:
+                return True
+            if not self._is_available(breaker):
+                return False
+            breaker.state = HALF_OPEN
+            breaker.trial_in_flight = True
+            breaker.trial_started = time.time()
+            return True
+
+    # ------------------------------------------------------------------
+    # litellm 回调
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _deployment_id(kwargs: dict) -> Optional[str]:
+        litellm_params = kwargs.get("litellm_params") or {}
+        return (litellm_params.get("model_info") or {}).get("id")
+
+    def _on_success(self, kwargs: dict):
+        deployment_id = self._deployment_id(kwargs)
+        if deployment_id is not None:
+            self.record_success(deployment_id)
+
+    def _on_failure(self, kwargs: dict):
+        deployment_id = self._deployment_id(kwargs)
+        error = kwargs.get("exception")
+        if deployment_id is None or isinstance(error, CircuitOpenError):
+            return
+        if isinstance(error, BREAKER_ERRORS):
+            self.record_failure(deployment_id, error)
+        else:
+            # 请求本身的错误说明部署可以正常响应，结束半开试探
+            with self._lock:
+                breaker = self._breakers.get(deployment_id)
+                if breaker is not None:
+                    breaker.trial_in_flight = False
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        self._on_success(kwargs)
+
+    def log_failure_event(self, kwargs, response_obj, start_time, end_time):
+        self._on_failure(kwargs)
+
+    async def async_log_success_event(
+        self, kwargs, response_obj, start_time, end_time
+    ):
+        self._on_success(kwargs)
+
+    async def async_log_failure_event(
+        self, kwargs, response_obj, start_time, end_time
+    ):
+        self._on_failure(kwargs)
+
+    async def async_filter_deployments(
+        self,
+        model: str,
+        healthy_deployments: list,
+        messages: Optional[list] = None,
+        request_kwargs: Optional[dict] = None,
+        parent_otel_span: Any = None,
+    ) -> list[dict]:
+        """路由前去掉熔断中的部署，全部熔断时 Router 立即失败"""
+        with self._lock:
+            available = []
+            for deployment in healthy_deployments:
+                deployment_id = deployment.get("model_info", {}).get("id")
+                breaker = self._breakers.get(deployment_id)
+                if breaker is None or self._is_available(breaker):
+                    available.append(deployment)
+            return available
+
+    def _check(self, deployment: dict):
+        deployment_id = deployment.get("model_info", {}).get("id")
+        if deployment_id is not None and not self.allow(deployment_id):
+            raise CircuitOpenError(
+                message=f"部署 {deployment_id} 处于熔断状态",
+                llm_provider="",
+                model=deployment.get("litellm_params", {}).get("model", ""),
+            )
+
+    async def async_pre_call_check(
+        self, deployment: dict, parent_otel_span: Any = None
+    ) -> Optional[dict]:
+        self._check(deployment)
+        return None
+
+    def pre_call_check(self, deployment: dict) -> Optional[dict]:
+        self._check(deployment)
+        return None
+
+    # ------------------------------------------------------------------
+    # 状态查询
+    # ------------------------------------------------------------------
+
+    def get_states(self, deployment_ids: list[str]) -> dict[str, dict]:
+        with self._lock:
+            return {
+                deployment_id: self._breakers[deployment_id].to_dict()
+                for deployment_id in deployment_ids
+                if deployment_id in self._breakers
+            }
+
+    def clear(self):
+        with self._lock:
+            self._breakers.clear()
+
+
+# 创建全局实例
+circuit_breakers = CircuitBreakerRegistry()
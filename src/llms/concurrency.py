@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import math
+import statistics
+import threading
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Optional
+
+import litellm
+from litellm.integrations.custom_logger import CustomLogger
+
+from src.llms.circuit_breaker import CircuitOpenError
+from src.llms.pool_manager import pool_manager
+
+logger = logging.getLogger(__name__)
+
+# 触发收缩的错误：限流和超时说明上游已经过载
+OVERLOAD_ERRORS = (litellm.RateLimitError, litellm.Timeout)
+
+
+def derive_limits(node_names: list[str]) -> tuple[int, int]:
+    """
+    根据节点对应池的配置计算并发的初始值和上限
+
+    上限取各池 concurrent_limit 的最小值；池内所有部署都配置了 rpm 时，
+    再按 rpm 总和与超时时间估算池能同时容纳的调用数（Little 定律），取两者
+    的较小值。初始值为池内部署数的最小值，每个部署先分到一个并发。
+    """
+    initial, maximum = [], []
+    for node_name in node_names:
+        pool_name = pool_manager.get_pool_name(node_name)
+        pool = pool_manager.pools.get(pool_name) if pool_name else None
+        if pool is None:
+            continue
+        limit = pool.pool_config.concurrent_limit
+        rpms = [model.rpm for model in pool.models]
+        if rpms and all(rpms):
+            limit = min(
+                limit, math.ceil(sum(rpms) / 60 * pool.pool_config.timeout)
+            )
+        maximum.append(max(limit, 1))
+        initial.append(max(len(pool.models), 1))
+    if not maximum:
+        return 1, 1
+    upper = min(maximum)
+    return min(min(initial), upper), upper
+
+
+class ConcurrencyController(CustomLogger):
+    """
+    AIMD 并发控制器，替代固定的信号量
+
+    持续成功且延迟、错误率正常时，每完成 limit 次调用并发加 increase；
+    遇到 429 或超时时并发乘以 decrease。收缩之前发出的调用随后的失败不再
+    重复收缩，与 TCP 拥塞控制每个往返只收缩一次相同。延迟高于窗口内最低
+    延迟的 latency_tolerance 倍，或错误率超过 error_rate_threshold 时保持
+    不变。
+
+    作为 litellm 回调注册，只统计 configure 时指定的池的调用。并发值在多次
+    运行之间保留，下次运行从上次调整后的值开始。
+
+    Args:
+        increase: 每轮增加的并发数
+        decrease: 收缩时的乘数
+        latency_tolerance: 延迟相对窗口内最低延迟的容忍倍数
+        error_rate_threshold: 窗口内错误率的容忍上限
+        window: 统计延迟和错误率的调用数
+        history_size: 保留的调整记录数
+    """
+
+    def __init__(
+        self,
+        increase: int = 1,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        error_rate_threshold: float = 0.1,
+        window: int = 50,
+        history_size: int = 100,
+    ):
+        super().__init__()
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.error_rate_threshold = error_rate_threshold
+        self.min_limit = 1
+        self.max_limit = 1
+        self.limit: Optional[int] = None
+        self.pools: set[str] = set()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._successes = 0
+        self._last_decrease = datetime.min
+        self._history: deque[dict[str, Any]] = deque(maxlen=history_size)
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._lock = threading.Lock()
+
+    def register(self):
+        if self not in litellm.callbacks:
+            litellm.callbacks.append(self)
+
+    def configure(
+        self,
+        pools: list[str],
+        max_limit: int,
+        initial: Optional[int] = None,
+        min_limit: int = 1,
+    ):
+        """设置统计的池和并发范围，已有的并发值被限制在新的范围内"""
+        with self._lock:
+            self.pools = set(pools)
+            self.min_limit = min_limit
+            self.max_limit = max(max_limit, min_limit)
+            limit = self.limit if self.limit is not None else initial
+            limit = min(max(limit or min_limit, min_limit), self.max_limit)
+            if limit != self.limit:
+                self._set_limit(limit, "configure")
+        self.register()
+
+    def configure_for_nodes(self, node_names: list[str]):
+        """按节点对应池的配置设置并发范围"""
+        initial, max_limit = derive_limits(node_names)
+        pools = {pool_manager.get_pool_name(node) for node in node_names}
+        self.configure(
+            [pool for pool in pools if pool], max_limit, initial=initial
+        )
+
+    def _set_limit(self, limit: int, reason: str):
+        old, self.limit = self.limit, limit
+        self._successes = 0
+        self._history.append(
+            {
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "limit": limit,
+                "reason": reason,
+            }
+        )
+        if old is not None:
+            logger.info(f"并发 {old} -> {limit}: {reason}")
+
+    # ------------------------------------------------------------------
+    # 调整
+    # ------------------------------------------------------------------
+
+    def _healthy(self) -> bool:
+        if not self._outcomes:
+            return True
+        error_rate = self._outcomes.count(False) / len(self._outcomes)
+        if error_rate > self.error_rate_threshold:
+            return False
+        if len(self._latencies) < 2:
+            return True
+        recent = list(self._latencies)[-max(self.limit or 1, 2) :]
+        baseline = min(self._latencies)
+        return statistics.median(recent) <= baseline * self.latency_tolerance
+
+    def record_success(self, latency: float):
+        with self._lock:
+            if self.limit is None:
+                return
+            self._latencies.append(latency)
+            self._outcomes.append(True)
+            self._successes += 1
+            if self._successes < self.limit or self.limit >= self.max_limit:
+                return
+            if self._healthy():
+                self._set_limit(
+                    min(self.limit + self.increase, self.max_limit),
+                    "increase",
+                )
+            else:
+                self._successes = 0
+
+    def record_failure(self, error: Any, started_at: Optional[datetime]):
+        with self._lock:
+            if self.limit is None:
+                return
+            self._outcomes.append(False)
+            if not isinstance(error, OVERLOAD_ERRORS):
+                return
+            # 上次收缩之前发出的调用不再重复收缩
+            if started_at is not None and started_at < self._last_decrease:
+                return
+            self._last_decrease = datetime.now()
+            limit = max(math.floor(self.limit * self.decrease), self.min_limit)
+            if limit != self.limit:
+                self._set_limit(limit, f"decrease: {type(error).__name__}")
+
+    # ------------------------------------------------------------------
+    # 槽位
+    # ------------------------------------------------------------------
+
+    def _wake(self):
+        while self._waiters and self._in_flight < (self.limit or 1):
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    async def acquire(self):
+        if not self._waiters and self._in_flight < (self.limit or 1):
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                if future in self._waiters:
+                    self._waiters.remove(future)
+            else:
+                self.release()
+            raise
+
+    def release(self):
+        self._in_flight -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    # ------------------------------------------------------------------
+    # litellm 回调
+    # ------------------------------------------------------------------
+
+    def _tracked(self, kwargs: dict) -> bool:
+        litellm_params = kwargs.get("litellm_params") or {}
+        metadata = litellm_params.get("metadata") or {}
+        return metadata.get("model_group") in self.pools
+
+    def _on_success(self, kwargs: dict, start_time, end_time):
+        if self._tracked(kwargs):
+            self.record_success((end_time - start_time).total_seconds())
+
+    def _on_failure(self, kwargs: dict, start_time):
+        error = kwargs.get("exception")
+        if self._tracked(kwargs) and not isinstance(error, CircuitOpenError):
+            self.record_failure(error, start_time)
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        self._on_success(kwargs, start_time, end_time)
+
+    def log_failure_event(self, kwargs, response_obj, start_time, end_time):
+        self._on_failure(kwargs, start_time)
+
+    async def async_log_success_event(
+        self, kwargs, response_obj, start_time, end_time
+    ):
+        self._on_success(kwargs, start_time, end_time)
+        self._wake()
+
+    async def async_log_failure_event(
+        self, kwargs, response_obj, start_time, end_time
+    ):
+        self._on_failure(kwargs, start_time)
+
+    # ------------------------------------------------------------------
+    # 状态查询
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "pools": sorted(self.pools),
+                "error_rate": (
+                    round(self._outcomes.count(False) / len(self._outcomes), 3)
+                    if self._outcomes
+                    else None
+                ),
+                "history": list(self._history),
+            }
+
+    def reset(self):
+        """清空并发值和统计，下次 configure 时重新从初始值开始"""
+        with self._lock:
+            self.limit = None
+            self._latencies.clear()
+            self._outcomes.clear()
+            self._successes = 0
+            self._last_decrease = datetime.min
+            self._history.clear()
+
+
+# 分类流程的全局并发控制器
+classify_concurrency = ConcurrencyController()
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import os
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigWatcher:
+    """
+    后台轮询配置文件，修改后调用 on_change 重新加载
+
+    按文件的修改时间和大小判断是否变化；编辑器保存时可能先清空再写入，
+    检测到变化后等待一个间隔、文件不再变化时才重新加载。
+
+    Args:
+        path: 配置文件路径
+        on_change: 文件变化后调用的函数
+        interval: 轮询间隔（秒）
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        on_change: Callable[[], Any],
+        interval: float = 5.0,
+    ):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _signature(self) -> Optional[tuple[float, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    async def run(self):
+        """轮询直到任务被取消"""
+        loaded = self._signature()
+        while True:
+            await asyncio.sleep(self.interval)
+            current = self._signature()
+            if current is None or current == loaded:
+                continue
+            await asyncio.sleep(self.interval)
+            if self._signature() != current:
+                continue
+            loaded = current
+            logger.info(f"配置文件 {self.path} 已修改，重新加载")
+            try:
+                self.on_change()
+            except Exception:
+                logger.exception(f"重新加载配置文件 {self.path} 失败")
+
+    def start(self):
+        """在当前事件循环中启动后台轮询"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+            logger.info(f"开始监视配置文件 {self.path}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+import litellm
+from litellm.router_utils.cooldown_cache import CooldownCache
+
+if TYPE_CHECKING:
+    from .pool_manager import ModelPool, PoolManager
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_PROMPT = "ping"
+
+
+@dataclass
+class DeploymentHealth:
+    """一个部署最近一次探测的结果"""
+
+    deployment_id: str
+    model: str
+    healthy: bool
+    latency_ms: float
+    checked_at: float
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "model": self.model,
+            "healthy": self.healthy,
+            "latency_ms": self.latency_ms,
+            "checked_at": self.checked_at,
+            "error": self.error,
+        }
+
+
+class PoolHealthChecker:
+    """
+    后台定期探测各池的部署，缓存健康状态
+
+    每个池按各自的 health_check_interval 探测，池状态只读取缓存的结果。
+    池内有健康的部署时，探测失败的部署会被放入 Router 的冷却列表，直到下一次
+    探测恢复为止，请求不会再路由到这些部署；池内所有部署都失败时不冷却，
+    仍由 Router 的重试和冷却逻辑处理。检查器只清除自己设置的冷却。
+
+    后台探测只在 API 服务中运行（由 app 的 lifespan 启动），命令行运行时不
+    探测，故障部署由 Router 的重试、冷却和熔断处理。
+
+    Args:
+        pools: 池管理器
+    """
+
+    def __init__(self, pools: "PoolManager"):
+        self.pools = pools
+        self._health: dict[str, dict[str, DeploymentHealth]] = {}
+        self._cooled: dict[str, dict[str, float]] = {}
+        self._next_check: dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _probe(
+        self, deployment: dict, timeout: float
+    ) -> DeploymentHealth:
+        params = dict(deployment["litellm_params"])
+        params["max_tokens"] = 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                litellm.ahealth_check(
+                    model_params=params, mode="chat", prompt=HEALTH_CHECK_PROMPT
+                ),
+                timeout=timeout,
+            )
+            error = result.get("error") if isinstance(result, dict) else None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return DeploymentHealth(
+            deployment_id=deployment["model_info"]["id"],
+            model=params.get("model", ""),
+            healthy=error is None,
+            latency_ms=round((time.monotonic() - started) * 1000, 1),
+            checked_at=time.time(),
+            error=str(error).split("\n")[0][:255] if error else None,
+        )
+
+    async def check_pool(
+        self, pool: "ModelPool"
+    ) -> dict[str, DeploymentHealth]:
+        """探测池内所有部署并更新缓存和冷却列表"""
+        router = pool._router
+        if router is None:
+            return {}
+        results = await asyncio.gather(
+            *[
+                self._probe(deployment, pool.pool_config.timeout)
+                for deployment in router.model_list
+            ]
+        )
+        health = {result.deployment_id: result for result in results}
+        self._health[pool.name] = health
+        self._update_cooldowns(pool, health)
+        return health
+
+    @staticmethod
+    def _cooldown_timestamp(router, deployment_id: str) -> Optional[float]:
+        value = router.cooldown_cache.cache.get_cache(
+            CooldownCache.get_cooldown_cache_key(deployment_id)
+        )
+        return value.get("timestamp") if isinstance(value, dict) else None
+
+    def _update_cooldowns(
+        self, pool: "ModelPool", health: dict[str, DeploymentHealth]
+    ):
+        router = pool._router
+        # 记录检查器写入的冷却时间戳，只清除仍是自己写入的冷却，Router 因调用
+        # 失败设置的冷却由 Router 自行过期
+        cooled = self._cooled.setdefault(pool.name, {})
+        unhealthy = {
+            deployment_id
+            for deployment_id, result in health.items()
+            if not result.healthy
+        }
+        # 冷却到下一次探测结束，恢复的部署在探测成功后立即移出
+        cooldown_time = (
+            pool.pool_config.health_check_interval + pool.pool_config.timeout
+        )
+        for deployment_id, timestamp in list(cooled.items()):
+            if deployment_id in unhealthy:
+                continue
+            del cooled[deployment_id]
+            if self._cooldown_timestamp(router, deployment_id) != timestamp:
+                continue
+            router.cooldown_cache.cache.delete_cache(
+                CooldownCache.get_cooldown_cache_key(deployment_id)
+            )
+            logger.info(f"池 {pool.name} 的部署 {deployment_id} 恢复健康")
+        if len(unhealthy) == len(health):
+            if unhealthy:
+                logger.warning(f"池 {pool.name} 的所有部署健康检查均失败")
+            cooled.clear()
+            return
+        for deployment_id in unhealthy:
+            current = self._cooldown_timestamp(router, deployment_id)
+            if current is not None and current != cooled.get(deployment_id):
+                # Router 已经冷却了该部署，保留 Router 的冷却
+                cooled.pop(deployment_id, None)
+                continue
+            router.cooldown_cache.add_deployment_to_cooldown(
+                model_id=deployment_id,
+                original_exception=Exception(health[deployment_id].error),
+                exception_status=503,
+                cooldown_time=cooldown_time,
+            )
+            cooled[deployment_id] = self._cooldown_timestamp(
+                router, deployment_id
+            )
+            logger.warning(
+                f"池 {pool.name} 的部署 {deployment_id} 健康检查失败，"
+                f"暂停路由: {health[deployment_id].error}"
+            )
+
+    async def run(self):
+        """按各池的间隔循环探测，直到任务被取消"""
+        next_check = self._next_check
+        while True:
+            now = time.monotonic()
+            due = [
+                pool
+                for name, pool in list(self.pools.pools.items())
+                if next_check.get(name, 0) <= now
+            ]
+            for pool in due:
+                next_check[pool.name] = (
+                    now + pool.pool_config.health_check_interval
+                )
+            if due:
+                results = await asyncio.gather(
+                    *[self.check_pool(pool) for pool in due],
+                    return_exceptions=True,
+                )
+                for pool, result in zip(due, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"池 {pool.name} 健康检查异常: {result}")
+            # 已删除的池不再保留状态
+            for name in (set(next_check) | set(self._cooled)) - set(
+                self.pools.pools
+            ):
+                self._health.pop(name, None)
+                self._cooled.pop(name, None)
+                next_check.pop(name, None)
+            wait = min(next_check.values(), default=now + 1) - time.monotonic()
+            await asyncio.sleep(max(wait, 1))
+
+    def start(self):
+        """在当前事件循环中启动后台探测"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+            logger.info("池健康检查已启动")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_health(
+        self, pool_name: str
+    ) -> Optional[dict[str, DeploymentHealth]]:
+        """读取缓存的健康状态，尚未探测时返回 None"""
+        return self._health.get(pool_name)
+
+    def invalidate(self, pool_name: str):
+        """池的配置变化后丢弃缓存的结果，下一轮立即重新探测"""
+        self._health.pop(pool_name, None)
+        self._next_check.pop(pool_name, None)
+
+    def clear(self):
+        self._health.clear()
+        self._cooled.clear()
+        self._next_check.clear()
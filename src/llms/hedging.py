@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import random
+import threading
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import litellm
+import numpy as np
+from litellm import Router
+from litellm.integrations.custom_logger import CustomLogger
+
+logger = logging.getLogger(__name__)
+
+# 计算 p95 需要的最少样本数，样本不足时不对冲
+MIN_SAMPLES = 20
+WINDOW_SIZE = 200
+HEDGE_PERCENTILE = 95
+
+
+@dataclass
+class _Selection:
+    """主请求选中的部署 id，由 Router 的 pre-call 检查写入"""
+
+    deployments: list[str] = field(default_factory=list)
+    dispatched: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+_selection: ContextVar[Optional[_Selection]] = ContextVar(
+    "hedge_selection", default=None
+)
+
+
+@dataclass
+class HedgeStats:
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    primary_wins: int = 0
+    skipped_budget: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_rate": (
+                round(self.hedged / self.calls, 4) if self.calls else None
+            ),
+            "hedge_wins": self.hedge_wins,
+            "primary_wins": self.primary_wins,
+            "skipped_budget": self.skipped_budget,
+        }
+
+
+class HedgeManager(CustomLogger):
+    """
+    对冲请求：主请求超过所选部署的 p95 延迟仍未完成时，向池内另一个部署
+    发送相同的请求，先成功返回的结果胜出，另一个请求被取消
+
+    每个池的对冲次数不超过调用次数的 max_rate。作为 litellm 回调注册，
+    通过 pre-call 检查得知主请求选中的部署。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._latencies: dict[str, deque] = defaultdict(
+            lambda: deque(maxlen=WINDOW_SIZE)
+        )
+        self._stats: dict[str, HedgeStats] = defaultdict(HedgeStats)
+        self._lock = threading.Lock()
+
+    def register(self):
+        if self not in litellm.callbacks:
+            litellm.callbacks.append(self)
+
+    async def async_pre_call_check(
+        self, deployment: dict, parent_otel_span: Any = None
+    ) -> Optional[dict]:
+        selection = _selection.get()
+        if selection is not None:
+            selection.deployments.append(
+                deployment.get("model_info", {}).get("id")
+            )
+            selection.dispatched.set()
+        return None
+
+    async def async_log_success_event(
+        self, kwargs, response_obj, start_time, end_time
+    ):
+        """记录每个部署成功调用的延迟，被取消的请求不计入"""
+        litellm_params = kwargs.get("litellm_params") or {}
+        deployment_id = (litellm_params.get("model_info") or {}).get("id")
+        if deployment_id is None:
+            return
+        try:
+            latency = (end_time - start_time).total_seconds()
+        except Exception:
+            return
+        with self._lock:
+            self._latencies[deployment_id].append(latency)
+
+    def hedge_delay(
+        self, deployment_id: Optional[str], pool_ids: list[str]
+    ) -> Optional[float]:
+        """主请求所选部署的 p95 延迟，样本不足时用池内所有部署的样本"""
+        with self._lock:
+            samples = list(self._latencies.get(deployment_id, ()))
+            if len(samples) < MIN_SAMPLES:
+                samples = [
+                    latency
+                    for pool_id in pool_ids
+                    for latency in self._latencies.get(pool_id, ())
+                ]
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return float(np.percentile(samples, HEDGE_PERCENTILE))
+
+    def _take_budget(self, pool_name: str, max_rate: float) -> bool:
+        with self._lock:
+            stats = self._stats[pool_name]
+            if stats.hedged + 1 > max_rate * stats.calls:
+                stats.skipped_budget += 1
+                return False
+            stats.hedged += 1
+            return True
+
+    def _record(self, pool_name: str, hedge_won: bool):
+        with self._lock:
+            if hedge_won:
+                self._stats[pool_name].hedge_wins += 1
+            else:
+                self._stats[pool_name].primary_wins += 1
+
+    @staticmethod
+    def _pick_alternative(router: Router, exclude: set[str]) -> Optional[str]:
+        """从池内未冷却的其他部署中随机选一个"""
+        candidates = [
+            deployment["model_info"]["id"]
+            for deployment in router.model_list
+            if deployment["model_info"]["id"] not in exclude
+        ]
+        if not candidates:
+            return None
+        cooldowns = {
+            deployment_id
+            for deployment_id, _ in router.cooldown_cache.get_active_cooldowns(
+                candidates, None
+            )
+        }
+        candidates = [c for c in candidates if c not in cooldowns]
+        return random.choice(candidates) if candidates else None
+
+    async def call(
+        self,
+        router: Router,
+        pool_name: str,
+        max_rate: float,
+        send: Callable[[str], Awaitable[Any]],
+    ) -> Any:
+        """
+        发起调用，必要时对冲
+
+        Args:
+            router: 池的 Router
+            pool_name: 池名，主请求按池路由
+            max_rate: 对冲次数占调用次数的上限
+            send: 按模型名（池名或部署 id）发送请求的函数
+        """
+        with self._lock:
+            self._stats[pool_name].calls += 1
+
+        selection = _Selection()
+        token = _selection.set(selection)
+        try:
+            primary = asyncio.create_task(send(pool_name))
+        finally:
+            _selection.reset(token)
+
+        try:
+            return await self._hedge(
+                router, pool_name, max_rate, send, primary, selection
+            )
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+
+    async def _hedge(
+        self,
+        router: Router,
+        pool_name: str,
+        max_rate: float,
+        send: Callable[[str], Awaitable[Any]],
+        primary: asyncio.Task,
+        selection: _Selection,
+    ) -> Any:
+        pool_ids = [d["model_info"]["id"] for d in router.model_list]
+        if len(pool_ids) < 2:
+            return await primary
+
+        # 从请求真正发出时开始计时，不包括限流等待
+        dispatched = asyncio.create_task(selection.dispatched.wait())
+        await asyncio.wait(
+            {primary, dispatched}, return_when=asyncio.FIRST_COMPLETED
+        )
+        dispatched.cancel()
+        if primary.done():
+            return primary.result()
+
+        delay = self.hedge_delay(selection.deployments[-1], pool_ids)
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        alternative = self._pick_alternative(router, set(selection.deployments))
+        if alternative is None or not self._take_budget(pool_name, max_rate):
+            return await primary
+
+        logger.debug(
+            f"池 {pool_name} 的请求超过 {delay:.1f}s 未完成，"
+            f"对冲到部署 {alternative}"
+        )
+        hedge = asyncio.create_task(send(alternative))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        self._record(pool_name, hedge_won=task is hedge)
+                        return task.result()
+            # 两个请求都失败时抛出主请求的异常
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self, pool_name: str) -> dict[str, Any]:
+        with self._lock:
+            return self._stats[pool_name].to_dict()
+
+    def clear(self):
+        with self._lock:
+            self._latencies.clear()
+            self._stats.clear()
+
+
+# 创建全局实例
+hedge_manager = HedgeManager()
@@ -4,8 +4,11 @@ from typing import Any
 
 import yaml
 
+from .cascade import CascadeConfig
 from .litellm_factory import ModelConfig
-from .pool_manager import PoolConfig, pool_manager
+from .pool_manager import PoolConfig, PoolManager, pool_manager
+from .rate_limiter import rate_limiter
+from .response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +35,9 @@ class PoolConfigManager:
                 logger.error(f"池配置文件验证失败: {errors}")
                 return False
 
-            # 清空现有配置
-            pool_manager.clear_all()
+            # 在新的管理器中构建池和映射，全部成功后再替换当前配置；配置未变
+            # 的池直接沿用，只为变化的池创建 Router，全局状态在替换后才更新
+            staging = PoolManager()
 
             # 解析供应商和模型定义
             providers_config = config_data.get("providers", {})
@@ -67,15 +71,31 @@ class PoolConfigManager:
                     health_check_interval=pool_config_data.get(
                         "health_check_interval", 30
                     ),
+                    cache=pool_config_data.get("cache", True),
+                    batch_size=pool_config_data.get("batch_size", 1),
+                    max_input_tokens=pool_config_data.get("max_input_tokens"),
+                    chunk_tokens=pool_config_data.get("chunk_tokens"),
+                    hedge_max_rate=pool_config_data.get("hedge_max_rate"),
                     extra_params=pool_config_data.get("extra_params", {}),
                 )
 
-                pool_manager.create_pool(
+                current = pool_manager.pools.get(pool_name)
+                if current is not None and current.definition == (
+                    description,
+                    models,
+                    load_balance_strategy,
+                    pool_config,
+                ):
+                    staging.add_pool(current)
+                    continue
+
+                staging.create_pool(
                     name=pool_name,
                     models=models,
                     description=description,
                     load_balance_strategy=load_balance_strategy,
                     pool_config=pool_config,
+                    register=False,
                 )
                 logger.info(f"加载池 {pool_name}: {len(models)} 个模型")
 
@@ -93,18 +113,47 @@ class PoolConfigManager:
                     continue
 
                 if pool_name:
-                    pool_manager.set_node_pool(node_name, pool_name)
+                    staging.set_node_pool(node_name, pool_name)
+
+            # 加载级联配置
+            cascades_config = config_data.get("cascades", {}) or {}
+            for node_name, cascade_data in cascades_config.items():
+                staging.set_node_cascade(
+                    node_name,
+                    CascadeConfig(
+                        tiers=list(cascade_data["tiers"]),
+                        min_confidence=cascade_data.get("min_confidence"),
+                        escalate_on=cascade_data.get("escalate_on", {}) or {},
+                    ),
+                )
 
             # 设置默认池
             default_pool = config_data.get("default_pool")
             if default_pool and default_pool in pools_config:
-                pool_manager.set_default_pool(default_pool)
+                staging.set_default_pool(default_pool)
             elif pools_config:
                 # 如果没有指定默认池，使用第一个池
                 first_pool = list(pools_config.keys())[0]
-                pool_manager.set_default_pool(first_pool)
+                staging.set_default_pool(first_pool)
                 logger.info(f"自动设置默认池: {first_pool}")
 
+            pool_manager.replace_with(staging)
+
+            # 响应缓存配置
+            cache_config = config_data.get("cache", {}) or {}
+            response_cache.configure(
+                enabled=cache_config.get("enabled", True),
+                ttl_seconds=cache_config.get("ttl_seconds"),
+                max_entries=cache_config.get("max_entries"),
+            )
+
+            # 跨进程限流配置
+            rate_limit_config = config_data.get("rate_limit", {}) or {}
+            rate_limiter.configure(
+                enabled=rate_limit_config.get("enabled", False),
+                path=rate_limit_config.get("db_path"),
+                max_wait=rate_limit_config.get("max_wait"),
+            )
             return True
 
         except Exception as e:
@@ -207,6 +256,10 @@ class PoolConfigManager:
             "pools": pool_manager.get_pool_names(),
             "default_pool": pool_manager.default_pool_name,
             "node_mappings": pool_manager.node_pool_mapping.copy(),
+            "cascades": {
+                node_name: cascade.tiers
+                for node_name, cascade in pool_manager.node_cascades.items()
+            },
             "total_models": sum(
                 len(pool.models) for pool in pool_manager.pools.values()
             ),
@@ -257,6 +310,39 @@ class PoolConfigManager:
             )
             errors.extend(pool_errors)
 
+        # 验证缓存配置
+        cache_config = config_data.get("cache", {}) or {}
+        if not isinstance(cache_config, dict):
+            errors.append("'cache' 必须是字典类型")
+        else:
+            for setting in ("ttl_seconds", "max_entries"):
+                value = cache_config.get(setting)
+                if value is not None and (
+                    not isinstance(value, int) or value < 0
+                ):
+                    errors.append(f"缓存配置 '{setting}' 必须是非负整数")
+
+        # 验证限流配置
+        rate_limit_config = config_data.get("rate_limit", {}) or {}
+        if not isinstance(rate_limit_config, dict):
+            errors.append("'rate_limit' 必须是字典类型")
+        else:
+            max_wait = rate_limit_config.get("max_wait")
+            if max_wait is not None and (
+                not isinstance(max_wait, (int, float)) or max_wait <= 0
+            ):
+                errors.append("限流配置 'max_wait' 必须是正数")
+
+        # 验证级联配置
+        cascades = config_data.get("cascades", {}) or {}
+        if not isinstance(cascades, dict):
+            errors.append("'cascades' 必须是字典类型")
+        else:
+            for node_name, cascade_config in cascades.items():
+                errors.extend(
+                    self._validate_cascade(node_name, cascade_config, pools)
+                )
+
         # 验证节点映射
         nodes = config_data.get("nodes", {})
         for node_name, node_config in nodes.items():
@@ -275,6 +361,42 @@ class PoolConfigManager:
 
         return errors
 
+    def _validate_cascade(
+        self, node_name: str, cascade_config: Any, pools: dict
+    ) -> list[str]:
+        """验证单个节点的级联配置"""
+        if not isinstance(cascade_config, dict):
+            return [f"节点 '{node_name}' 的级联配置必须是字典类型"]
+
+        errors = []
+        tiers = cascade_config.get("tiers")
+        if not isinstance(tiers, list) or len(tiers) < 2:
+            errors.append(f"节点 '{node_name}' 的级联至少需要两个池")
+        else:
+            for pool_name in tiers:
+                if pool_name not in pools:
+                    errors.append(
+                        f"节点 '{node_name}' 的级联引用的池 '{pool_name}' 不存在"
+                    )
+
+        min_confidence = cascade_config.get("min_confidence")
+        if min_confidence is not None and (
+            not isinstance(min_confidence, int | float)
+            or not 0 <= min_confidence <= 1
+        ):
+            errors.append(
+                f"节点 '{node_name}' 的 'min_confidence' 必须在 0-1 范围内"
+            )
+
+        escalate_on = cascade_config.get("escalate_on", {}) or {}
+        if not isinstance(escalate_on, dict) or not all(
+            isinstance(values, list) for values in escalate_on.values()
+        ):
+            errors.append(
+                f"节点 '{node_name}' 的 'escalate_on' 必须是字段到取值列表的映射"
+            )
+        return errors
+
     def _validate_providers(self, providers: dict) -> list[str]:
         """验证供应商配置"""
         errors = []
@@ -354,6 +476,7 @@ class PoolConfigManager:
             "simple-shuffle",
             "latency-based-routing",
             "least-busy",
+            "adaptive",
         ]
         if strategy not in valid_strategies:
             errors.append(
@@ -403,6 +526,10 @@ class PoolConfigManager:
             "circuit_breaker_threshold": (1, 50),
             "circuit_breaker_timeout": (10, 3600),
             "health_check_interval": (10, 300),
+            "batch_size": (1, 50),
+            "max_input_tokens": (100, 1000000),
+            "chunk_tokens": (200, 200000),
+            "hedge_max_rate": (0, 0.5),
         }
 
         for setting, (min_val, max_val) in numeric_settings.items():
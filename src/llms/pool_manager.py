@@ -1,13 +1,29 @@
 import logging
 import os
+import threading
+import time
 from dataclasses import dataclass, field
 from typing import Any, Optional
 
 import litellm
 from langchain_core.messages import AIMessage, BaseMessage
 from litellm import Router
-
+from litellm.router_utils.cooldown_cache import CooldownCache
+
+from .adaptive_routing import (
+    ADAPTIVE_STRATEGY,
+    AdaptiveRoutingStrategy,
+    adaptive_stats,
+)
+from .call_log import call_logger
+from .cascade import CascadeConfig, CascadeLLM, cascade_stats
+from .circuit_breaker import circuit_breakers
+from .health_checker import DeploymentHealth, PoolHealthChecker
+from .hedging import hedge_manager
 from .litellm_factory import ModelConfig
+from .priority import PriorityDispatcher
+from .rate_limiter import rate_limiter
+from .response_cache import ALWAYS, response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +44,11 @@ if (
     litellm.failure_callback = ["langfuse"]
 
 
+def get_deployment_id(model: ModelConfig) -> str:
+    """部署的固定 id，供应商、模型和 api_base 相同即为同一部署"""
+    return f"{model.provider}/{model.model}@{model.api_base or 'default'}"
+
+
 @dataclass
 class PoolConfig:
     """模型池配置"""
@@ -38,22 +59,53 @@ class PoolConfig:
     circuit_breaker_threshold: int = 5  # 熔断阈值
     circuit_breaker_timeout: int = 60  # 熔断恢复时间（秒）
     health_check_interval: int = 30  # 健康检查间隔（秒）
+    cache: bool = True  # 是否使用响应缓存
+    batch_size: int = 1  # 批量模式下每次调用处理的条目数，1 表示不启用
+    max_input_tokens: Optional[int] = None  # 单条内容的 token 预算，超出时压缩
+    chunk_tokens: Optional[int] = (
+        None  # 超出预算的长文分片总结时每片的 token 数
+    )
+    hedge_max_rate: Optional[float] = (
+        None  # 对冲请求占调用次数的上限，不设置时不对冲
+    )
     extra_params: dict[str, Any] = field(default_factory=dict)
 
 
 class LiteLLMRouterWrapper:
     """LiteLLM Router 的包装器，提供 LangChain 兼容的接口"""
 
-    def __init__(self, router: Router, pool_name: str):
+    def __init__(
+        self,
+        router: Router,
+        pool_name: str,
+        models: Optional[list[str]] = None,
+        use_cache: bool = True,
+        node_name: Optional[str] = None,
+        hedge_max_rate: Optional[float] = None,
+        dispatcher: Optional[PriorityDispatcher] = None,
+    ):
         self.router = router
         self.pool_name = pool_name
-
-    def invoke(self, messages: list[BaseMessage], **kwargs) -> AIMessage:
-        """调用模型，返回 AIMessage"""
-        # 转换 LangChain 消息格式为 LiteLLM 格式
+        self.models = models or []
+        self.use_cache = use_cache
+        self.node_name = node_name
+        self.hedge_max_rate = hedge_max_rate
+        self.dispatcher = dispatcher
+
+    @staticmethod
+    def _to_litellm_messages(messages: list[BaseMessage]) -> list[dict]:
+        """转换 LangChain 消息格式为 LiteLLM 格式"""
         litellm_messages = []
         for msg in messages:
-            if hasattr(msg, "type") and hasattr(msg, "content"):
+            if isinstance(msg, dict):
+                # get_prompt 返回的已经是 OpenAI 格式
+                litellm_messages.append(
+                    {
+                        "role": msg.get("role", "user"),
+                        "content": str(msg.get("content", "")).strip(),
+                    }
+                )
+            elif hasattr(msg, "type") and hasattr(msg, "content"):
                 # 映射 LangChain 角色到 OpenAI 格式
                 role_mapping = {
                     "human": "user",
@@ -71,24 +123,178 @@ class LiteLLMRouterWrapper:
             else:
                 # 兼容其他格式
                 litellm_messages.append({"role": "user", "content": str(msg)})
+        return litellm_messages
+
+    def _cache_key(
+        self,
+        litellm_messages: list[dict],
+        prompt_version: Optional[str],
+        kwargs: dict,
+    ) -> str:
+        return response_cache.make_key(
+            litellm_messages,
+            pool=self.pool_name,
+            models=self.models,
+            prompt_version=prompt_version,
+            params=kwargs,
+        )
+
+    def _record_response(
+        self, response: Any, prompt_version: Optional[str], started: float
+    ):
+        call_logger.record_response(
+            response,
+            pool=self.pool_name,
+            node=self.node_name,
+            prompt_version=prompt_version,
+            latency=time.monotonic() - started,
+        )
+
+    def _record_error(
+        self, error: Exception, prompt_version: Optional[str], started: float
+    ):
+        call_logger.record_error(
+            error,
+            pool=self.pool_name,
+            node=self.node_name,
+            prompt_version=prompt_version,
+            latency=time.monotonic() - started,
+        )
+
+    def _model_id(self, response: Any = None) -> str:
+        """实际返回响应的模型标识，缓存命中等没有响应时为池内模型的标识"""
+        hidden = getattr(response, "_hidden_params", None) or {}
+        deployment_id = hidden.get("model_id")
+        if deployment_id:
+            return deployment_id.rsplit("@", 1)[0]
+        return ",".join(sorted(set(self.models)))[:255]
+
+    @staticmethod
+    def _should_cache(use_cache: Any) -> bool:
+        if use_cache == ALWAYS:
+            return True
+        return bool(use_cache) and response_cache.enabled
+
+    def _to_message(self, content: str, served: dict) -> AIMessage:
+        # 结果来源记录使用 response_metadata 中的 model_id
+        return AIMessage(
+            content=content,
+            response_metadata={
+                "model_id": served.get("model_id") or self._model_id()
+            },
+        )
+
+    def invoke(self, messages: list[BaseMessage], **kwargs) -> AIMessage:
+        """
+        调用模型，返回 AIMessage
+
+        Args:
+            prompt_version: 提示词模板版本，作为缓存键的一部分
+            cache: 是否使用响应缓存，默认使用池配置；为 "always" 时即使
+                全局关闭了响应缓存也使用
+        """
+        prompt_version = kwargs.pop("prompt_version", None)
+        use_cache = kwargs.pop("cache", self.use_cache)
+        litellm_messages = self._to_litellm_messages(messages)
+        served: dict[str, str] = {}
+
+        def call() -> str:
+            started = time.monotonic()
+            reservation = rate_limiter.begin(litellm_messages, kwargs)
+            try:
+                # 使用池名作为模型名，Router 会自动选择最佳部署
+                response = self.router.completion(
+                    model=self.pool_name,  # Router 使用这个来找到对应的部署
+                    messages=litellm_messages,
+                    **kwargs,
+                )
+            except Exception as e:
+                rate_limiter.finish(reservation)
+                self._record_error(e, prompt_version, started)
+                raise
+            rate_limiter.finish(reservation, response)
+            self._record_response(response, prompt_version, started)
+            served["model_id"] = self._model_id(response)
+            return response.choices[0].message.content
 
         # 调用 LiteLLM Router
         try:
-            # 使用池名作为模型名，Router 会自动选择最佳部署
-            response = self.router.completion(
-                model=self.pool_name,  # Router 使用这个来找到对应的部署
-                messages=litellm_messages,
-                **kwargs,
-            )
+            if self._should_cache(use_cache):
+                content = response_cache.get_or_call(
+                    self._cache_key(litellm_messages, prompt_version, kwargs),
+                    pool=self.pool_name,
+                    call=call,
+                    prompt_version=prompt_version,
+                )
+            else:
+                content = call()
 
             # 转换回 LangChain 格式
-            content = response.choices[0].message.content
-            return AIMessage(content=content)
+            return self._to_message(content, served)
 
         except Exception as e:
             logger.exception("LiteLLM Router调用失败")
             raise
 
+    async def ainvoke(self, messages: list[BaseMessage], **kwargs) -> AIMessage:
+        """异步调用模型，请求进行中不阻塞事件循环，参数同 invoke"""
+        prompt_version = kwargs.pop("prompt_version", None)
+        use_cache = kwargs.pop("cache", self.use_cache)
+        litellm_messages = self._to_litellm_messages(messages)
+        served: dict[str, str] = {}
+
+        async def call() -> str:
+            if self.dispatcher is None:
+                return await dispatch()
+            # 按当前上下文的优先级通道排队，缓存命中的请求不占用槽位
+            async with self.dispatcher.slot():
+                return await dispatch()
+
+        async def dispatch() -> str:
+            started = time.monotonic()
+            reservation = rate_limiter.begin(litellm_messages, kwargs)
+            try:
+                if self.hedge_max_rate:
+                    response = await hedge_manager.call(
+                        self.router,
+                        self.pool_name,
+                        self.hedge_max_rate,
+                        lambda model: self.router.acompletion(
+                            model=model, messages=litellm_messages, **kwargs
+                        ),
+                    )
+                else:
+                    response = await self.router.acompletion(
+                        model=self.pool_name,
+                        messages=litellm_messages,
+                        **kwargs,
+                    )
+            except Exception as e:
+                await rate_limiter.afinish(reservation)
+                self._record_error(e, prompt_version, started)
+                raise
+            await rate_limiter.afinish(reservation, response)
+            self._record_response(response, prompt_version, started)
+            served["model_id"] = self._model_id(response)
+            return response.choices[0].message.content
+
+        try:
+            if self._should_cache(use_cache):
+                content = await response_cache.aget_or_call(
+                    self._cache_key(litellm_messages, prompt_version, kwargs),
+                    pool=self.pool_name,
+                    call=call,
+                    prompt_version=prompt_version,
+                )
+            else:
+                content = await call()
+
+            return self._to_message(content, served)
+
+        except Exception as e:
+            logger.exception("LiteLLM Router异步调用失败")
+            raise
+
 
 @dataclass
 class ModelPool:
@@ -102,10 +308,13 @@ class ModelPool:
 
     # LiteLLM Router 实例
     _router: Optional[Router] = field(default=None, init=False)
+    # 异步调用的并发控制，按优先级通道排队
+    _dispatcher: Optional[PriorityDispatcher] = field(default=None, init=False)
 
     def __post_init__(self):
-        """初始化 LiteLLM Router"""
+        """初始化 LiteLLM Router，全局回调由 register_callbacks 注册"""
         self._setup_router()
+        self._dispatcher = PriorityDispatcher(self.pool_config.concurrent_limit)
 
     def _setup_router(self):
         """设置 LiteLLM Router"""
@@ -130,6 +339,8 @@ class ModelPool:
                     "temperature": model.temperature,
                     "timeout": model.timeout,
                 },
+                # 固定的部署 id，不同池、不同进程中的同一部署共享限流额度
+                "model_info": {"id": get_deployment_id(model)},
             }
 
             # 添加 tpm/rpm 限制（如果指定）
@@ -146,7 +357,12 @@ class ModelPool:
 
         # 创建 Router
         router_settings = {
-            "routing_strategy": self.load_balance_strategy,
+            # 自适应策略在 Router 创建后替换选择逻辑
+            "routing_strategy": (
+                "simple-shuffle"
+                if self.load_balance_strategy == ADAPTIVE_STRATEGY
+                else self.load_balance_strategy
+            ),
             "model_list": model_list,
             "redis_host": None,  # 暂时不使用 Redis
             "redis_password": None,
@@ -167,6 +383,10 @@ class ModelPool:
             )
 
             self._router = Router(**router_settings)
+            if self.load_balance_strategy == ADAPTIVE_STRATEGY:
+                self._router.set_custom_routing_strategy(
+                    AdaptiveRoutingStrategy(self._router, adaptive_stats)
+                )
             logger.info(
                 f"为池 {self.name} 创建 LiteLLM Router，包含 {len(model_list)} 个模型"
             )
@@ -174,15 +394,90 @@ class ModelPool:
             logger.exception("创建 LiteLLM Router 失败")
             raise
 
-    def get_model(self) -> LiteLLMRouterWrapper:
-        """获取模型实例"""
+    def register_callbacks(self):
+        """
+        注册熔断、对冲和自适应路由的全局回调并设置池内部署的熔断参数
+
+        与创建 Router 分开，重新加载时新池在替换成功后才影响全局状态。
+        """
+        if self._router is None:
+            return
+        circuit_breakers.register()
+        for model in self.models:
+            circuit_breakers.configure(
+                get_deployment_id(model),
+                threshold=self.pool_config.circuit_breaker_threshold,
+                recovery_time=self.pool_config.circuit_breaker_timeout,
+            )
+        if self.pool_config.hedge_max_rate:
+            hedge_manager.register()
+        if self.load_balance_strategy == ADAPTIVE_STRATEGY:
+            adaptive_stats.register()
+
+    @property
+    def definition(self) -> tuple:
+        """决定 Router 行为的配置，相同时可以继续使用原有的 Router"""
+        return (
+            self.description,
+            self.models,
+            self.load_balance_strategy,
+            self.pool_config,
+        )
+
+    @property
+    def model_id(self) -> str:
+        """池内模型的标识，用于记录结果由哪些模型产生，与部署地址无关"""
+        return ",".join(
+            sorted({f"{model.provider}/{model.model}" for model in self.models})
+        )[:255]
+
+    def same_definition(self, other: "ModelPool") -> bool:
+        """两个池的配置是否相同，相同时重新加载可以继续使用原有的 Router"""
+        return self.definition == other.definition
+
+    def inherit_state(self, old: "ModelPool"):
+        """配置变化后，仍在池中的部署沿用旧 Router 中的冷却状态"""
+        if self._router is None or old._router is None:
+            return
+        deployment_ids = [
+            d["model_info"]["id"] for d in self._router.model_list
+        ]
+        now = time.time()
+        for (
+            deployment_id,
+            cooldown,
+        ) in old._router.cooldown_cache.get_active_cooldowns(
+            deployment_ids, None
+        ):
+            remaining = cooldown["timestamp"] + cooldown["cooldown_time"] - now
+            if remaining > 0:
+                self._router.cooldown_cache.cache.set_cache(
+                    key=CooldownCache.get_cooldown_cache_key(deployment_id),
+                    value=cooldown,
+                    ttl=remaining,
+                )
+
+    def get_model(
+        self, node_name: Optional[str] = None
+    ) -> LiteLLMRouterWrapper:
+        """获取模型实例，node_name 用于调用记录"""
         if not self._router:
             raise ValueError(f"模型池 {self.name} 的 Router 未初始化")
 
-        return LiteLLMRouterWrapper(self._router, self.name)
+        return LiteLLMRouterWrapper(
+            self._router,
+            self.name,
+            models=[f"{model.provider}/{model.model}" for model in self.models],
+            use_cache=self.pool_config.cache,
+            node_name=node_name,
+            hedge_max_rate=self.pool_config.hedge_max_rate,
+            dispatcher=self._dispatcher,
+        )
 
-    def get_status(self) -> dict[str, Any]:
-        """获取池状态"""
+    def get_status(
+        self, health: Optional[dict[str, DeploymentHealth]] = None
+    ) -> dict[str, Any]:
+        """获取池状态，health 为后台健康检查缓存的结果，尚未探测时为 None"""
         if not self._router:
             return {
                 "name": self.name,
@@ -191,24 +486,45 @@ class ModelPool:
                 "total_models": len(self.models),
             }
 
-        # 获取 Router 状态
-        try:
-            router_health = self._router.health_check()
-            healthy_models = sum(
-                1
-                for model_health in router_health.values()
-                if model_health.get("status") == "healthy"
-            )
-        except:
-            healthy_models = 0
-
         return {
             "name": self.name,
             "description": self.description,
             "status": "active",
             "total_models": len(self.models),
-            "healthy_models": healthy_models,
+            "healthy_models": (
+                sum(1 for result in health.values() if result.healthy)
+                if health is not None
+                else None
+            ),
+            "health": (
+                {
+                    deployment_id: result.to_dict()
+                    for deployment_id, result in health.items()
+                }
+                if health is not None
+                else None
+            ),
             "load_balance_strategy": self.load_balance_strategy,
+            "cache": {
+                **response_cache.get_stats(self.name),
+                "enabled": response_cache.enabled and self.pool_config.cache,
+            },
+            "routing": (
+                adaptive_stats.get_stats(
+                    [d["model_info"]["id"] for d in self._router.model_list]
+                )
+                if self.load_balance_strategy == ADAPTIVE_STRATEGY
+                else None
+            ),
+            "circuit_breakers": circuit_breakers.get_states(
+                [get_deployment_id(model) for model in self.models]
+            ),
+            "hedging": (
+                hedge_manager.get_stats(self.name)
+                if self.pool_config.hedge_max_rate
+                else None
+            ),
+            "priority": self._dispatcher.get_stats(),
         }
 
 
@@ -218,7 +534,11 @@ class PoolManager:
     def __init__(self):
         self.pools: dict[str, ModelPool] = {}
         self.node_pool_mapping: dict[str, str] = {}
+        self.node_cascades: dict[str, CascadeConfig] = {}
         self.default_pool: Optional[str] = None
+        self.health_checker = PoolHealthChecker(self)
+        # 重新加载时整体替换池和映射，读取方在锁内取得一致的快照
+        self._lock = threading.RLock()
 
     def create_pool(
         self,
@@ -227,8 +547,15 @@ class PoolManager:
         description: str = "",
         load_balance_strategy: str = "round_robin",
         pool_config: Optional[PoolConfig] = None,
+        register: bool = True,
     ) -> ModelPool:
-        """创建一个新的模型池"""
+        """
+        创建一个新的模型池
+
+        Args:
+            register: 是否立即注册全局回调，重新加载时由 replace_with 在替换
+                成功后注册
+        """
         if pool_config is None:
             pool_config = PoolConfig()
 
@@ -239,6 +566,8 @@ class PoolManager:
             load_balance_strategy=load_balance_strategy,
             pool_config=pool_config,
         )
+        if register:
+            pool.register_callbacks()
 
         self.pools[name] = pool
         logger.info(
@@ -246,6 +575,10 @@ class PoolManager:
         )
         return pool
 
+    def add_pool(self, pool: ModelPool):
+        """加入已有的池，重新加载时未变的池直接沿用"""
+        self.pools[pool.name] = pool
+
     def set_node_pool(self, node_name: str, pool_name: str):
         """设置节点使用的池"""
         if pool_name not in self.pools:
@@ -262,25 +595,118 @@ class PoolManager:
         self.default_pool = pool_name
         logger.info(f"设置默认池: {pool_name}")
 
+    def set_node_cascade(self, node_name: str, cascade: CascadeConfig):
+        """为节点设置级联，池的参数（并发、批量等）以第一层为准"""
+        for pool_name in cascade.tiers:
+            if pool_name not in self.pools:
+                raise ValueError(f"池 {pool_name} 不存在")
+
+        self.node_cascades[node_name] = cascade
+        logger.info(f"节点 {node_name} 使用级联: {' -> '.join(cascade.tiers)}")
+
     def get_model_for_node(
         self, node_name: Optional[str] = None
-    ) -> LiteLLMRouterWrapper:
-        """为指定节点获取模型"""
-        pool_name = self._get_pool_for_node(node_name)
-        if not pool_name:
-            raise ValueError(f"没有为节点 {node_name} 找到可用的池")
+    ) -> LiteLLMRouterWrapper | CascadeLLM:
+        """为指定节点获取模型，配置了级联的节点返回 CascadeLLM"""
+        with self._lock:
+            if node_name in self.node_cascades:
+                cascade = self.node_cascades[node_name]
+                return CascadeLLM(
+                    node_name,
+                    [
+                        (pool_name, self.pools[pool_name].get_model(node_name))
+                        for pool_name in cascade.tiers
+                    ],
+                    cascade,
+                    cascade_stats,
+                )
+
+            pool_name = self._get_pool_for_node(node_name)
+            if not pool_name:
+                raise ValueError(f"没有为节点 {node_name} 找到可用的池")
 
-        pool = self.pools[pool_name]
+            pool = self.pools[pool_name]
         try:
-            model_instance = pool.get_model()
+            model_instance = pool.get_model(node_name)
             logger.info(f"为节点 {node_name} 从池 {pool_name} 获取模型")
             return model_instance
         except Exception as e:
             logger.exception(f"从池 {pool_name} 获取模型失败")
             raise
 
+    def get_pool_config(self, node_name: Optional[str] = None) -> PoolConfig:
+        """获取节点对应池的配置，没有可用的池时返回默认配置"""
+        with self._lock:
+            pool_name = self._get_pool_for_node(node_name)
+            if not pool_name:
+                return PoolConfig()
+            return self.pools[pool_name].pool_config
+
+    def get_primary_model(
+        self, node_name: Optional[str] = None
+    ) -> Optional[str]:
+        """获取节点对应池的第一个模型，用于选择 tokenizer"""
+        with self._lock:
+            pool_name = self._get_pool_for_node(node_name)
+            if not pool_name or not self.pools[pool_name].models:
+                return None
+            model = self.pools[pool_name].models[0]
+        return f"{model.provider}/{model.model}"
+
+    def get_pool_name(self, node_name: Optional[str] = None) -> Optional[str]:
+        """获取节点对应的池名称，级联节点返回第一层的池"""
+        with self._lock:
+            return self._get_pool_for_node(node_name)
+
+    def get_model_id(self, node_name: Optional[str] = None) -> Optional[str]:
+        """获取节点对应池的模型标识"""
+        with self._lock:
+            pool_name = self._get_pool_for_node(node_name)
+            if not pool_name:
+                return None
+            return self.pools[pool_name].model_id
+
+    def get_model_ids(self, node_name: Optional[str] = None) -> set[str]:
+        """
+        节点可能产生结果的所有模型标识：级联的每一层池，池的标识及池内每个
+        模型的标识
+        """
+        with self._lock:
+            if node_name and node_name in self.node_cascades:
+                pool_names = self.node_cascades[node_name].tiers
+            else:
+                pool_name = self._get_pool_for_node(node_name)
+                pool_names = [pool_name] if pool_name else []
+            model_ids = set()
+            for pool_name in pool_names:
+                pool = self.pools.get(pool_name)
+                if pool is None:
+                    continue
+                model_ids.add(pool.model_id)
+                model_ids.update(
+                    f"{model.provider}/{model.model}" for model in pool.models
+                )
+            return model_ids
+
+    def get_concurrent_limit(self, node_name: Optional[str] = None) -> int:
+        """获取节点对应池的并发上限"""
+        return self.get_pool_config(node_name).concurrent_limit
+
+    def get_batch_size(self, node_name: Optional[str] = None) -> int:
+        """获取节点对应池的批量大小"""
+        return self.get_pool_config(node_name).batch_size
+
+    def has_node(self, node_name: str) -> bool:
+        """节点是否在配置中显式绑定了池或级联"""
+        return (
+            node_name in self.node_pool_mapping
+            or node_name in self.node_cascades
+        )
+
     def _get_pool_for_node(self, node_name: Optional[str]) -> Optional[str]:
-        """获取节点对应的池名称"""
+        """获取节点对应的池名称，级联节点返回第一层的池"""
+        if node_name and node_name in self.node_cascades:
+            return self.node_cascades[node_name].tiers[0]
         if node_name and node_name in self.node_pool_mapping:
             return self.node_pool_mapping[node_name]
         return self.default_pool
@@ -291,40 +717,84 @@ class PoolManager:
         model_config: ModelConfig,
         error: Exception,
     ):
-        """报告模型错误 - LiteLLM Router 自动处理"""
+        """报告模型错误，Router 内部的调用由回调自动记录，这里用于外部调用"""
         logger.debug(
             f"模型错误报告: {model_config.provider}:{model_config.model} - {error}"
         )
-        # LiteLLM Router 自动处理错误和熔断
-        pass
+        circuit_breakers.record_failure(get_deployment_id(model_config), error)
 
     def report_model_success(
         self, node_name: Optional[str], model_config: ModelConfig
     ):
-        """报告模型成功 - LiteLLM Router 自动处理"""
+        """报告模型成功，用法同 report_model_error"""
         logger.debug(
             f"模型成功报告: {model_config.provider}:{model_config.model}"
         )
-        # LiteLLM Router 自动处理成功状态
-        pass
+        circuit_breakers.record_success(get_deployment_id(model_config))
 
     def list_pools(self) -> dict[str, dict[str, Any]]:
         """列出所有池的状态"""
-        return {name: pool.get_status() for name, pool in self.pools.items()}
+        return {
+            name: pool.get_status(self.health_checker.get_health(name))
+            for name, pool in self.pools.items()
+        }
 
     def get_pool_mapping(self) -> dict[str, Any]:
         """获取节点池映射关系"""
         return {
             "node_mapping": self.node_pool_mapping.copy(),
+            "cascades": {
+                node_name: cascade.tiers
+                for node_name, cascade in self.node_cascades.items()
+            },
             "default_pool": self.default_pool,
             "available_pools": list(self.pools.keys()),
         }
 
+    def replace_with(self, other: "PoolManager"):
+        """
+        用另一个管理器中构建好的池和映射整体替换当前配置
+
+        配置未变的池继续使用原有的 Router，变化的池沿用仍在池中的部署的冷却
+        状态，并在替换后注册全局回调。替换在锁内一次完成，不存在没有池可用的
+        间隙；进行中的调用持有旧 Router 的引用，会在旧 Router 上完成。
+        """
+        pools = {}
+        changed = []
+        for name, pool in other.pools.items():
+            current = self.pools.get(name)
+            if current is not None and (
+                current is pool or current.same_definition(pool)
+            ):
+                pools[name] = current
+                continue
+            if current is not None:
+                pool.inherit_state(current)
+            pools[name] = pool
+            changed.append(name)
+        removed = [name for name in self.pools if name not in pools]
+
+        with self._lock:
+            self.pools = pools
+            self.node_pool_mapping = dict(other.node_pool_mapping)
+            self.node_cascades = dict(other.node_cascades)
+            self.default_pool = other.default_pool
+        for name in changed:
+            pools[name].register_callbacks()
+        for name in changed + removed:
+            self.health_checker.invalidate(name)
+        logger.info(
+            f"模型池已替换: 变化 {len(changed)} 个, 删除 {len(removed)} 个, "
+            f"未变 {len(pools) - len(changed)} 个"
+        )
+
     def clear_all(self):
         """清空所有池和映射"""
         self.pools.clear()
         self.node_pool_mapping.clear()
+        self.node_cascades.clear()
         self.default_pool = None
+        self.health_checker.clear()
         logger.info("已清空所有模型池")
 
 
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+FRESH = "fresh"
+BACKFILL = "backfill"
+LANES = (INTERACTIVE, FRESH, BACKFILL)
+# 各通道都有请求排队时，按权重比例分配空出的调用槽位
+LANE_WEIGHTS = {INTERACTIVE: 8, FRESH: 4, BACKFILL: 1}
+
+# 当前调用所属的通道，asyncio 任务之间互不影响
+_lane: ContextVar[str] = ContextVar("llm_priority_lane", default=FRESH)
+
+
+@contextmanager
+def priority_lane(lane: str) -> Iterator[None]:
+    """在上下文中发起的 LLM 调用都使用该通道排队"""
+    if lane not in LANES:
+        raise ValueError(f"未知的优先级通道: {lane}")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def get_priority_lane() -> str:
+    return _lane.get()
+
+
+@dataclass
+class LaneStats:
+    in_flight: int = 0
+    dispatched: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def to_dict(self, waiting: int) -> dict[str, Any]:
+        return {
+            "waiting": waiting,
+            "in_flight": self.in_flight,
+            "dispatched": self.dispatched,
+            "avg_wait_ms": (
+                round(self.wait_total / self.dispatched * 1000, 1)
+                if self.dispatched
+                else None
+            ),
+            "max_wait_ms": round(self.wait_max * 1000, 1),
+        }
+
+
+class PriorityDispatcher:
+    """
+    池内异步调用的并发控制，按优先级通道分配调用槽位
+
+    同时进行的调用不超过 limit。槽位不足时按通道排队，空出的槽位按加权公平
+    调度分配：各通道按 LANE_WEIGHTS 的比例轮流获得槽位，排队中的低优先级
+    请求会被后到的高优先级请求插队，但不会被饿死。backfill 通道最多占用
+    limit - headroom 个槽位，保留的槽位留给新条目和交互请求，大量回填进行中
+    时新条目也不必等待正在进行的回填调用结束。进行中的调用不会被中断。
+
+    Args:
+        limit: 并发上限，即池的 concurrent_limit
+        headroom: 保留给 backfill 以外通道的槽位数，默认为 limit 的四分之一
+    """
+
+    def __init__(self, limit: int, headroom: Optional[int] = None):
+        self.limit = limit
+        self.headroom = (
+            headroom
+            if headroom is not None
+            else min(limit - 1, max(limit // 4, 1))
+        )
+        self._in_flight = 0
+        self._waiters: dict[str, deque] = {lane: deque() for lane in LANES}
+        # 步长调度：每次分配后通道的 pass 增加 1 / 权重，取 pass 最小的通道
+        self._pass: dict[str, float] = dict.fromkeys(LANES, 0.0)
+        self._virtual_time = 0.0
+        self._stats: dict[str, LaneStats] = {
+            lane: LaneStats() for lane in LANES
+        }
+
+    def _eligible(self, lane: str) -> bool:
+        if lane != BACKFILL:
+            return True
+        return self._stats[BACKFILL].in_flight < self.limit - self.headroom
+
+    def _grant(self, lane: str, enqueued_at: float):
+        wait = time.monotonic() - enqueued_at
+        stats = self._stats[lane]
+        stats.in_flight += 1
+        stats.dispatched += 1
+        stats.wait_total += wait
+        stats.wait_max = max(stats.wait_max, wait)
+        self._in_flight += 1
+
+    def _dispatch(self):
+        """把空出的槽位分配给排队的请求"""
+        while self._in_flight < self.limit:
+            lanes = [
+                lane
+                for lane in LANES
+                if self._waiters[lane] and self._eligible(lane)
+            ]
+            if not lanes:
+                return
+            lane = min(lanes, key=lambda name: self._pass[name])
+            future, enqueued_at = self._waiters[lane].popleft()
+            if future.done():
+                continue
+            self._virtual_time = self._pass[lane]
+            self._pass[lane] += 1 / LANE_WEIGHTS[lane]
+            self._grant(lane, enqueued_at)
+            future.set_result(None)
+
+    async def acquire(self, lane: str):
+        enqueued_at = time.monotonic()
+        if (
+            self._in_flight < self.limit
+            and self._eligible(lane)
+            and not any(self._waiters.values())
+        ):
+            self._grant(lane, enqueued_at)
+            return
+        # 空闲后重新排队的通道不累积之前未使用的份额
+        if not self._waiters[lane]:
+            self._pass[lane] = max(self._pass[lane], self._virtual_time)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append((future, enqueued_at))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                waiter = (future, enqueued_at)
+                if waiter in self._waiters[lane]:
+                    self._waiters[lane].remove(waiter)
+            else:
+                # 已分配到槽位后被取消时归还槽位
+                self.release(lane)
+            raise
+
+    def release(self, lane: str):
+        self._in_flight -= 1
+        self._stats[lane].in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane: Optional[str] = None) -> AsyncIterator[None]:
+        """占用一个调用槽位，lane 缺省时使用当前上下文的通道"""
+        lane = lane or get_priority_lane()
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "lanes": {
+                lane: self._stats[lane].to_dict(len(self._waiters[lane]))
+                for lane in LANES
+            },
+        }
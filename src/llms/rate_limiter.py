@@ -0,0 +1,416 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import litellm
+from litellm.integrations.custom_logger import CustomLogger
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_DB_PATH = "data/rate_limits.db"
+# 没有 max_tokens 时为输出预留的 token 数，实际用量在调用结束后对账
+EXPECTED_OUTPUT_TOKENS = 512
+# 单次等待的最长间隔，避免其他进程归还额度后仍长时间等待
+MAX_POLL_SECONDS = 1.0
+
+
+@dataclass
+class Reservation:
+    """一次调用在某个部署上预占的额度"""
+
+    deployment_id: str
+    tokens: int
+    tpm: Optional[int]
+    rpm: Optional[int]
+
+
+@dataclass
+class PendingCall:
+    """wrapper 发起调用前写入上下文，pre-call 检查在其中记录预占的额度"""
+
+    estimated_tokens: int
+    reservations: list[Reservation]
+
+
+_pending_call: ContextVar[Optional[PendingCall]] = ContextVar(
+    "rate_limit_pending_call", default=None
+)
+
+
+class TokenBucketStore:
+    """
+    基于 SQLite 的令牌桶，同一台机器上的多个进程共享
+
+    每个部署两个桶：tokens 按 tpm/60 每秒补充，requests 按 rpm/60 每秒补充，
+    容量分别为 tpm 和 rpm。取额度在 BEGIN IMMEDIATE 事务中完成，保证多进程下
+    检查和扣减是原子的。
+
+    Args:
+        path: SQLite 文件路径
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_DB_PATH):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS token_buckets (
+                    deployment_id TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    requests REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def _refill(
+        row: Optional[tuple],
+        tpm: Optional[int],
+        rpm: Optional[int],
+        now: float,
+    ) -> tuple[float, float]:
+        token_capacity = float(tpm) if tpm else float("inf")
+        request_capacity = float(rpm) if rpm else float("inf")
+        if row is None:
+            return token_capacity, request_capacity
+        tokens, requests, updated_at = row
+        elapsed = max(now - updated_at, 0.0)
+        if tpm:
+            tokens = min(token_capacity, tokens + elapsed * tpm / 60)
+        if rpm:
+            requests = min(request_capacity, requests + elapsed * rpm / 60)
+        return tokens, requests
+
+    def _save(
+        self,
+        conn: sqlite3.Connection,
+        deployment_id: str,
+        tokens: float,
+        requests: float,
+        now: float,
+    ):
+        # 不限制的桶不需要持久化具体数值
+        conn.execute(
+            "INSERT OR REPLACE INTO token_buckets VALUES (?, ?, ?, ?)",
+            (
+                deployment_id,
+                tokens if tokens != float("inf") else 0.0,
+                requests if requests != float("inf") else 0.0,
+                now,
+            ),
+        )
+
+    def try_acquire(
+        self,
+        deployment_id: str,
+        tokens: int,
+        tpm: Optional[int],
+        rpm: Optional[int],
+    ) -> float:
+        """
+        尝试取出额度
+
+        Returns:
+            float: 0 表示已取出，否则为预计需要等待的秒数
+        """
+        if not tpm and not rpm:
+            return 0.0
+        # 超出桶容量的请求在桶满时放行，避免永远等待
+        tokens = min(tokens, tpm) if tpm else 0
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, requests, updated_at FROM token_buckets "
+                "WHERE deployment_id = ?",
+                (deployment_id,),
+            ).fetchone()
+            available_tokens, available_requests = self._refill(
+                row, tpm, rpm, now
+            )
+            waits = []
+            if tpm and available_tokens < tokens:
+                waits.append((tokens - available_tokens) / (tpm / 60))
+            if rpm and available_requests < 1:
+                waits.append((1 - available_requests) / (rpm / 60))
+            if not waits:
+                available_tokens -= tokens
+                available_requests -= 1
+            self._save(
+                conn,
+                deployment_id,
+                available_tokens if tpm else float("inf"),
+                available_requests if rpm else float("inf"),
+                now,
+            )
+            conn.execute("COMMIT")
+            return max(waits) if waits else 0.0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def adjust(
+        self,
+        deployment_id: str,
+        tokens: int,
+        tpm: Optional[int],
+        rpm: Optional[int] = None,
+    ):
+        """
+        按实际用量对账：tokens 为正时补扣，为负时归还
+
+        余额最低为 -tpm，即超出的用量最多让后续请求等待一分钟
+        """
+        if not tpm or tokens == 0:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, requests, updated_at FROM token_buckets "
+                "WHERE deployment_id = ?",
+                (deployment_id,),
+            ).fetchone()
+            if row is not None:
+                # requests 桶不限制时保持原值，限制时只做补充
+                available_tokens, available_requests = self._refill(
+                    row, tpm, rpm, now
+                )
+                available_tokens = min(
+                    max(available_tokens - tokens, -float(tpm)), float(tpm)
+                )
+                self._save(
+                    conn,
+                    deployment_id,
+                    available_tokens,
+                    available_requests if rpm else float("inf"),
+                    now,
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+def _deployment_limits(deployment: dict) -> tuple[Optional[int], Optional[int]]:
+    params = deployment.get("litellm_params", {}) or {}
+    tpm = deployment.get("tpm") or params.get("tpm")
+    rpm = deployment.get("rpm") or params.get("rpm")
+    return tpm, rpm
+
+
+class DeploymentRateLimiter(CustomLogger):
+    """
+    跨进程的部署级 TPM/RPM 限流
+
+    作为 litellm 回调注册，Router 选定部署后、发出请求前调用 pre-call 检查，
+    此时按 wrapper 写入上下文的预估 token 数从共享令牌桶中取额度，额度不足时
+    等待；等待超过 max_wait 时抛出 RateLimitError，由 Router 冷却该部署并重试
+    其他部署。
+
+    Args:
+        store: 令牌桶存储
+        max_wait: 单次调用最长等待时间（秒）
+    """
+
+    def __init__(self, store: TokenBucketStore, max_wait: float = 60):
+        super().__init__()
+        self.store = store
+        self.max_wait = max_wait
+
+    def _reserve_args(self, deployment: dict) -> Optional[tuple]:
+        pending = _pending_call.get()
+        if pending is None:
+            return None
+        tpm, rpm = _deployment_limits(deployment)
+        if not tpm and not rpm:
+            return None
+        deployment_id = deployment.get("model_info", {}).get("id")
+        return pending, deployment_id, tpm, rpm
+
+    def _rate_limit_error(self, deployment: dict, deployment_id: str):
+        return litellm.RateLimitError(
+            message=f"部署 {deployment_id} 等待共享额度超过 {self.max_wait} 秒",
+            llm_provider="",
+            model=deployment.get("litellm_params", {}).get("model", ""),
+        )
+
+    async def async_pre_call_check(
+        self, deployment: dict, parent_otel_span: Any = None
+    ) -> Optional[dict]:
+        args = self._reserve_args(deployment)
+        if args is None:
+            return None
+        pending, deployment_id, tpm, rpm = args
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = await asyncio.to_thread(
+                self.store.try_acquire,
+                deployment_id,
+                pending.estimated_tokens,
+                tpm,
+                rpm,
+            )
+            if wait == 0:
+                break
+            if time.monotonic() + min(wait, MAX_POLL_SECONDS) > deadline:
+                raise self._rate_limit_error(deployment, deployment_id)
+            await asyncio.sleep(min(wait, MAX_POLL_SECONDS))
+        pending.reservations.append(
+            Reservation(deployment_id, pending.estimated_tokens, tpm, rpm)
+        )
+        return None
+
+    def pre_call_check(self, deployment: dict) -> Optional[dict]:
+        args = self._reserve_args(deployment)
+        if args is None:
+            return None
+        pending, deployment_id, tpm, rpm = args
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = self.store.try_acquire(
+                deployment_id, pending.estimated_tokens, tpm, rpm
+            )
+            if wait == 0:
+                break
+            if time.monotonic() + min(wait, MAX_POLL_SECONDS) > deadline:
+                raise self._rate_limit_error(deployment, deployment_id)
+            time.sleep(min(wait, MAX_POLL_SECONDS))
+        pending.reservations.append(
+            Reservation(deployment_id, pending.estimated_tokens, tpm, rpm)
+        )
+        return None
+
+
+class RateLimiter:
+    """
+    wrapper 使用的限流入口：调用前预估 token 数，调用后按实际用量对账
+
+    Args:
+        path: 令牌桶 SQLite 文件路径
+        max_wait: 单次调用最长等待时间（秒）
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_DB_PATH, max_wait: float = 60):
+        self.store = TokenBucketStore(path)
+        self.callback = DeploymentRateLimiter(self.store, max_wait)
+        self.enabled = False
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        path: Optional[str] = None,
+        max_wait: Optional[float] = None,
+    ):
+        """根据池配置文件中的 rate_limit 段更新设置"""
+        if path is not None and path != self.store.path:
+            self.store = TokenBucketStore(path)
+            self.callback.store = self.store
+        if max_wait is not None:
+            self.callback.max_wait = max_wait
+        if enabled is not None:
+            self.enabled = enabled
+        # 注册为 litellm 回调后，Router 的每次调用都会经过 pre-call 检查
+        if self.enabled and self.callback not in litellm.callbacks:
+            litellm.callbacks.append(self.callback)
+        elif not self.enabled and self.callback in litellm.callbacks:
+            litellm.callbacks.remove(self.callback)
+        logger.info(
+            f"跨进程限流: enabled={self.enabled}, db={self.store.path}, "
+            f"max_wait={self.callback.max_wait}s"
+        )
+
+    @staticmethod
+    def estimate_tokens(messages: list[dict], kwargs: dict) -> int:
+        try:
+            prompt_tokens = litellm.token_counter(messages=messages)
+        except Exception:
+            prompt_tokens = (
+                sum(len(str(m.get("content", ""))) for m in messages) // 2
+            )
+        output_tokens = kwargs.get("max_tokens") or EXPECTED_OUTPUT_TOKENS
+        return prompt_tokens + output_tokens
+
+    def begin(self, messages: list[dict], kwargs: dict) -> Optional[Any]:
+        """调用前写入预估 token 数，返回用于 finish 的上下文 token"""
+        if not self.enabled:
+            return None
+        pending = PendingCall(self.estimate_tokens(messages, kwargs), [])
+        return _pending_call.set(pending)
+
+    @staticmethod
+    def _pop_pending(token: Optional[Any]) -> Optional[PendingCall]:
+        """取出 begin 写入的预占记录，必须在调用 begin 的上下文中执行"""
+        if token is None:
+            return None
+        pending = _pending_call.get()
+        _pending_call.reset(token)
+        if pending is None or not pending.reservations:
+            return None
+        return pending
+
+    def _settle(self, pending: PendingCall, response: Any):
+        hidden = getattr(response, "_hidden_params", None) or {}
+        usage = getattr(response, "usage", None)
+        served_by = hidden.get("model_id")
+        actual = getattr(usage, "total_tokens", None)
+        settled = False
+        for reservation in pending.reservations:
+            if (
+                not settled
+                and reservation.deployment_id == served_by
+                and actual is not None
+            ):
+                delta = actual - reservation.tokens
+                settled = True
+            else:
+                delta = -reservation.tokens
+            try:
+                self.store.adjust(
+                    reservation.deployment_id,
+                    delta,
+                    reservation.tpm,
+                    reservation.rpm,
+                )
+            except Exception:
+                logger.exception("限流额度对账失败")
+
+    def finish(self, token: Optional[Any], response: Any = None):
+        """
+        调用结束后对账：成功的部署按实际用量补扣或归还，其余（失败、重试）
+        的预占额度全部归还
+        """
+        pending = self._pop_pending(token)
+        if pending is not None:
+            self._settle(pending, response)
+
+    async def afinish(self, token: Optional[Any], response: Any = None):
+        """异步版本的 finish，对账的数据库写入在线程中执行，不阻塞事件循环"""
+        pending = self._pop_pending(token)
+        if pending is not None:
+            await asyncio.to_thread(self._settle, pending, response)
+
+
+# 创建全局实例
+rate_limiter = RateLimiter()
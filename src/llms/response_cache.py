@@ -0,0 +1,372 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from src.models import db
+from src.models.llm_cache import LLMResponseCache
+
+logger = logging.getLogger(__name__)
+
+# 调用时传入 cache=ALWAYS 表示总是使用缓存，不受 cache.enabled 和池配置影响
+ALWAYS = "always"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class CacheStats:
+    """单个池的缓存计数"""
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+class _InFlight:
+    """进行中的同步调用，等待者通过 event 获取结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.content: Optional[str] = None
+
+
+class ResponseCache:
+    """
+    基于 SQLite 的 LLM 响应缓存
+
+    缓存键由规范化后的消息、提示词版本、池名、池内模型和影响输出的调用参数
+    组成。记录在 ttl_seconds 后过期，总数超过 max_entries 时淘汰最久未命中
+    的记录。相同键的并发请求只会发起一次调用，其余请求等待该调用的结果。
+
+    命中只读数据库，命中次数和时间先记在内存中，累计 hit_flush_every 次或
+    淘汰前批量写入。异步调用的读写在线程中执行，不阻塞事件循环。
+
+    Args:
+        enabled: 是否启用缓存
+        ttl_seconds: 缓存有效期，0 表示不过期
+        max_entries: 最多保留的记录数
+        evict_every: 每写入多少条记录执行一次淘汰
+        hit_flush_every: 累计多少次命中后写入命中记录
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl_seconds: int = 7 * 24 * 3600,
+        max_entries: int = 50000,
+        evict_every: int = 100,
+        hit_flush_every: int = 100,
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.hit_flush_every = hit_flush_every
+        self._stats: dict[str, CacheStats] = defaultdict(CacheStats)
+        self._writes = 0
+        # 尚未写入的命中：cache_key -> (命中次数, 最近命中时间)
+        self._pending_hits: dict[str, tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        # 进行中的调用：异步调用按事件循环区分，同步调用使用线程事件
+        self._async_inflight: dict[tuple[int, str], asyncio.Future] = {}
+        self._sync_inflight: dict[str, _InFlight] = {}
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """根据池配置文件中的 cache 段更新设置"""
+        if enabled is not None:
+            self.enabled = enabled
+        if ttl_seconds is not None:
+            self.ttl_seconds = ttl_seconds
+        if max_entries is not None:
+            self.max_entries = max_entries
+        logger.info(
+            f"LLM 响应缓存: enabled={self.enabled}, "
+            f"ttl={self.ttl_seconds}s, max_entries={self.max_entries}"
+        )
+
+    # ------------------------------------------------------------------
+    # 缓存键
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def normalize_messages(messages: list[dict]) -> list[dict]:
+        """去掉首尾空白并合并连续空白，避免格式差异导致缓存未命中"""
+        return [
+            {
+                "role": message.get("role", "user"),
+                "content": _WHITESPACE_RE.sub(
+                    " ", str(message.get("content") or "")
+                ).strip(),
+            }
+            for message in messages
+        ]
+
+    def make_key(
+        self,
+        messages: list[dict],
+        pool: str,
+        models: list[str],
+        prompt_version: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> str:
+        payload = {
+            "messages": self.normalize_messages(messages),
+            "prompt_version": prompt_version,
+            "pool": pool,
+            "models": sorted(models),
+            "params": params or {},
+        }
+        raw = json.dumps(
+            payload, ensure_ascii=False, sort_keys=True, default=str
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        now = datetime.now()
+        with Session(db) as session:
+            row = session.execute(
+                select(
+                    LLMResponseCache.content, LLMResponseCache.expires_at
+                ).where(LLMResponseCache.cache_key == key)
+            ).first()
+        # 过期的记录留给 evict 删除
+        if row is None or (
+            row.expires_at is not None and row.expires_at <= now
+        ):
+            return None
+
+        with self._lock:
+            count, _ = self._pending_hits.get(key, (0, now))
+            self._pending_hits[key] = (count + 1, now)
+            should_flush = len(self._pending_hits) >= self.hit_flush_every
+        if should_flush:
+            self.flush_hits()
+        return row.content
+
+    def set(
+        self,
+        key: str,
+        content: str,
+        pool: str,
+        prompt_version: Optional[str] = None,
+    ):
+        now = datetime.now()
+        expires_at = (
+            now + timedelta(seconds=self.ttl_seconds)
+            if self.ttl_seconds
+            else None
+        )
+        with Session(db) as session:
+            session.merge(
+                LLMResponseCache(
+                    cache_key=key,
+                    pool=pool,
+                    prompt_version=prompt_version,
+                    content=content,
+                    hit_count=0,
+                    created_at=now,
+                    expires_at=expires_at,
+                    last_hit_at=now,
+                )
+            )
+            session.commit()
+
+        with self._lock:
+            self._writes += 1
+            should_evict = self._writes % self.evict_every == 0
+        if should_evict:
+            self.evict()
+
+    def flush_hits(self):
+        """把内存中累计的命中次数和最近命中时间写入数据库"""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        if not pending:
+            return
+        table = LLMResponseCache.__table__
+        try:
+            with Session(db) as session:
+                # 使用 Core 语句按主键批量更新（executemany）
+                session.connection().execute(
+                    update(table)
+                    .where(table.c.cache_key == bindparam("key"))
+                    .values(
+                        hit_count=table.c.hit_count + bindparam("hits"),
+                        last_hit_at=bindparam("hit_at"),
+                    ),
+                    [
+                        {"key": key, "hits": hits, "hit_at": hit_at}
+                        for key, (hits, hit_at) in pending.items()
+                    ],
+                )
+                session.commit()
+        except Exception:
+            logger.exception("写入 LLM 响应缓存命中记录失败")
+
+    def evict(self) -> int:
+        """删除过期记录，并在超出容量时淘汰最久未命中的记录"""
+        # 先写入命中记录，避免刚命中的记录按旧的命中时间被淘汰
+        self.flush_hits()
+        with Session(db) as session:
+            removed = session.execute(
+                delete(LLMResponseCache).where(
+                    LLMResponseCache.expires_at <= datetime.now()
+                )
+            ).rowcount
+            # 超出容量时找到第 max_entries 新的记录，删除比它更旧的记录
+            cutoff = session.execute(
+                select(LLMResponseCache.last_hit_at)
+                .order_by(LLMResponseCache.last_hit_at.desc())
+                .offset(self.max_entries)
+                .limit(1)
+            ).scalar()
+            if cutoff is not None:
+                removed += session.execute(
+                    delete(LLMResponseCache).where(
+                        LLMResponseCache.last_hit_at <= cutoff
+                    )
+                ).rowcount
+            session.commit()
+        if removed:
+            logger.info(f"LLM 响应缓存淘汰 {removed} 条记录")
+        return removed
+
+    def _safe_get(self, key: str, pool: str) -> Optional[str]:
+        try:
+            return self.get(key)
+        except Exception:
+            self._stats[pool].errors += 1
+            logger.exception("读取 LLM 响应缓存失败")
+            return None
+
+    def _safe_set(
+        self, key: str, content: str, pool: str, prompt_version: Optional[str]
+    ):
+        try:
+            self.set(key, content, pool, prompt_version)
+        except Exception:
+            self._stats[pool].errors += 1
+            logger.exception("写入 LLM 响应缓存失败")
+
+    # ------------------------------------------------------------------
+    # 带合并的调用
+    # ------------------------------------------------------------------
+
+    async def aget_or_call(
+        self,
+        key: str,
+        pool: str,
+        call: Callable[[], Awaitable[str]],
+        prompt_version: Optional[str] = None,
+    ) -> str:
+        """命中缓存时直接返回，否则调用 call 并写入缓存"""
+        cached = await asyncio.to_thread(self._safe_get, key, pool)
+        if cached is not None:
+            self._stats[pool].hits += 1
+            return cached
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (id(loop), key)
+        future = self._async_inflight.get(inflight_key)
+        if future is not None:
+            self._stats[pool].coalesced += 1
+            return await asyncio.shield(future)
+
+        self._stats[pool].misses += 1
+        future = loop.create_future()
+        self._async_inflight[inflight_key] = future
+        try:
+            content = await call()
+            # 先唤醒等待者再写入缓存，写入期间的相同请求仍合并到该结果
+            future.set_result(content)
+            if content is not None:
+                await asyncio.to_thread(
+                    self._safe_set, key, content, pool, prompt_version
+                )
+            return content
+        except BaseException as e:
+            if future.done():
+                raise
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._async_inflight.pop(inflight_key, None)
+
+    def get_or_call(
+        self,
+        key: str,
+        pool: str,
+        call: Callable[[], str],
+        prompt_version: Optional[str] = None,
+    ) -> str:
+        """同步版本，跨线程合并相同的请求"""
+        cached = self._safe_get(key, pool)
+        if cached is not None:
+            self._stats[pool].hits += 1
+            return cached
+
+        with self._lock:
+            inflight = self._sync_inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = _InFlight()
+                self._sync_inflight[key] = inflight
+
+        if not leader:
+            self._stats[pool].coalesced += 1
+            inflight.event.wait()
+            if inflight.content is not None:
+                return inflight.content
+            # 首个请求失败时各自重试
+            return call()
+
+        self._stats[pool].misses += 1
+        try:
+            inflight.content = call()
+            if inflight.content is not None:
+                self._safe_set(key, inflight.content, pool, prompt_version)
+            return inflight.content
+        finally:
+            with self._lock:
+                self._sync_inflight.pop(key, None)
+            inflight.event.set()
+
+    def get_stats(self, pool: str) -> dict[str, Any]:
+        return {"enabled": self.enabled, **self._stats[pool].to_dict()}
+
+
+# 创建全局实例
+response_cache = ResponseCache()
@@ -1,6 +1,9 @@
 import logging
 from typing import Optional
 
+from .call_log import call_logger
+from .cascade import CascadeLLM, cascade_stats
+from .config_watcher import ConfigWatcher
 from .pool_config_manager import pool_config_manager
 from .pool_manager import LiteLLMRouterWrapper, pool_manager
 
@@ -12,6 +15,9 @@ class UnifiedLLMManager:
 
     def __init__(self):
         self.initialized = False
+        self.config_watcher = ConfigWatcher(
+            pool_config_manager.config_file_path, self.reload_config
+        )
 
     def initialize(self):
         """初始化管理器"""
@@ -33,7 +39,7 @@ class UnifiedLLMManager:
     def get_llm(
         self,
         node_name: Optional[str] = None,
-    ) -> LiteLLMRouterWrapper:
+    ) -> LiteLLMRouterWrapper | CascadeLLM:
         """
         获取LLM实例
 
@@ -101,20 +107,26 @@ class UnifiedLLMManager:
         return {
             "pools": pool_manager.list_pools(),
             "mapping": pool_manager.get_pool_mapping(),
+            "cascades": cascade_stats.get_stats(),
+            "calls": call_logger.get_stats(),
         }
 
-    def reload_config(self):
-        """重新加载配置"""
-        logger.info("重新加载池配置...")
+    def reload_config(self) -> bool:
+        """
+        重新加载配置
 
-        # 清空池配置
-        pool_manager.clear_all()
+        新的池全部构建成功后整体替换，重新加载期间获取模型的调用不受影响；
+        配置文件有误时保留当前配置。
+        """
+        logger.info("重新加载池配置...")
 
-        # 重新初始化
-        self.initialized = False
-        self.initialize()
+        if not pool_config_manager.load_from_file():
+            logger.error("重新加载池配置失败，继续使用当前配置")
+            return False
 
+        self.initialized = True
         logger.info("配置重新加载完成")
+        return True
 
 
 # 创建全局实例
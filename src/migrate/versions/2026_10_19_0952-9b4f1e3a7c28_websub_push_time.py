@@ -0,0 +1,37 @@
+"""websub push time
+
+Revision ID: 9b4f1e3a7c28
+Revises: 5d2e8b7c41f6
+Create Date: 2026-10-19 09:52:37.604115
+
+"""
+
+# isort: skip_file
+from typing import Union
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b4f1e3a7c28"
+down_revision: Union[str, None] = "5d2e8b7c41f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("websub_subscription", schema=None) as batch_op:
+        batch_op.alter_column("last_seen_at", new_column_name="last_push_at")
+        batch_op.add_column(
+            sa.Column("last_polled_at", sa.DateTime(), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("websub_subscription", schema=None) as batch_op:
+        batch_op.drop_column("last_polled_at")
+        batch_op.alter_column("last_push_at", new_column_name="last_seen_at")
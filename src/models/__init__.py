@@ -1,20 +1,33 @@
 from .base import Base
 from .db import db, get_db, get_db_url
 from .entry_summary import EntrySummary
+from .html_snapshot import CompressionDict, HtmlSnapshot
+from .llm_batch_job import LLMBatchJob
+from .llm_cache import LLMResponseCache
+from .llm_call_log import LLMCallLog
+from .preclassify import PreclassifierPrediction
 from .rss_entry import RssEntry
 from .rss_feed import RssFeed
 from .score import EntryScore
 from .tags import Category, EntryCategory
+from .websub import WebSubSubscription
 from .week_report import WeekReport
 
 __all__ = [
     "Base",
     "Category",
+    "CompressionDict",
     "EntryCategory",
     "EntryScore",
     "EntrySummary",
+    "HtmlSnapshot",
+    "LLMBatchJob",
+    "LLMCallLog",
+    "LLMResponseCache",
+    "PreclassifierPrediction",
     "RssEntry",
     "RssFeed",
+    "WebSubSubscription",
     "WeekReport",
     "db",
     "get_db",
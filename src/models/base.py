@@ -1,5 +1,28 @@
+from typing import Optional
+
+from sqlalchemy import String, orm
 from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(DeclarativeBase):
     pass
+
+
+class ResultLineage:
+    """
+    LLM 结果的来源，用于判断结果是否需要重新计算。
+    - prompt_hash: 产生结果的提示词模板哈希
+    - model_id: 产生结果的模型池中的模型
+    - content_hash: 产生结果时条目正文的哈希
+    规则过滤、预分类器写入的结果和引入该字段之前的结果为空。
+    """
+
+    prompt_hash: orm.Mapped[Optional[str]] = orm.mapped_column(
+        String(64), nullable=True
+    )
+    model_id: orm.Mapped[Optional[str]] = orm.mapped_column(
+        String(255), nullable=True
+    )
+    content_hash: orm.Mapped[Optional[str]] = orm.mapped_column(
+        String(64), nullable=True
+    )
@@ -2,10 +2,10 @@ from datetime import datetime
 
 from sqlalchemy import Integer, String, UniqueConstraint, orm
 
-from src.models.base import Base
+from src.models.base import Base, ResultLineage
 
 
-class EntrySummary(Base):
+class EntrySummary(ResultLineage, Base):
     __tablename__ = "entry_summary"
     id: orm.Mapped[int] = orm.mapped_column(primary_key=True)
     entry_id: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=False)
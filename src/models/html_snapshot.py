@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    DateTime,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+    orm,
+)
+
+from .base import Base
+
+
+class HtmlSnapshot(Base):
+    """
+    抓取到的原始 HTML 快照，用于离线重新提取正文。
+    主要字段包括：
+    - canonical_url: 规范化后的文章 URL
+    - domain: 所属域名，用于选择压缩字典
+    - fetched_at: 抓取时间
+    - codec: 压缩算法（zstd 或 zlib）
+    - dict_id: 压缩时使用的字典 ID，为空表示未使用字典
+    - raw_size: 压缩前的字节数
+    - content: 压缩后的 HTML
+    """
+
+    __tablename__ = "html_snapshot"
+    id: orm.Mapped[int] = orm.mapped_column(
+        primary_key=True, autoincrement=True
+    )
+    canonical_url: orm.Mapped[str] = orm.mapped_column(
+        String(1024), nullable=False
+    )
+    domain: orm.Mapped[str] = orm.mapped_column(String(255), nullable=False)
+    fetched_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=False, default=datetime.now
+    )
+    codec: orm.Mapped[str] = orm.mapped_column(String(16), nullable=False)
+    dict_id: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=True)
+    raw_size: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=False)
+    content: orm.Mapped[bytes] = orm.mapped_column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "canonical_url", "fetched_at", name="unique_html_snapshot_url_time"
+        ),
+        Index("idx_html_snapshot_domain", "domain"),
+    )
+
+
+class CompressionDict(Base):
+    """
+    按域名训练的压缩字典，字典一经写入不再修改，旧快照始终引用训练时的字典。
+    """
+
+    __tablename__ = "compression_dict"
+    id: orm.Mapped[int] = orm.mapped_column(
+        primary_key=True, autoincrement=True
+    )
+    domain: orm.Mapped[str] = orm.mapped_column(String(255), nullable=False)
+    codec: orm.Mapped[str] = orm.mapped_column(String(16), nullable=False)
+    sample_count: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=False)
+    data: orm.Mapped[bytes] = orm.mapped_column(LargeBinary, nullable=False)
+    created_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=False, default=datetime.now
+    )
+
+    __table_args__ = (Index("idx_compression_dict_domain", "domain"),)
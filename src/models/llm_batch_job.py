@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from sqlalchemy import TEXT, DateTime, Index, Integer, String, orm
+
+from .base import Base
+
+
+class LLMBatchJob(Base):
+    """
+    提交到批量 API 的回填任务。
+    主要字段包括：
+    - batch_id: 批量 API 返回的任务 id
+    - node: 任务对应的节点，tagger 或 score
+    - pool / model: 提交任务时使用的模型池和模型
+    - entry_ids: 任务包含的条目 id（JSON 数组），用于统计每个条目的尝试次数
+    - status: 批量 API 的任务状态，结果写入后为 ingested，模型池已不存在时为
+      orphaned
+    - succeeded / failed: 写入成功和失败的条目数
+    """
+
+    __tablename__ = "llm_batch_jobs"
+    id: orm.Mapped[int] = orm.mapped_column(
+        primary_key=True, autoincrement=True
+    )
+    batch_id: orm.Mapped[str] = orm.mapped_column(
+        String(255), nullable=False, unique=True
+    )
+    node: orm.Mapped[str] = orm.mapped_column(String(64), nullable=False)
+    pool: orm.Mapped[str] = orm.mapped_column(String(255), nullable=False)
+    model: orm.Mapped[str] = orm.mapped_column(String(255), nullable=False)
+    input_file_id: orm.Mapped[str] = orm.mapped_column(
+        String(255), nullable=False
+    )
+    output_file_id: orm.Mapped[str] = orm.mapped_column(
+        String(255), nullable=True
+    )
+    error_file_id: orm.Mapped[str] = orm.mapped_column(
+        String(255), nullable=True
+    )
+    entry_ids: orm.Mapped[str] = orm.mapped_column(TEXT, nullable=False)
+    status: orm.Mapped[str] = orm.mapped_column(String(32), nullable=False)
+    succeeded: orm.Mapped[int] = orm.mapped_column(
+        Integer(), nullable=False, default=0
+    )
+    failed: orm.Mapped[int] = orm.mapped_column(
+        Integer(), nullable=False, default=0
+    )
+    created_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=False, default=datetime.now
+    )
+    completed_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=True
+    )
+
+    __table_args__ = (Index("idx_llm_batch_jobs_status", "status"),)
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from sqlalchemy import TEXT, DateTime, Index, Integer, String, orm
+
+from .base import Base
+
+
+class LLMResponseCache(Base):
+    """
+    LLM 响应缓存。
+    主要字段包括：
+    - cache_key: 规范化消息、提示词版本、池和模型组合后的 sha256
+    - pool: 发起调用的模型池
+    - prompt_version: 提示词模板版本
+    - content: 模型返回的内容
+    - expires_at: 过期时间，为空表示不过期
+    - last_hit_at: 最近一次命中时间，超出容量时优先淘汰最久未命中的记录
+    """
+
+    __tablename__ = "llm_response_cache"
+    cache_key: orm.Mapped[str] = orm.mapped_column(String(64), primary_key=True)
+    pool: orm.Mapped[str] = orm.mapped_column(String(255), nullable=False)
+    prompt_version: orm.Mapped[str] = orm.mapped_column(
+        String(64), nullable=True
+    )
+    content: orm.Mapped[str] = orm.mapped_column(TEXT, nullable=False)
+    hit_count: orm.Mapped[int] = orm.mapped_column(
+        Integer(), nullable=False, default=0
+    )
+    created_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=False, default=datetime.now
+    )
+    expires_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=True
+    )
+    last_hit_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=False, default=datetime.now
+    )
+
+    __table_args__ = (
+        Index("idx_llm_response_cache_expires_at", "expires_at"),
+        Index("idx_llm_response_cache_last_hit_at", "last_hit_at"),
+    )
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Index, Integer, String, orm
+
+from .base import Base
+
+
+class LLMCallLog(Base):
+    """
+    LLM 调用记录。
+    主要字段包括：
+    - node / pool: 发起调用的节点和模型池
+    - entry_id: 调用对应的条目，批量调用等没有单一条目时为空
+    - deployment: Router 实际选中的部署
+    - prompt_tokens / completion_tokens / cached_tokens: 响应中的 token 用量
+    - input_tokens_original / input_tokens_sent: 条目内容预处理前和实际发送的
+      token 数，用于衡量输入压缩的效果，不经过预处理的调用为空
+    - latency_ms: 调用耗时，包括 Router 内部的重试
+    - retries: Router 内部的重试次数
+    - cost: litellm 按模型价格估算的费用（美元），未知模型为空
+    - status: success 或 error
+    """
+
+    __tablename__ = "llm_call_log"
+    id: orm.Mapped[int] = orm.mapped_column(
+        primary_key=True, autoincrement=True
+    )
+    node: orm.Mapped[str] = orm.mapped_column(String(64), nullable=True)
+    pool: orm.Mapped[str] = orm.mapped_column(String(255), nullable=False)
+    entry_id: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=True)
+    prompt_version: orm.Mapped[str] = orm.mapped_column(
+        String(64), nullable=True
+    )
+    deployment: orm.Mapped[str] = orm.mapped_column(String(255), nullable=True)
+    prompt_tokens: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=True)
+    completion_tokens: orm.Mapped[int] = orm.mapped_column(
+        Integer(), nullable=True
+    )
+    cached_tokens: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=True)
+    input_tokens_original: orm.Mapped[int] = orm.mapped_column(
+        Integer(), nullable=True
+    )
+    input_tokens_sent: orm.Mapped[int] = orm.mapped_column(
+        Integer(), nullable=True
+    )
+    latency_ms: orm.Mapped[float] = orm.mapped_column(Float(), nullable=False)
+    retries: orm.Mapped[int] = orm.mapped_column(
+        Integer(), nullable=False, default=0
+    )
+    cost: orm.Mapped[float] = orm.mapped_column(Float(), nullable=True)
+    status: orm.Mapped[str] = orm.mapped_column(String(16), nullable=False)
+    error: orm.Mapped[str] = orm.mapped_column(String(255), nullable=True)
+    created_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=False, default=datetime.now
+    )
+
+    __table_args__ = (
+        Index("idx_llm_call_log_created_at", "created_at"),
+        Index("idx_llm_call_log_entry_id", "entry_id"),
+    )
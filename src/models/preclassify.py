@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    orm,
+)
+
+from .base import Base
+
+
+class PreclassifierPrediction(Base):
+    """
+    本地预分类器的预测记录。
+    主要字段包括：
+    - target: 预测的目标，category 或 score
+    - label: 预测的标签
+    - confidence: 近邻投票得到的置信度
+    - applied: 是否直接写入了结果，未写入的条目由 LLM 处理，用于统计一致率
+    """
+
+    __tablename__ = "preclassifier_predictions"
+    id: orm.Mapped[int] = orm.mapped_column(
+        primary_key=True, autoincrement=True
+    )
+    entry_id: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=False)
+    target: orm.Mapped[str] = orm.mapped_column(String(16), nullable=False)
+    label: orm.Mapped[str] = orm.mapped_column(String(25), nullable=False)
+    confidence: orm.Mapped[float] = orm.mapped_column(Float(), nullable=False)
+    applied: orm.Mapped[bool] = orm.mapped_column(
+        Boolean(), nullable=False, default=False
+    )
+    created_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=False, default=datetime.now
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "entry_id", "target", name="uq_preclassifier_entry_target"
+        ),
+        Index("idx_preclassifier_predictions_target", "target"),
+    )
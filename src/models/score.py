@@ -3,7 +3,7 @@ from enum import StrEnum
 
 from sqlalchemy import DateTime, Index, Integer, String, orm
 
-from .base import Base
+from .base import Base, ResultLineage
 
 
 class Score(StrEnum):
@@ -12,13 +12,14 @@ class Score(StrEnum):
     SYSTEMATIC = "systematic"
 
 
-class EntryScore(Base):
+class EntryScore(ResultLineage, Base):
     __tablename__ = "entry_scores"
     id: orm.Mapped[int] = orm.mapped_column(
         primary_key=True, autoincrement=True
     )
     entry_id: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=False)
     score: orm.Mapped[str] = orm.mapped_column(String(25), nullable=False)
+    reason: orm.Mapped[str] = orm.mapped_column(String(255), nullable=True)
     created_at: orm.Mapped[datetime] = orm.mapped_column(
         DateTime(), nullable=False, default=datetime.now
     )
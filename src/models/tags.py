@@ -8,7 +8,7 @@ from sqlalchemy import (
     orm,
 )
 
-from .base import Base
+from .base import Base, ResultLineage
 
 
 class Category(IntEnum):
@@ -30,7 +30,7 @@ class Category(IntEnum):
             raise ValueError(f"Invalid category: {value}")
 
 
-class EntryCategory(Base):
+class EntryCategory(ResultLineage, Base):
     __tablename__ = "entry_category"
     id: orm.Mapped[int] = orm.mapped_column(
         primary_key=True, autoincrement=True
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, orm
+
+from .base import Base
+
+
+class WebSubSubscription(Base):
+    """
+    WebSub 订阅记录，每个数据源一条。
+    主要字段包括：
+    - source_url: 配置中的数据源 URL
+    - topic: hub 上订阅的 topic，取 feed 中声明的 self 链接
+    - hub: feed 声明的 hub 地址，为空表示该 feed 不支持 WebSub
+    - callback_token: 回调地址中的随机标识
+    - secret: 推送内容 HMAC 签名使用的密钥
+    - state: unsupported / pending / active / denied
+    - expires_at: 租约到期时间（naive UTC）
+    - last_push_at: 最近一次收到推送的时间，用于决定是否回退轮询
+    - last_polled_at: 最近一次回退轮询的时间
+    - checked_at: 最近一次发现 hub 或发起订阅的时间
+    """
+
+    __tablename__ = "websub_subscription"
+    id: orm.Mapped[int] = orm.mapped_column(
+        primary_key=True, autoincrement=True
+    )
+    source_url: orm.Mapped[str] = orm.mapped_column(
+        String(1024), nullable=False, unique=True
+    )
+    topic: orm.Mapped[str] = orm.mapped_column(String(1024), nullable=True)
+    hub: orm.Mapped[str] = orm.mapped_column(String(1024), nullable=True)
+    callback_token: orm.Mapped[str] = orm.mapped_column(
+        String(64), nullable=False, unique=True
+    )
+    secret: orm.Mapped[str] = orm.mapped_column(String(64), nullable=False)
+    state: orm.Mapped[str] = orm.mapped_column(String(16), nullable=False)
+    lease_seconds: orm.Mapped[int] = orm.mapped_column(Integer(), nullable=True)
+    expires_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=True
+    )
+    last_push_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=True
+    )
+    last_polled_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=True
+    )
+    checked_at: orm.Mapped[datetime] = orm.mapped_column(
+        DateTime(), nullable=False
+    )
@@ -0,0 +1,406 @@
+import logging
+import os
+import random
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from src.config import config
+from src.graph._utils import upsert_record
+from src.graph.input_prep import clean_content
+from src.models.preclassify import PreclassifierPrediction
+from src.models.rss_entry import RssEntry
+from src.models.score import EntryScore, Score
+from src.models.tags import EntryCategory
+
+logger = logging.getLogger(__name__)
+
+PRECLASSIFIER_PATH = "data/preclassifier.npz"
+EMBED_MODEL = "moka-ai/m3e-base"
+# 参与编码的正文长度，标题和开头部分足以区分类别
+EMBED_MAX_CHARS = 2000
+
+TARGETS = ("category", "score")
+REASON_PREFIX = "preclassifier"
+
+
+@dataclass
+class Prediction:
+    label: str
+    confidence: float
+
+
+def _entry_text(entry: RssEntry) -> str:
+    content = clean_content(entry.content or "")[:EMBED_MAX_CHARS]
+    return f"{entry.title or ''}\n{content}"
+
+
+class PreClassifier:
+    """
+    基于句向量 kNN 的本地预分类器
+
+    训练数据来自 LLM 写入的 entry_category 和 entry_scores，向量和标签保存在
+    npz 文件中，每次训练只为新增的条目计算向量。预测时取余弦相似度最高的 k 个
+    近邻按相似度加权投票，得票占比即置信度。
+
+    置信度达到阈值时直接写入结果，但仍按 sample_rate 抽样交给 LLM，所有未直接
+    写入的预测都会与 LLM 的结果对比，用于调整阈值。评分只直接写入 noise，其他
+    评分还需要 LLM 生成摘要。
+
+    Args:
+        path: 向量和标签的保存路径
+        k: 近邻数量
+        threshold: 直接写入结果的置信度阈值
+        sample_rate: 置信度达到阈值时仍交给 LLM 的比例
+        min_samples: 某个目标的训练样本少于该数量时不做预测
+        embed: 文本编码函数，返回归一化的向量，默认使用 SentenceTransformer
+    """
+
+    def __init__(
+        self,
+        path: str = PRECLASSIFIER_PATH,
+        k: int = 10,
+        threshold: float = 0.9,
+        sample_rate: float = 0.1,
+        min_samples: int = 200,
+        embed: Optional[Callable[[list[str]], np.ndarray]] = None,
+    ):
+        self.path = path
+        self.k = k
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.min_samples = min_samples
+        self._embed_fn = embed
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.labels = {target: np.array([], dtype=str) for target in TARGETS}
+        self._loaded = False
+
+    # ------------------------------------------------------------------
+    # 向量与存储
+    # ------------------------------------------------------------------
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if self._embed_fn is None:
+            from sentence_transformers import SentenceTransformer
+
+            model = SentenceTransformer(EMBED_MODEL)
+            self._embed_fn = lambda batch: model.encode(
+                batch, normalize_embeddings=True, show_progress_bar=False
+            )
+        return np.asarray(self._embed_fn(texts), dtype=np.float32)
+
+    def load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        data = np.load(self.path)
+        self.ids = data["ids"]
+        self.vectors = data["vectors"]
+        self.labels = {target: data[target] for target in TARGETS}
+        logger.info(f"加载预分类器: {len(self.ids)} 条样本")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, ids=self.ids, vectors=self.vectors, **self.labels)
+        os.replace(tmp_path, self.path)
+
+    def sample_count(self, target: str) -> int:
+        return int(np.count_nonzero(self.labels[target] != ""))
+
+    # ------------------------------------------------------------------
+    # 训练
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _llm_labels(session: Session) -> dict[str, dict[int, str]]:
+        """读取由 LLM 写入的标签，排除规则过滤和预分类器自己写入的结果"""
+        applied = {
+            (entry_id, target)
+            for entry_id, target in session.query(
+                PreclassifierPrediction.entry_id, PreclassifierPrediction.target
+            ).filter(PreclassifierPrediction.applied.is_(True))
+        }
+        categories = {
+            entry_id: category
+            for entry_id, category in session.query(
+                EntryCategory.entry_id, EntryCategory.category
+            )
+            if (entry_id, "category") not in applied
+        }
+        scores = {
+            entry_id: score
+            for entry_id, score in session.query(
+                EntryScore.entry_id, EntryScore.score
+            ).filter(EntryScore.reason.is_(None))
+            if (entry_id, "score") not in applied
+        }
+        return {"category": categories, "score": scores}
+
+    def train(self, session: Session, batch_size: int = 64) -> int:
+        """
+        增量训练：刷新已有样本的标签，只为新增的条目计算向量
+
+        Returns:
+            int: 新增的样本数
+        """
+        self.load()
+        labels = self._llm_labels(session)
+        labelled_ids = set(labels["category"]) | set(labels["score"])
+        known = set(self.ids.tolist())
+        new_ids = sorted(labelled_ids - known)
+
+        vectors = [self.vectors] if len(self.ids) else []
+        ids = [self.ids] if len(self.ids) else []
+        for start in range(0, len(new_ids), batch_size):
+            chunk = new_ids[start : start + batch_size]
+            entries = (
+                session.query(RssEntry).filter(RssEntry.id.in_(chunk)).all()
+            )
+            if not entries:
+                continue
+            vectors.append(self.embed([_entry_text(e) for e in entries]))
+            ids.append(np.array([e.id for e in entries], dtype=np.int64))
+
+        if ids:
+            self.ids = np.concatenate(ids)
+            self.vectors = np.concatenate(vectors)
+        self.labels = {
+            target: np.array(
+                [labels[target].get(int(i), "") for i in self.ids],
+                dtype=str,
+            )
+            for target in TARGETS
+        }
+        self.save()
+        added = len(self.ids) - len(known)
+        logger.info(
+            f"预分类器训练完成: 新增 {added} 条，分类样本 "
+            f"{self.sample_count('category')}，评分样本 "
+            f"{self.sample_count('score')}"
+        )
+        return added
+
+    # ------------------------------------------------------------------
+    # 预测
+    # ------------------------------------------------------------------
+
+    def predict(self, vectors: np.ndarray, target: str) -> list[Prediction]:
+        """按相似度加权的 kNN 投票，返回每个向量的标签和置信度"""
+        mask = self.labels[target] != ""
+        if not mask.any() or len(vectors) == 0:
+            return []
+        labels = self.labels[target][mask]
+        similarities = vectors @ self.vectors[mask].T
+        k = min(self.k, similarities.shape[1])
+        neighbours = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+
+        predictions = []
+        for row, indices in enumerate(neighbours):
+            votes: dict[str, float] = {}
+            for i in indices:
+                weight = max(float(similarities[row, i]), 0.0)
+                votes[labels[i]] = votes.get(labels[i], 0.0) + weight
+            total = sum(votes.values())
+            label = max(votes, key=votes.get)
+            confidence = votes[label] / total if total else 0.0
+            predictions.append(Prediction(label, round(confidence, 4)))
+        return predictions
+
+    def _should_apply(self, prediction: Prediction, target: str) -> bool:
+        if prediction.confidence < self.threshold:
+            return False
+        if target == "score" and prediction.label != Score.NOISE:
+            return False
+        # 抽样交给 LLM，用于统计高置信度预测的一致率
+        return random.random() >= self.sample_rate
+
+    def _record(
+        self,
+        session: Session,
+        entry_id: int,
+        target: str,
+        prediction: Prediction,
+        applied: bool,
+    ):
+        upsert_record(
+            session=session,
+            model_class=PreclassifierPrediction,
+            filter_kwargs={"entry_id": entry_id, "target": target},
+            update_kwargs={
+                "label": prediction.label,
+                "confidence": prediction.confidence,
+                "applied": applied,
+            },
+        )
+
+    def run(self, session: Session, entries: list[RssEntry]) -> dict[str, int]:
+        """
+        对尚未分类或评分的条目进行预测，置信度足够时直接写入结果
+
+        Returns:
+            dict: 各目标直接写入的条目数
+        """
+        self.load()
+        applied = dict.fromkeys(TARGETS, 0)
+        category_ready = self.sample_count("category") >= self.min_samples
+        score_ready = self.sample_count("score") >= self.min_samples
+        # 样本不足时不做预测，也不必编码条目
+        if not entries or not (category_ready or score_ready):
+            return applied
+
+        entry_ids = [entry.id for entry in entries]
+        categories = dict(
+            session.query(
+                EntryCategory.entry_id, EntryCategory.category
+            ).filter(EntryCategory.entry_id.in_(entry_ids))
+        )
+        scored = {
+            entry_id
+            for (entry_id,) in session.query(EntryScore.entry_id).filter(
+                EntryScore.entry_id.in_(entry_ids)
+            )
+        }
+
+        def needs_vector(entry: RssEntry) -> bool:
+            if entry.id in scored:
+                return False
+            if entry.id not in categories:
+                # 没有分类的条目要先预测出分类，才可能继续预测评分
+                return category_ready
+            return score_ready and categories[entry.id] != "other"
+
+        pending = [entry for entry in entries if needs_vector(entry)]
+        if not pending:
+            return applied
+        vectors = dict(
+            zip(
+                [entry.id for entry in pending],
+                self.embed([_entry_text(entry) for entry in pending]),
+            )
+        )
+
+        if category_ready:
+            to_tag = [e.id for e in pending if e.id not in categories]
+            predictions = self.predict(
+                np.array([vectors[i] for i in to_tag]), "category"
+            )
+            for entry_id, prediction in zip(to_tag, predictions):
+                apply = self._should_apply(prediction, "category")
+                self._record(session, entry_id, "category", prediction, apply)
+                if apply:
+                    upsert_record(
+                        session=session,
+                        model_class=EntryCategory,
+                        filter_kwargs={"entry_id": entry_id},
+                        update_kwargs={
+                            "category": prediction.label,
+                            "reason": f"{REASON_PREFIX}: "
+                            f"{prediction.confidence:.2f}",
+                        },
+                    )
+                    categories[entry_id] = prediction.label
+                    applied["category"] += 1
+
+        if score_ready:
+            to_score = [
+                e.id
+                for e in pending
+                if e.id in categories and categories[e.id] != "other"
+            ]
+            predictions = self.predict(
+                np.array([vectors[i] for i in to_score]), "score"
+            )
+            for entry_id, prediction in zip(to_score, predictions):
+                apply = self._should_apply(prediction, "score")
+                self._record(session, entry_id, "score", prediction, apply)
+                if apply:
+                    upsert_record(
+                        session=session,
+                        model_class=EntryScore,
+                        filter_kwargs={"entry_id": entry_id},
+                        update_kwargs={
+                            "score": Score.NOISE,
+                            "reason": f"{REASON_PREFIX}: "
+                            f"{prediction.confidence:.2f}",
+                        },
+                    )
+                    applied["score"] += 1
+
+        session.commit()
+        logger.info(
+            f"预分类器直接写入: 分类 {applied['category']} 条，"
+            f"噪音 {applied['score']} 条"
+        )
+        return applied
+
+    # ------------------------------------------------------------------
+    # 一致率统计
+    # ------------------------------------------------------------------
+
+    def agreement_report(
+        self,
+        session: Session,
+        thresholds: Iterable[float] = (0.6, 0.7, 0.8, 0.9, 0.95),
+    ) -> dict[str, list[dict]]:
+        """
+        对比未直接写入的预测和 LLM 的结果
+
+        每个阈值给出置信度达到阈值的预测占比（即可以节省的调用比例）以及
+        其中与 LLM 结果一致的比例。
+        """
+        actual = {
+            "category": dict(
+                session.query(EntryCategory.entry_id, EntryCategory.category)
+            ),
+            "score": dict(
+                session.query(EntryScore.entry_id, EntryScore.score).filter(
+                    EntryScore.reason.is_(None)
+                )
+            ),
+        }
+        report: dict[str, list[dict]] = {}
+        for target in TARGETS:
+            predictions = session.query(PreclassifierPrediction).filter(
+                PreclassifierPrediction.target == target,
+                PreclassifierPrediction.applied.is_(False),
+            )
+            rows = [
+                (p.confidence, p.label == actual[target][p.entry_id])
+                for p in predictions
+                if p.entry_id in actual[target]
+            ]
+            report[target] = []
+            for threshold in thresholds:
+                confident = [agree for conf, agree in rows if conf >= threshold]
+                report[target].append(
+                    {
+                        "threshold": threshold,
+                        "compared": len(rows),
+                        "coverage": (
+                            round(len(confident) / len(rows), 4)
+                            if rows
+                            else None
+                        ),
+                        "agreement": (
+                            round(sum(confident) / len(confident), 4)
+                            if confident
+                            else None
+                        ),
+                    }
+                )
+        return report
+
+
+# 创建全局实例
+preclassifier = PreClassifier(
+    threshold=config.PRECLASSIFIER_THRESHOLD,
+    sample_rate=config.PRECLASSIFIER_SAMPLE_RATE,
+    min_samples=config.PRECLASSIFIER_MIN_SAMPLES,
+)
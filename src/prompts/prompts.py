@@ -1,6 +1,56 @@
+import hashlib
 from typing import Optional
 
-from .templates import scorer_prompt, tagger_prompt, tagger_review_prompt
+from src.models.score import Score
+
+from .templates import (
+    chunk_summary_prompt,
+    classify_score_prompt,
+    scorer_batch_prompt,
+    scorer_prompt,
+    tagger_batch_prompt,
+    tagger_prompt,
+    tagger_review_prompt,
+)
+
+# 分类提示词约定的分类名称，解析和校验模型输出时使用
+VALID_CATEGORIES = {"tech", "business", "experience", "aggregation", "other"}
+
+# 评分提示词约定的标签，与数据库中的 Score 取值一致
+VALID_SCORES = {score.value for score in Score}
+
+# 提示词模板版本，修改模板时递增以使 LLM 响应缓存失效
+PROMPT_VERSIONS = {
+    "tagger": 1,
+    "tagger_batch": 1,
+    "tagger_review": 1,
+    "scorer": 1,
+    "scorer_batch": 1,
+    "classify_score": 1,
+    "chunk_summary": 1,
+}
+
+
+PROMPT_TEMPLATES = {
+    "tagger": tagger_prompt,
+    "tagger_batch": tagger_batch_prompt,
+    "tagger_review": tagger_review_prompt,
+    "scorer": scorer_prompt,
+    "scorer_batch": scorer_batch_prompt,
+    "classify_score": classify_score_prompt,
+    "chunk_summary": chunk_summary_prompt,
+}
+
+
+def get_prompt_version(prompt_name: str) -> str:
+    return f"{prompt_name}:v{PROMPT_VERSIONS[prompt_name]}"
+
+
+def get_prompt_hash(prompt_name: str) -> str:
+    """提示词模板内容的哈希，模板修改后即使没有递增版本号也会变化"""
+    return hashlib.sha256(
+        PROMPT_TEMPLATES[prompt_name].encode("utf-8")
+    ).hexdigest()[:16]
 
 
 def _model_specific_prompt(model_name: str | None) -> str:
@@ -14,17 +64,12 @@ def get_prompt(
     model_name: Optional[str] = None,
     **kwargs,
 ) -> list[dict]:
-    _model_prompt_map = {
-        "tagger": tagger_prompt,
-        "tagger_review": tagger_review_prompt,
-        "scorer": scorer_prompt,
-    }
-    if prompt_name not in _model_prompt_map:
+    if prompt_name not in PROMPT_TEMPLATES:
         raise ValueError(f"Prompt {prompt_name} not found")
     return [
         {
             "role": "system",
             "content": _model_specific_prompt(model_name).format(**kwargs)
-            + _model_prompt_map[prompt_name],
+            + PROMPT_TEMPLATES[prompt_name],
         }
     ]
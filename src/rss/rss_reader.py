@@ -80,22 +80,57 @@ class RssReader:
             if self.proxy:
                 proxies = {"http": self.proxy, "https": self.proxy}
                 response = requests.get(url, proxies=proxies, timeout=10)
-                self.feed = feedparser.parse(response.content)
+                return self._load(feedparser.parse(response.content))
             else:
-                self.feed = feedparser.parse(url)
+                return self._load(feedparser.parse(url))
+        except Exception as e:
+            logging.exception("解析RSS源时发生错误:")
+            return False
 
-            if self.feed.bozo:  # 检查是否有解析错误
-                logging.warning(f"解析警告: {self.feed.bozo_exception}")
+    def parse_content(self, content: bytes | str) -> bool:
+        """
+        解析已经获取到的 feed 内容，例如 WebSub 推送的 feed
 
-                return False
+        Args:
+            content: feed 的原始内容
 
-            self.entries = self.feed.entries
-            self.feed = self.feed.feed
-            return True
+        Returns:
+            bool: 解析是否成功
+        """
+        try:
+            return self._load(feedparser.parse(content))
         except Exception as e:
-            logging.exception("解析RSS源时发生错误:")
+            logging.exception("解析RSS内容时发生错误:")
             return False
 
+    def _load(self, parsed) -> bool:
+        if parsed.bozo:  # 检查是否有解析错误
+            logging.warning(f"解析警告: {parsed.bozo_exception}")
+
+            return False
+
+        self.entries = parsed.entries
+        self.feed = parsed.feed
+        return True
+
+    def get_websub_links(self) -> tuple[Optional[str], Optional[str]]:
+        """
+        获取 feed 中声明的 WebSub hub 和 self 链接
+
+        Returns:
+            tuple: (hub, self)，未声明时为 None
+        """
+        hub = topic = None
+        if not self.feed:
+            return hub, topic
+        for link in self.feed.get("links", []):
+            rel = link.get("rel")
+            if rel == "hub" and hub is None:
+                hub = link.get("href")
+            elif rel == "self" and topic is None:
+                topic = link.get("href")
+        return hub, topic
+
     def update_feed_info(
         self,
         property: Optional[str] = None,
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -10,25 +11,213 @@ import requests
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from src.config import config
+from src.crawl.archive import html_archive
 from src.crawl.crawl import WebExtractorConfig, scrape_multiple_websites
 from src.models import db
 from src.models.rss_entry import RssEntry
 from src.models.rss_feed import RssFeed
 from src.rss import RssReader
+from src.utils.text import count_words
 from src.utils.time import parse_feed_datetime
 
 logger = logging.getLogger(__name__)
 
 
+def _parse_delay_range(value) -> Optional[tuple[float, float]]:
+    """解析延迟区间，支持 [min, max]、"min-max" 和单个数值"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, list | tuple):
+        if len(value) != 2:
+            raise ValueError(f"invalid delay range: {value}")
+        return float(value[0]), float(value[1])
+    if isinstance(value, str) and "-" in value:
+        low, high = value.split("-", 1)
+        return float(low), float(high)
+    return float(value), float(value)
+
+
+class CrawlPolicy:
+    """
+    单个数据源的爬取策略
+
+    参数说明:
+    --------
+    mode : str, default="auto"
+        - auto: RSS 正文为空或字数少于 min_words 时爬取原文
+        - never: 从不爬取（全文输出的 feed），不会启动浏览器
+        - always: 总是爬取原文
+
+    min_words : int, default=0
+        auto 模式下触发爬取的正文字数下限，0 表示只在正文为空时爬取
+
+    tier : str, optional
+        爬取档位，对应 WebExtractorConfig 的 strict / balanced / fast 预设，
+        为空时使用默认配置
+
+    priority : int, default=0
+        数据源优先级，数值越大越先处理
+
+    concurrency : int, optional
+        覆盖档位的最大并发数
+
+    delay : tuple[float, float], optional
+        覆盖全局请求间隔区间（秒）
+
+    same_domain_delay : tuple[float, float], optional
+        覆盖同域名请求间隔区间（秒）
+    """
+
+    MODES = ("auto", "never", "always")
+    TIERS = ("strict", "balanced", "fast")
+
+    def __init__(
+        self,
+        mode: str = "auto",
+        min_words: int = 0,
+        tier: Optional[str] = None,
+        priority: int = 0,
+        concurrency: Optional[int] = None,
+        delay: Optional[tuple[float, float]] = None,
+        same_domain_delay: Optional[tuple[float, float]] = None,
+    ):
+        self.mode = mode
+        self.min_words = min_words
+        self.tier = tier
+        self.priority = priority
+        self.concurrency = concurrency
+        self.delay = delay
+        self.same_domain_delay = same_domain_delay
+
+        self._validate()
+
+    def _validate(self):
+        if self.mode not in self.MODES:
+            raise ValueError(
+                f"invalid crawl mode: {self.mode}, expected one of {self.MODES}"
+            )
+        if self.tier is not None and self.tier not in self.TIERS:
+            raise ValueError(
+                f"invalid crawl tier: {self.tier}, expected one of {self.TIERS}"
+            )
+        if self.min_words < 0:
+            raise ValueError("min_words must not be negative")
+        if self.concurrency is not None and self.concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+    def __str__(self) -> str:
+        return (
+            f"CrawlPolicy(mode={self.mode}, min_words={self.min_words}, "
+            f"tier={self.tier}, priority={self.priority})"
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "min_words": self.min_words,
+            "tier": self.tier,
+            "priority": self.priority,
+            "concurrency": self.concurrency,
+            "delay": list(self.delay) if self.delay else None,
+            "same_domain_delay": (
+                list(self.same_domain_delay) if self.same_domain_delay else None
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "CrawlPolicy":
+        if not data:
+            return cls()
+        return cls(
+            mode=data.get("mode", "auto"),
+            min_words=int(data.get("min_words", 0)),
+            tier=data.get("tier"),
+            priority=int(data.get("priority", 0)),
+            concurrency=(
+                int(data["concurrency"])
+                if data.get("concurrency") is not None
+                else None
+            ),
+            delay=_parse_delay_range(data.get("delay")),
+            same_domain_delay=_parse_delay_range(data.get("same_domain_delay")),
+        )
+
+    @classmethod
+    def from_xml_element(cls, element: ET.Element) -> "CrawlPolicy":
+        """从 OPML outline 的 crawl* 属性解析"""
+        return cls.from_dict(
+            {
+                "mode": element.get("crawlMode", "auto"),
+                "min_words": element.get("crawlMinWords", 0),
+                "tier": element.get("crawlTier"),
+                "priority": element.get("crawlPriority", 0),
+                "concurrency": element.get("crawlConcurrency"),
+                "delay": element.get("crawlDelay"),
+                "same_domain_delay": element.get("crawlSameDomainDelay"),
+            }
+        )
+
+    def should_crawl(self, entry: dict) -> bool:
+        """判断条目是否需要爬取原文"""
+        if self.mode == "never" or not entry.get("link"):
+            return False
+        if self.mode == "always":
+            return True
+        content = entry.get("content") or ""
+        if content.strip() == "":
+            return True
+        return count_words(content) < self.min_words
+
+    def build_extractor_config(
+        self, custom_delay_rule: Optional[callable] = None
+    ) -> WebExtractorConfig:
+        """根据档位和覆盖项生成爬虫配置"""
+        if self.tier == "strict":
+            base = WebExtractorConfig.create_strict_config()
+        elif self.tier == "balanced":
+            base = WebExtractorConfig.create_balanced_config()
+        elif self.tier == "fast":
+            base = WebExtractorConfig.create_fast_config()
+        else:
+            base = WebExtractorConfig(
+                use_anti_detection=True,
+                min_delay=1.0,
+                max_delay=3.0,
+                same_domain_min_delay=10.0,
+                same_domain_max_delay=20.0,
+                global_max_concurrent=2,
+            )
+
+        overrides = {"custom_delay_rule": custom_delay_rule}
+        if self.concurrency is not None:
+            overrides["global_max_concurrent"] = self.concurrency
+        if self.delay is not None:
+            overrides["min_delay"], overrides["max_delay"] = self.delay
+        if self.same_domain_delay is not None:
+            (
+                overrides["same_domain_min_delay"],
+                overrides["same_domain_max_delay"],
+            ) = self.same_domain_delay
+        return base.copy(**overrides)
+
+
 class Source:
     """
     Source for the RSS reader.
     """
 
-    def __init__(self, name: str, url: str, description: str):
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        description: str,
+        crawl_policy: Optional[CrawlPolicy] = None,
+    ):
         self.name = name
         self.url = url
         self.description = description
+        self.crawl_policy = crawl_policy or CrawlPolicy()
 
     def __str__(self):
         return f"{self.name} - {self.url}"
@@ -38,6 +227,7 @@ class Source:
             "name": self.name,
             "url": self.url,
             "description": self.description,
+            "crawl": self.crawl_policy.to_dict(),
         }
 
     @classmethod
@@ -46,6 +236,7 @@ class Source:
             name=data["name"],
             url=data["url"],
             description=data["description"],
+            crawl_policy=CrawlPolicy.from_dict(data.get("crawl")),
         )
 
     @classmethod
@@ -54,6 +245,7 @@ class Source:
             name=element.get("text"),
             url=element.get("xmlUrl"),
             description=element.get("title"),
+            crawl_policy=CrawlPolicy.from_xml_element(element),
         )
 
     def _get_or_insert_feed(self, feed_info: dict):
@@ -125,17 +317,12 @@ class Source:
         Returns:
             List[dict]: entries with crawled content
         """
-        # 提取所有URLs
-        urls: list[str] = []
-        for entry in entries:
-            # skip if content is not None
-            if "content" in entry:
-                content = entry["content"]
-                if content.strip() != "":
-                    continue
-            if "link" not in entry:
-                continue
-            urls.append(entry["link"])
+        # 根据数据源的爬取策略筛选需要爬取的URL
+        urls: list[str] = [
+            entry["link"]
+            for entry in entries
+            if self.crawl_policy.should_crawl(entry)
+        ]
 
         if len(urls) == 0:
             return
@@ -146,25 +333,31 @@ class Source:
             return None
 
         # 使用配置类来管理爬取参数
-        crawl_config = WebExtractorConfig(
-            use_anti_detection=True,
-            min_delay=1.0,
-            max_delay=3.0,
-            same_domain_min_delay=10.0,
-            same_domain_max_delay=20.0,
-            global_max_concurrent=2,
-            custom_delay_rule=custom_delay_rule,
+        crawl_config = self.crawl_policy.build_extractor_config(
+            custom_delay_rule=custom_delay_rule
         )
+        logger.info(f"{self.name} 使用 {self.crawl_policy}: {crawl_config}")
 
         # 使用批量爬取方法，只创建一个 WebContentExtractor 实例
         results = await scrape_multiple_websites(urls, config=crawl_config)
 
-        # 将结果分配给对应的 entry
+        # 归档原始 HTML，便于之后离线重新提取
+        if config.HTML_ARCHIVE_ENABLED:
+            for url, result in results.items():
+                if result.get("success") and result.get("html"):
+                    await asyncio.to_thread(
+                        html_archive.store, url, result["html"]
+                    )
+
+        # 将结果分配给爬取过的 entry，爬取失败时保留 RSS 中的正文
+        crawled = set(urls)
         for entry in entries:
-            url = entry["link"]
+            url = entry.get("link")
+            if url not in crawled:
+                continue
             if url in results and results[url]["success"]:
                 entry["content"] = results[url]["content"]
-            else:
+            elif not (entry.get("content") or "").strip():
                 entry["content"] = None
 
         return
@@ -224,14 +417,22 @@ class Source:
     @backoff.on_exception(
         backoff.expo, requests.RequestException, max_time=30, max_tries=3
     )
-    async def parse(self, rss_reader: RssReader) -> list[dict]:
+    async def parse(
+        self, rss_reader: RssReader, content: Optional[bytes] = None
+    ) -> list[dict]:
         """
         parse feed and return entries
         if feed is up to date, return empty list
         if feed is not up to date, parse entries and return entries
         if error occurs, raise the error
+        Args:
+            content: feed body pushed by a WebSub hub, the feed is fetched
+                from the source url when it is None
         """
-        if not rss_reader.parse_feed(self.url):
+        if content is not None:
+            if not rss_reader.parse_content(content):
+                return []
+        elif not rss_reader.parse_feed(self.url):
             return []
         feed_info = rss_reader.get_feed_info()
         # TODO 判断 数据库里 是否存在
@@ -318,6 +519,14 @@ class SourceConfig:
             return
         self._link_set.add(source.url)
         self.sources.append(source)
+        self.sources.sort(key=lambda s: s.crawl_policy.priority, reverse=True)
+
+    def priority_groups(self) -> list[list[Source]]:
+        """按爬取优先级从高到低分组，同一组的数据源可以并发处理"""
+        groups: dict[int, list[Source]] = {}
+        for source in self.sources:
+            groups.setdefault(source.crawl_policy.priority, []).append(source)
+        return [groups[priority] for priority in sorted(groups, reverse=True)]
 
     def from_json(self, json_path: str):
         with open(json_path, encoding="utf-8") as f:
@@ -0,0 +1,45 @@
+import re
+from typing import Optional
+
+_CJK_PATTERN = re.compile(r"[\u4e00-\u9fff\u3400-\u4dbf\uf900-\ufaff]")
+
+# 各语言的特征字符，用于粗略的语言判断
+_SCRIPT_PATTERNS = {
+    "zh": _CJK_PATTERN,
+    "ja": re.compile(r"[\u3040-\u30ff]"),
+    "ko": re.compile(r"[\uac00-\ud7af\u1100-\u11ff]"),
+    "ru": re.compile(r"[\u0400-\u04ff]"),
+    "en": re.compile(r"[A-Za-z]"),
+}
+
+
+def count_words(content: Optional[str]) -> int:
+    """统计内容字数，中日韩字符按单字计数，其余按空白分词计数"""
+    if not content:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(content))
+    other_words = len(_CJK_PATTERN.sub(" ", content).split())
+    return cjk_count + other_words
+
+
+def detect_language(content: Optional[str]) -> Optional[str]:
+    """
+    根据字符所属文字粗略判断语言，返回 zh / ja / ko / ru / en，无法判断时返回 None
+
+    只区分文字体系：拉丁字母统一视为 en；出现假名时优先判断为 ja，
+    因为日文同样包含大量汉字。
+    """
+    if not content:
+        return None
+    counts = {
+        lang: len(pattern.findall(content))
+        for lang, pattern in _SCRIPT_PATTERNS.items()
+    }
+    total = sum(counts.values())
+    if total == 0:
+        return None
+    if counts["ja"] / total > 0.1:
+        return "ja"
+    # 拉丁字母按字符计数会压过中文，按单词数折算后再比较
+    counts["en"] = len(re.findall(r"[A-Za-z]+", content))
+    return max(counts, key=counts.get)
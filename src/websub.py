@@ -0,0 +1,342 @@
+import hashlib
+import hmac
+import logging
+import secrets
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+
+import requests
+from sqlalchemy.orm import Session
+
+from src.config import config
+from src.models import db
+from src.models.websub import WebSubSubscription
+from src.rss import RssReader
+from src.sources import Source, SourceConfig
+
+logger = logging.getLogger(__name__)
+
+# X-Hub-Signature 支持的签名算法
+SIGNATURE_ALGORITHMS = {
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+    "sha384": hashlib.sha384,
+    "sha512": hashlib.sha512,
+}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)  # naive UTC
+
+
+def verify_signature(secret: str, body: bytes, header: Optional[str]) -> bool:
+    """
+    校验 hub 推送内容的 HMAC 签名
+
+    Args:
+        secret: 订阅时提交给 hub 的密钥
+        body: 推送的原始内容
+        header: X-Hub-Signature 头，格式为 "sha256=<hex>"
+    """
+    if not header or "=" not in header:
+        return False
+    method, signature = header.split("=", 1)
+    digestmod = SIGNATURE_ALGORITHMS.get(method.strip().lower())
+    if digestmod is None:
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, digestmod).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+class WebSubManager:
+    """
+    WebSub（PubSubHubbub）订阅管理
+
+    定时任务为声明了 hub 的数据源发起订阅并在租约到期前续订；hub 通过
+    /websub/callback/{token} 完成订阅确认并推送 feed 内容，推送内容直接
+    进入 Source.parse 的写入流程。订阅有效的数据源在推送中断超过
+    poll_fallback 后才会重新轮询，回退轮询不影响推送时间，收到推送前每次
+    抓取都会轮询。
+
+    Args:
+        callback_url: 回调的公网地址，为空时不发起订阅
+        lease_seconds: 订阅请求中的租约时长
+        renew_before: 租约到期前多久续订
+        rediscover_after: 不支持 WebSub 或被拒绝的数据源多久后重新检查
+        poll_fallback: 超过该时长没有推送时回退为轮询
+        source_dir: 数据源配置目录，用于根据推送找到对应的数据源
+    """
+
+    def __init__(
+        self,
+        callback_url: str = "",
+        lease_seconds: int = 7 * 24 * 3600,
+        renew_before: timedelta = timedelta(days=1),
+        rediscover_after: timedelta = timedelta(days=7),
+        poll_fallback: timedelta = timedelta(hours=24),
+        source_dir: str = "./data",
+        proxy: Optional[str] = None,
+    ):
+        self.callback_url = callback_url.rstrip("/")
+        self.lease_seconds = lease_seconds
+        self.renew_before = renew_before
+        self.rediscover_after = rediscover_after
+        self.poll_fallback = poll_fallback
+        self.source_dir = source_dir
+        self.proxy = proxy or None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.callback_url)
+
+    @property
+    def _proxies(self) -> Optional[dict]:
+        if self.proxy:
+            return {"http": self.proxy, "https": self.proxy}
+        return None
+
+    def callback_for(self, token: str) -> str:
+        return f"{self.callback_url}/websub/callback/{token}"
+
+    # ------------------------------------------------------------------
+    # 发现与订阅
+    # ------------------------------------------------------------------
+
+    def discover(self, url: str) -> tuple[Optional[str], str]:
+        """
+        发现 feed 的 hub 和 topic
+
+        优先使用 HTTP Link 头，其次使用 feed 中的 atom:link。
+
+        Returns:
+            tuple: (hub, topic)，没有 hub 时 hub 为 None，topic 默认为 url
+        """
+        response = requests.get(url, proxies=self._proxies, timeout=10)
+        response.raise_for_status()
+        hub = response.links.get("hub", {}).get("url")
+        topic = response.links.get("self", {}).get("url")
+
+        reader = RssReader()
+        if reader.parse_content(response.content):
+            feed_hub, feed_topic = reader.get_websub_links()
+            hub = hub or feed_hub
+            topic = topic or feed_topic
+        return hub, topic or url
+
+    def subscribe(self, subscription: WebSubSubscription) -> bool:
+        """向 hub 发送订阅请求，hub 接受后等待回调确认"""
+        response = requests.post(
+            subscription.hub,
+            data={
+                "hub.mode": "subscribe",
+                "hub.topic": subscription.topic,
+                "hub.callback": self.callback_for(subscription.callback_token),
+                "hub.lease_seconds": str(self.lease_seconds),
+                "hub.secret": subscription.secret,
+            },
+            proxies=self._proxies,
+            timeout=10,
+        )
+        subscription.checked_at = _utcnow()
+        if response.status_code not in (202, 204):
+            logger.warning(
+                f"hub {subscription.hub} 拒绝订阅 {subscription.topic}: "
+                f"{response.status_code} {response.text[:200]}"
+            )
+            return False
+        if subscription.state != "active":
+            subscription.state = "pending"
+        logger.info(f"已向 {subscription.hub} 请求订阅 {subscription.topic}")
+        return True
+
+    def _needs_subscribe(self, subscription: WebSubSubscription) -> bool:
+        now = _utcnow()
+        if subscription.state in ("unsupported", "denied"):
+            return subscription.checked_at + self.rediscover_after <= now
+        if subscription.state == "pending":
+            # hub 迟迟没有确认时重新发起订阅
+            return subscription.checked_at + timedelta(hours=1) <= now
+        if subscription.expires_at is None:
+            return True
+        # hub 给出的租约较短时，在租约过半后续订
+        renew_before = min(
+            self.renew_before,
+            timedelta(seconds=(subscription.lease_seconds or 0) / 2),
+        )
+        return subscription.expires_at - renew_before <= now
+
+    def sync_source(self, session: Session, source: Source):
+        """为单个数据源发现 hub 并订阅或续订"""
+        subscription = (
+            session.query(WebSubSubscription)
+            .filter_by(source_url=source.url)
+            .first()
+        )
+        if subscription is not None and not self._needs_subscribe(subscription):
+            return
+
+        if subscription is None or subscription.state in (
+            "unsupported",
+            "denied",
+        ):
+            hub, topic = self.discover(source.url)
+            if subscription is None:
+                subscription = WebSubSubscription(
+                    source_url=source.url,
+                    callback_token=secrets.token_urlsafe(24),
+                    secret=secrets.token_hex(32),
+                )
+                session.add(subscription)
+            subscription.hub = hub
+            subscription.topic = topic
+            subscription.checked_at = _utcnow()
+            if hub is None:
+                subscription.state = "unsupported"
+                logger.debug(f"{source.name} 未声明 WebSub hub")
+                return
+            subscription.state = "pending"
+
+        self.subscribe(subscription)
+
+    def sync(self, sources: list[Source]):
+        """为所有数据源发起订阅，并续订即将到期的订阅"""
+        if not self.enabled:
+            return
+        with Session(db) as session:
+            for source in sources:
+                try:
+                    self.sync_source(session, source)
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    logger.exception(f"同步 {source.name} 的 WebSub 订阅失败")
+
+    # ------------------------------------------------------------------
+    # hub 回调
+    # ------------------------------------------------------------------
+
+    def verify_intent(
+        self,
+        token: str,
+        mode: str,
+        topic: str,
+        challenge: Optional[str] = None,
+        lease_seconds: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        处理 hub 的订阅确认请求
+
+        Returns:
+            Optional[str]: 确认订阅时返回 challenge，否则返回 None
+        """
+        with Session(db) as session:
+            subscription = (
+                session.query(WebSubSubscription)
+                .filter_by(callback_token=token)
+                .first()
+            )
+            if subscription is None or subscription.topic != topic:
+                logger.warning(f"未知的 WebSub 确认请求: {mode} {topic}")
+                return None
+
+            if mode == "denied":
+                subscription.state = "denied"
+                subscription.checked_at = _utcnow()
+                session.commit()
+                logger.warning(f"hub 拒绝了订阅 {topic}")
+                return None
+            # 只确认订阅，不主动取消订阅
+            if mode != "subscribe" or not challenge:
+                return None
+
+            lease_seconds = lease_seconds or self.lease_seconds
+            subscription.state = "active"
+            subscription.lease_seconds = lease_seconds
+            subscription.expires_at = _utcnow() + timedelta(
+                seconds=lease_seconds
+            )
+            session.commit()
+            logger.info(f"WebSub 订阅已确认 {topic}，租约 {lease_seconds} 秒")
+            return challenge
+
+    def accept_push(
+        self, token: str, body: bytes, signature: Optional[str]
+    ) -> Optional[str]:
+        """
+        校验推送内容
+
+        Returns:
+            Optional[str]: 校验通过时返回对应的数据源 URL
+        """
+        with Session(db) as session:
+            subscription = (
+                session.query(WebSubSubscription)
+                .filter_by(callback_token=token)
+                .first()
+            )
+            if subscription is None:
+                return None
+            if not verify_signature(subscription.secret, body, signature):
+                logger.warning(f"WebSub 推送签名校验失败 {subscription.topic}")
+                return None
+            subscription.last_push_at = _utcnow()
+            session.commit()
+            return subscription.source_url
+
+    def get_source(self, source_url: str) -> Source:
+        for source in SourceConfig(source_dir=self.source_dir).sources:
+            if source.url == source_url:
+                return source
+        return Source(name=source_url, url=source_url, description="")
+
+    async def process_push(self, source_url: str, body: bytes) -> list[dict]:
+        """将推送的 feed 内容写入数据库"""
+        source = self.get_source(source_url)
+        try:
+            entries = await source.parse(RssReader(self.proxy), content=body)
+        except Exception:
+            logger.exception(f"处理 {source.name} 的 WebSub 推送失败")
+            return []
+        logger.info(f"WebSub 推送 {source.name}: {len(entries)} 条新条目")
+        return entries
+
+    # ------------------------------------------------------------------
+    # 轮询回退
+    # ------------------------------------------------------------------
+
+    def should_poll(self, source_url: str) -> bool:
+        """订阅有效且近期收到过推送的数据源不需要轮询"""
+        if not self.enabled:
+            return True
+        with Session(db) as session:
+            subscription = (
+                session.query(WebSubSubscription)
+                .filter_by(source_url=source_url)
+                .first()
+            )
+        if subscription is None or subscription.state != "active":
+            return True
+        now = _utcnow()
+        if subscription.expires_at is None or subscription.expires_at <= now:
+            return True
+        return (
+            subscription.last_push_at is None
+            or subscription.last_push_at + self.poll_fallback <= now
+        )
+
+    def mark_polled(self, source_url: str):
+        if not self.enabled:
+            return
+        with Session(db) as session:
+            session.query(WebSubSubscription).filter_by(
+                source_url=source_url
+            ).update({"last_polled_at": _utcnow()})
+            session.commit()
+
+
+websub_manager = WebSubManager(
+    callback_url=config.WEBSUB_CALLBACK_URL,
+    lease_seconds=config.WEBSUB_LEASE_SECONDS,
+    poll_fallback=timedelta(hours=config.WEBSUB_POLL_FALLBACK_HOURS),
+    proxy=config.NETWORK_PROXY,
+)
@@ -1,19 +1,42 @@
 import asyncio
 import datetime
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from src.config import config
+from src.crawl.archive import canonicalize_url, html_archive
+from src.crawl.crawl import WebContentExtractor
+from src.filters import FilterEngine, FilterTarget
+from src.graph._utils import entry_priority_lane, upsert_record
+from src.graph.batch import run_batch_prepass
+from src.graph.batch_api import run_batch_api_backfill
 from src.graph.classify_graph import run_classification_graph
+from src.graph.lineage import STALE_CATEGORY, STALE_SCORE, find_stale
+from src.llms.adaptive_routing import adaptive_stats
+from src.llms.call_log import call_logger
+from src.llms.concurrency import classify_concurrency
+from src.llms.pool_manager import pool_manager
+from src.llms.priority import priority_lane
+from src.llms.response_cache import response_cache
 from src.models import db
+from src.models.html_snapshot import HtmlSnapshot
 from src.models.rss_entry import RssEntry
+from src.models.rss_feed import RssFeed
+from src.models.score import EntryScore, Score
 from src.models.tags import EntryCategory
+from src.preclassifier import preclassifier
 from src.rss.rss_reader import RssReader
 from src.sources import Source, SourceConfig
+from src.websub import websub_manager
 
 logger = logging.getLogger(__name__)
 
+FILTER_RULES_PATH = "config/filter_rules.yaml"
+
 
 # if __name__ == "__main__":
 async def fetch_task(max_workers: int = 10):
@@ -26,8 +49,13 @@ async def fetch_task(max_workers: int = 10):
         source_config = SourceConfig(source_dir="./data")
         entries: list[dict] = []
         for source in source_config.sources:
+            # WebSub 订阅有效的数据源由 hub 推送，推送中断时才回退为轮询
+            if not websub_manager.should_poll(source.url):
+                logger.debug(f"Skip polling {source.name}, served by WebSub")
+                continue
             try:
                 new_entries = await source.parse(rss_reader)
+                websub_manager.mark_polled(source.url)
                 logger.info(
                     f"Fetched {len(new_entries)} entries from {source.name}"
                 )
@@ -58,6 +86,16 @@ async def fetch_task(max_workers: int = 10):
         raise
 
 
+async def websub_task():
+    """
+    subscribe sources that declare a WebSub hub and renew expiring leases
+    """
+    if not websub_manager.enabled:
+        return
+    source_config = SourceConfig(source_dir="./data")
+    await asyncio.to_thread(websub_manager.sync, source_config.sources)
+
+
 async def run_crawl():
     """
     entrypoint for crawl and parse source
@@ -71,12 +109,183 @@ async def run_crawl():
         except Exception as e:
             logger.exception(f"Error crawling source {source.name}:")
 
-    tasks = [run_crawl_for_source(source) for source in sources.sources]
-    await asyncio.gather(*tasks)
+    # 同一优先级的数据源并发爬取，处理完后再开始下一优先级
+    for group in sources.priority_groups():
+        await asyncio.gather(
+            *[run_crawl_for_source(source) for source in group]
+        )
+
+
+def _reextract_html(url: str, html: str) -> dict:
+    """在子进程中离线提取正文"""
+    return WebContentExtractor().extract_from_html(url, html)
+
+
+async def run_reextract(max_workers: int = 4, batch_size: int = 200):
+    """
+    entrypoint for rebuilding entry content from archived html snapshots,
+    no network access is needed
+
+    the snapshots go through the same crawl4ai cleaning and markdown
+    generation as the live crawl, but browser-side steps such as overlay
+    removal cannot be replayed, so the content may differ slightly
+
+    Args:
+        max_workers: number of worker processes used for extraction
+        batch_size: number of entries loaded and committed per batch
+    Returns:
+        dict: {"updated": int, "skipped": int, "errors": int}
+    """
+    updated = skipped = errors = 0
+    loop = asyncio.get_running_loop()
+
+    with Session(db) as session:
+        # 每个URL只取最近一次抓取的快照
+        latest = (
+            session.query(
+                HtmlSnapshot.canonical_url,
+                func.max(HtmlSnapshot.fetched_at).label("fetched_at"),
+            )
+            .group_by(HtmlSnapshot.canonical_url)
+            .subquery()
+        )
+        snapshot_ids = dict(
+            session.query(HtmlSnapshot.canonical_url, HtmlSnapshot.id)
+            .join(
+                latest,
+                (HtmlSnapshot.canonical_url == latest.c.canonical_url)
+                & (HtmlSnapshot.fetched_at == latest.c.fetched_at),
+            )
+            .all()
+        )
+        if not snapshot_ids:
+            logger.info("No archived snapshots found")
+            return {"updated": 0, "skipped": 0, "errors": 0}
+
+        entry_ids = [
+            entry_id for (entry_id,) in session.query(RssEntry.id).all()
+        ]
+        logger.info(
+            f"Re-extracting {len(entry_ids)} entries from "
+            f"{len(snapshot_ids)} archived snapshots with {max_workers} workers"
+        )
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for start in range(0, len(entry_ids), batch_size):
+                entries = (
+                    session.query(RssEntry)
+                    .filter(
+                        RssEntry.id.in_(entry_ids[start : start + batch_size])
+                    )
+                    .all()
+                )
+                futures = {}
+                for entry in entries:
+                    snapshot_id = snapshot_ids.get(canonicalize_url(entry.link))
+                    if snapshot_id is None:
+                        skipped += 1
+                        continue
+                    snapshot = session.get(HtmlSnapshot, snapshot_id)
+                    html = html_archive.load(snapshot, session)
+                    futures[entry.id] = loop.run_in_executor(
+                        executor, _reextract_html, entry.link, html
+                    )
+
+                results = await asyncio.gather(
+                    *futures.values(), return_exceptions=True
+                )
+                entries_by_id = {entry.id: entry for entry in entries}
+                for entry_id, result in zip(futures.keys(), results):
+                    if isinstance(result, Exception) or not result["success"]:
+                        errors += 1
+                        logger.warning(
+                            f"Re-extract failed for entry {entry_id}"
+                        )
+                        continue
+                    entries_by_id[entry_id].content = result["content"]
+                    entries_by_id[entry_id].modified_gmt = (
+                        datetime.datetime.now()
+                    )
+                    updated += 1
+                session.commit()
+
+    logger.info(
+        f"Re-extract completed: {updated} updated, {skipped} without snapshot, "
+        f"{errors} errors"
+    )
+    return {"updated": updated, "skipped": skipped, "errors": errors}
+
+
+def _apply_filter_rules(
+    session: Session, entries: list[RssEntry]
+) -> list[RssEntry]:
+    """
+    run the declarative filter rules before the classification graph,
+    rejected entries are written as noise directly and skip the LLM calls
+
+    Returns:
+        list[RssEntry]: entries that still need to go through the graph
+    """
+    engine = FilterEngine.from_file(FILTER_RULES_PATH)
+    if not engine.enabled:
+        return entries
+
+    entry_ids = [entry.id for entry in entries]
+    processed_ids = {
+        entry_id
+        for (entry_id,) in session.query(EntryScore.entry_id).filter(
+            EntryScore.entry_id.in_(entry_ids)
+        )
+    } | {
+        entry_id
+        for (entry_id,) in session.query(EntryCategory.entry_id).filter(
+            EntryCategory.entry_id.in_(entry_ids)
+        )
+    }
+    feeds = {feed.id: feed for feed in session.query(RssFeed).all()}
+
+    remaining = []
+    rejected = 0
+    for entry in entries:
+        if entry.id in processed_ids:
+            remaining.append(entry)
+            continue
+        feed = feeds.get(entry.feed_id)
+        result = engine.evaluate(
+            FilterTarget(
+                title=entry.title or "",
+                content=entry.content or "",
+                link=entry.link or "",
+                feed_id=entry.feed_id,
+                feed_title=feed.title if feed else "",
+                feed_link=feed.link if feed else "",
+            )
+        )
+        if result is None:
+            remaining.append(entry)
+            continue
+        upsert_record(
+            session=session,
+            model_class=EntryScore,
+            filter_kwargs={"entry_id": entry.id},
+            update_kwargs={"score": Score.NOISE, "reason": result.to_reason()},
+        )
+        rejected += 1
+        logger.debug(f"Entry {entry.id} rejected by {result.to_reason()}")
+
+    session.commit()
+    logger.info(
+        f"Filter rules rejected {rejected} of {len(entries)} entries as noise"
+    )
+    return remaining
 
 
 async def run_classify_graph(
-    entry_nums: int = 10, ignore_limit: bool = False, max_concurrent: int = 3
+    entry_nums: int = 10,
+    ignore_limit: bool = False,
+    max_concurrent: Optional[int] = None,
+    entry_ids: Optional[list[int]] = None,
+    recompute: Optional[dict[int, str]] = None,
 ):
     """
     run the graph for the entry with concurrent execution
@@ -84,33 +293,71 @@ async def run_classify_graph(
     Args:
         entry_nums: number of entries to process when ignore_limit=False (default: 10)
         ignore_limit: if True, process all entries in database
-        max_concurrent: maximum number of entries to process concurrently (default: 3)
+        max_concurrent: fixed number of entries to process concurrently,
+            by default the concurrency is tuned by classify_concurrency
+            within the limits derived from the tagger and score pools
+        entry_ids: only process these entries
+        recompute: entry id -> STALE_CATEGORY / STALE_SCORE, the graph
+            overwrites these stale results instead of skipping the entry
     Returns:
         dict: processing results summary
     """
+    if max_concurrent is None:
+        classify_concurrency.configure_for_nodes(["tagger", "score"])
+    else:
+        classify_concurrency.configure(
+            [pool_manager.get_pool_name(node) for node in ("tagger", "score")],
+            max_concurrent,
+            min_limit=max_concurrent,
+        )
     with Session(db) as session:
+        query = session.query(RssEntry)
+        if entry_ids is not None:
+            query = query.filter(RssEntry.id.in_(entry_ids))
         if ignore_limit:
-            entries = session.query(RssEntry).all()
+            entries = query.all()
         else:
-            entries = session.query(RssEntry).limit(entry_nums).all()
+            entries = query.limit(entry_nums).all()
         if not entries:
             logger.info("No entries found to process")
             return {"processed": 0, "errors": 0}
 
+        # 规则过滤：明显的噪音直接写入 EntryScore，不再调用 LLM
+        entries = _apply_filter_rules(session, entries)
+
+        # 本地预分类器置信度足够时直接写入分类或噪音评分
+        if config.PRECLASSIFIER_ENABLED:
+            try:
+                preclassifier.run(session, entries)
+            except Exception:
+                logger.exception("预分类器运行失败，全部交给 LLM 处理")
+
+        # 新条目优先处理，回填的旧条目按 backfill 通道调用 LLM
+        entries.sort(
+            key=lambda entry: entry.published_at or datetime.datetime.max,
+            reverse=True,
+        )
+
+        # 池配置了 batch_size 时先批量分类与评分，失败的条目由下面的单条目流程处理
+        await run_batch_prepass(
+            entries, max_concurrent=classify_concurrency.limit
+        )
+
         logger.info(
             f"Starting concurrent processing of {len(entries)} entries "
-            f"with max concurrent limit: {max_concurrent}"
+            f"with concurrent limit: {classify_concurrency.limit} "
+            f"(max {classify_concurrency.max_limit})"
         )
 
-        # 创建信号量来限制并发数
-        semaphore = asyncio.Semaphore(max_concurrent)
-
         async def process_single_entry(entry):
             """Process a single entry and return result"""
-            async with semaphore:  # 使用信号量限制并发
+            async with classify_concurrency.slot():  # 按调整后的并发数执行
                 try:
                     logger.debug(f"Starting processing entry {entry.id}")
-                    await run_classification_graph(entry)
+                    with priority_lane(entry_priority_lane(entry)):
+                        await run_classification_graph(
+                            entry, (recompute or {}).get(entry.id)
+                        )
                     logger.info(f"Successfully processed entry {entry.id}")
                     return {"entry_id": entry.id, "status": "success"}
                 except Exception as e:
@@ -144,7 +391,102 @@ async def run_classify_graph(
                     f"Unexpected error in concurrent processing: {result}"
                 )
 
+        concurrency = classify_concurrency.get_stats()
+        logger.info(
+            f"Concurrent processing completed: {processed} successful, {errors} errors, "
+            f"concurrent limit: {concurrency['limit']}"
+        )
+
+        call_logger.flush()
+        response_cache.flush_hits()
+        adaptive_stats.save()
+
+        # 用本次 LLM 的结果增量训练预分类器
+        if config.PRECLASSIFIER_ENABLED:
+            try:
+                preclassifier.train(session)
+            except Exception:
+                logger.exception("预分类器训练失败")
+        return {
+            "processed": processed,
+            "errors": errors,
+            "concurrency": concurrency,
+        }
+
+
+async def run_recompute(
+    prompt_hash: Optional[str] = None,
+    model_id: Optional[str] = None,
+    include_unversioned: bool = False,
+    dry_run: bool = False,
+):
+    """
+    re-run the graph for entries whose stored results are stale, newest
+    entries first; see StaleChecker for which results count as stale
+
+    Args:
+        prompt_hash: only recompute results produced by this prompt hash
+        model_id: only recompute results produced by this model id
+        include_unversioned: also recompute results without lineage
+        dry_run: only report the stale entries
+    Returns:
+        dict: {"stale": int, "category": int, "score": int} and the
+            summary of run_classify_graph unless dry_run
+    """
+    with Session(db) as session:
+        entries = session.query(RssEntry).all()
+        stale = find_stale(
+            session,
+            entries,
+            prompt_hash=prompt_hash,
+            model_id=model_id,
+            include_unversioned=include_unversioned,
+        )
+        summary = {
+            "stale": len(stale),
+            "category": sum(1 for v in stale.values() if v == STALE_CATEGORY),
+            "score": sum(1 for v in stale.values() if v == STALE_SCORE),
+        }
         logger.info(
-            f"Concurrent processing completed: {processed} successful, {errors} errors"
+            f"Found {summary['stale']} stale entries: "
+            f"{summary['category']} to reclassify, "
+            f"{summary['score']} to rescore"
         )
-        return {"processed": processed, "errors": errors}
+        if dry_run or not stale:
+            return summary
+
+    # 过期的结果保留到重新计算成功后被覆盖，分类过期时评分也一并重新计算
+    result = await run_classify_graph(
+        ignore_limit=True, entry_ids=list(stale), recompute=stale
+    )
+    return {**summary, **result}
+
+
+async def run_batch_backfill(entry_nums: int = 10, ignore_limit: bool = False):
+    """
+    classify and score entries through the provider's batch API,
+    for historic backfills where latency does not matter
+
+    Args:
+        entry_nums: number of entries to process when ignore_limit=False (default: 10)
+        ignore_limit: if True, process all entries in database
+    Returns:
+        dict: {"tagged": int, "scored": int, "gave_up": int}
+    """
+    with Session(db) as session:
+        query = session.query(RssEntry).order_by(RssEntry.published_at)
+        entries = query.all() if ignore_limit else query.limit(entry_nums).all()
+        if not entries:
+            logger.info("No entries found to process")
+            return {"tagged": 0, "scored": 0, "gave_up": 0}
+
+        entries = _apply_filter_rules(session, entries)
+        if config.PRECLASSIFIER_ENABLED:
+            try:
+                preclassifier.run(session, entries)
+                session.commit()
+            except Exception:
+                logger.exception("预分类器运行失败，全部交给 LLM 处理")
+
+        # 批量任务在独立的会话中读写，跳过的条目已在上面提交
+        return await run_batch_api_backfill(entries)
@@ -0,0 +1,111 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.llms.adaptive_routing import (
+    STARTED_METADATA_KEY,
+    AdaptiveRoutingStats,
+    AdaptiveRoutingStrategy,
+)
+
+
+def _deployment(name: str, weight: int = 1) -> dict:
+    return {
+        "model_name": "fast",
+        "litellm_params": {"model": f"openai/{name}"},
+        "model_info": {"id": f"openai/{name}@default"},
+        "weight": weight,
+    }
+
+
+@pytest.fixture
+def stats(tmp_path):
+    stats = AdaptiveRoutingStats(str(tmp_path / "routing_stats.json"))
+    stats.load()
+    return stats
+
+
+def test_routes_away_from_slow_deployment(stats):
+    """测试按期望完成时间选择部署，进行中的请求变慢时立即转移流量"""
+    random.seed(0)
+    fast, slow = _deployment("fast-m"), _deployment("slow-m")
+    strategy = AdaptiveRoutingStrategy(None, stats, explore_rate=0)
+    for _ in range(5):
+        stats.finished("openai/fast-m@default", 0.5, error=False)
+        stats.finished("openai/slow-m@default", 2.2, error=False)
+
+    chosen = [strategy.choose([fast, slow]) for _ in range(4)]
+    assert all(d is fast for d in chosen)
+    # 4 个进行中的请求使 fast-m 的期望时间超过 slow-m
+    assert strategy.choose([fast, slow]) is slow
+
+    # 失败率高的部署被降权
+    stats.clear()
+    for _ in range(5):
+        stats.finished("openai/fast-m@default", 0.5, error=True)
+        stats.finished("openai/slow-m@default", 1.0, error=False)
+    assert strategy.choose([fast, slow]) is slow
+
+
+def test_weight_is_prior_for_unobserved(stats):
+    """测试没有观测数据时按权重选择"""
+    strategy = AdaptiveRoutingStrategy(None, stats, explore_rate=0)
+    light, heavy = _deployment("a"), _deployment("b", weight=3)
+    assert strategy.choose([light, heavy]) is heavy
+
+
+def test_stats_persist_across_restart(stats):
+    """测试统计写入文件后重新加载，进行中的请求数不保留"""
+    stats.started("openai/fast-m@default")
+    stats.finished("openai/fast-m@default", 0.8, error=False)
+    stats.started("openai/fast-m@default")
+    stats.save()
+
+    restored = AdaptiveRoutingStats(stats.path)
+    restored.load()
+    result = restored.get_stats(["openai/fast-m@default"])
+    assert result["openai/fast-m@default"]["latency"] == pytest.approx(0.8)
+    assert result["openai/fast-m@default"]["samples"] == 1
+    assert result["openai/fast-m@default"]["in_flight"] == 0
+
+
+def test_only_started_calls_leave_in_flight(stats):
+    """测试只有经过自适应策略选定的调用完成时才减少进行中的请求数"""
+    strategy = AdaptiveRoutingStrategy(None, stats, explore_rate=0)
+    fast = _deployment("fast-m")
+    request_kwargs = {}
+    strategy.choose([fast], request_kwargs)
+    assert request_kwargs["metadata"][STARTED_METADATA_KEY] == (
+        "openai/fast-m@default"
+    )
+
+    def event(metadata: dict) -> dict:
+        return {
+            "litellm_params": {
+                "metadata": metadata,
+                "model_info": {"id": "openai/fast-m@default"},
+            }
+        }
+
+    started = datetime.now()
+    # 其他策略的池中同一部署的调用只更新延迟
+    stats.log_success_event(
+        event({}), None, started, started + timedelta(seconds=1)
+    )
+    result = stats.get_stats(["openai/fast-m@default"])["openai/fast-m@default"]
+    assert result["in_flight"] == 1
+    assert result["samples"] == 1
+
+    stats.log_success_event(
+        event(request_kwargs["metadata"]),
+        None,
+        started,
+        started + timedelta(seconds=1),
+    )
+    result = stats.get_stats(["openai/fast-m@default"])["openai/fast-m@default"]
+    assert result["in_flight"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
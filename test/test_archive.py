@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import src.crawl.archive as archive_module
+import src.workflows as workflows_module
+from src.crawl.archive import HtmlArchive, canonicalize_url
+from src.models import Base
+from src.models.html_snapshot import CompressionDict, HtmlSnapshot
+from src.models.rss_entry import RssEntry
+
+TEMPLATE = """<html><head><title>文章 {i}</title></head><body>
+<nav class="site-nav"><a href="/">首页</a><a href="/tech">科技</a></nav>
+<div class="sidebar">热门文章 推荐阅读 订阅我们的newsletter</div>
+<article><h1>文章 {i}</h1><p>{body}</p></article>
+<footer class="site-footer">版权所有 联系我们 隐私政策</footer>
+</body></html>"""
+
+
+def _page(i: int) -> str:
+    return TEMPLATE.format(i=i, body=f"第 {i} 篇文章的正文 " * 40)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'archive.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(archive_module, "db", engine)
+    monkeypatch.setattr(workflows_module, "db", engine)
+    return engine
+
+
+def test_canonicalize_url():
+    """测试规范化时去掉跟踪参数和 fragment，查询参数排序"""
+    assert (
+        canonicalize_url("HTTPS://Example.com/a?b=2&utm_source=x&a=1#top")
+        == "https://example.com/a?a=1&b=2"
+    )
+
+
+@pytest.mark.parametrize("codec", ["zstd", "zlib"])
+def test_store_and_load_with_trained_dict(engine, monkeypatch, codec):
+    """测试快照往返一致，样本足够后训练域名字典，未安装 zstandard 时使用 zlib"""
+    if codec == "zlib":
+        monkeypatch.setattr(archive_module, "zstandard", None)
+    archive = HtmlArchive(dict_min_samples=5, dict_retrain_every=100)
+    assert archive.codec == codec
+
+    started = datetime(2024, 1, 1)
+    for i in range(8):
+        archive.store(
+            f"https://example.com/p/{i}",
+            _page(i),
+            fetched_at=started + timedelta(minutes=i),
+        )
+
+    with Session(engine) as session:
+        snapshots = session.query(HtmlSnapshot).order_by(HtmlSnapshot.id).all()
+        assert all(snapshot.codec == codec for snapshot in snapshots)
+        assert [snapshot.dict_id is None for snapshot in snapshots] == [
+            True
+        ] * 5 + [False] * 3
+        compression_dict = session.query(CompressionDict).one()
+        assert compression_dict.domain == "example.com"
+        assert compression_dict.codec == codec
+        assert all(
+            archive.load(snapshot, session) == _page(i)
+            for i, snapshot in enumerate(snapshots)
+        )
+        # 有字典的快照比无字典的快照压缩得更小
+        assert snapshots[-1].raw_size == snapshots[0].raw_size
+        assert len(snapshots[-1].content) < len(snapshots[0].content)
+
+    assert archive.load_latest("https://example.com/p/7?utm_source=rss") == (
+        _page(7)
+    )
+    assert archive.load_latest("https://example.com/missing") is None
+
+
+def test_reextract_from_snapshot(engine):
+    """测试离线重新提取用最近一次快照更新正文，没有快照的条目跳过"""
+    archive_module.html_archive.store(
+        "https://example.com/p/1", _page(0), fetched_at=datetime(2024, 1, 1)
+    )
+    archive_module.html_archive.store(
+        "https://example.com/p/1", _page(1), fetched_at=datetime(2024, 1, 2)
+    )
+    with Session(engine) as session:
+        session.add_all(
+            RssEntry(
+                id=i,
+                link=f"https://example.com/p/{i}?utm_medium=rss",
+                content="RSS 摘要",
+                title=f"文章 {i}",
+                author="",
+                summary="",
+                published_at=datetime(2024, 1, i),
+            )
+            for i in (1, 2)
+        )
+        session.commit()
+
+    summary = asyncio.run(workflows_module.run_reextract(max_workers=1))
+
+    assert summary == {"updated": 1, "skipped": 1, "errors": 0}
+    with Session(engine) as session:
+        contents = dict(session.query(RssEntry.id, RssEntry.content))
+    assert "第 1 篇文章的正文" in contents[1]
+    assert "第 0 篇" not in contents[1]
+    assert contents[2] == "RSS 摘要"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,48 @@
+import pytest
+
+from src.graph.batch import (
+    _valid_score_item,
+    _valid_tag_item,
+    parse_batch_response,
+)
+
+
+def test_parse_batch_response_validates_items():
+    """测试批量响应逐项校验，无效和多余的条目被丢弃"""
+    response = """```json
+    [
+        {"id": 1, "name": "tech", "classification_rationale": "技术"},
+        {"id": "2", "name": "unknown", "classification_rationale": "无效分类"},
+        {"id": 3, "name": "Other", "classification_rationale": "广告"},
+        {"id": 99, "name": "tech", "classification_rationale": "不在批次中"},
+        {"name": "tech", "classification_rationale": "缺少 id"},
+        "not an object"
+    ]
+    ```"""
+    results = parse_batch_response(response, {1, 2, 3}, _valid_tag_item)
+
+    assert set(results) == {1, 3}
+    assert results[3]["name"] == "Other"
+
+
+def test_parse_batch_response_score_items():
+    """测试评分结果校验 tag 和 summary"""
+    response = (
+        '[{"id": 1, "tag": "actionable", "summary": "摘要"},'
+        ' {"id": 2, "tag": "noise", "summary": " "},'
+        ' {"id": 3, "tag": "great", "summary": "摘要"}]'
+    )
+    results = parse_batch_response(response, {1, 2, 3}, _valid_score_item)
+
+    assert set(results) == {1}
+
+
+def test_parse_batch_response_invalid_json():
+    """测试无法解析时返回空结果，由单条目流程兜底"""
+    assert parse_batch_response("{}", {1}, _valid_tag_item) == {}
+    assert parse_batch_response("[{broken", {1}, _valid_tag_item) == {}
+    assert parse_batch_response(None, {1}, _valid_tag_item) == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
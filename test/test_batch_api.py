@@ -0,0 +1,159 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import src.graph.batch as batch_module
+import src.graph.batch_api as batch_api_module
+from scripts.mock_llm_server import MockLLMServer, MockProfile
+from src.graph.batch_api import (
+    INGESTED,
+    ORPHANED,
+    run_batch_api_backfill,
+    submit_batch,
+)
+from src.llms.litellm_factory import ModelConfig
+from src.llms.pool_manager import PoolConfig, pool_manager
+from src.models import Base, LLMBatchJob
+from src.models.entry_summary import EntrySummary
+from src.models.rss_entry import RssEntry
+from src.models.score import EntryScore
+from src.models.tags import EntryCategory
+from src.prompts.prompts import get_prompt_hash
+
+
+@pytest.fixture
+def server():
+    with MockLLMServer({"default": MockProfile(latency="fixed:0")}) as server:
+        yield server
+
+
+@pytest.fixture
+def entries(tmp_path, monkeypatch, server):
+    engine = create_engine(f"sqlite:///{tmp_path / 'batch.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(batch_module, "db", engine)
+    monkeypatch.setattr(batch_api_module, "db", engine)
+    monkeypatch.setattr(batch_api_module, "BATCH_DIR", tmp_path / "batches")
+
+    pool_manager.create_pool(
+        "batch",
+        [
+            ModelConfig(
+                provider="openai",
+                model="mock",
+                api_key="mock",
+                api_base=server.api_base(),
+            )
+        ],
+        load_balance_strategy="simple-shuffle",
+        pool_config=PoolConfig(cache=False),
+    )
+    pool_manager.set_node_pool("tagger", "batch")
+    pool_manager.set_node_pool("score", "batch")
+
+    with Session(engine) as session:
+        session.add_all(
+            RssEntry(
+                id=i,
+                link=f"https://example.com/{i}",
+                content=f"第 {i} 篇文章的正文",
+                title=f"文章 {i}",
+                author="",
+                summary="",
+                published_at=datetime(2024, 1, i),
+            )
+            for i in range(1, 4)
+        )
+        session.commit()
+        rows = session.query(RssEntry).all()
+        session.expunge_all()
+    yield engine, rows
+    pool_manager.clear_all()
+
+
+def _count(engine, model_class) -> int:
+    with Session(engine) as session:
+        return session.query(model_class).count()
+
+
+def test_backfill_resumes_and_ingests(entries, tmp_path):
+    """测试先处理上次未写入的任务，再提交剩余条目，结果写入分类、评分和摘要"""
+    engine, rows = entries
+    asyncio.run(submit_batch("tagger", rows[:1]))
+
+    summary = asyncio.run(run_batch_api_backfill(rows, poll_interval=0.01))
+
+    assert summary == {"tagged": 3, "scored": 3, "gave_up": 0}
+    assert _count(engine, EntryCategory) == 3
+    assert _count(engine, EntryScore) == 3
+    assert _count(engine, EntrySummary) == 3
+    with Session(engine) as session:
+        category = session.query(EntryCategory).first()
+        assert category.prompt_hash == get_prompt_hash("tagger_batch")
+        assert category.model_id == "openai/mock"
+        jobs = session.query(LLMBatchJob).order_by(LLMBatchJob.id).all()
+        assert [job.node for job in jobs] == ["tagger", "tagger", "score"]
+        assert json.loads(jobs[1].entry_ids) == [2, 3]
+        assert all(job.status == INGESTED for job in jobs)
+    first = min((tmp_path / "batches").glob("tagger-*.jsonl"))
+    lines = [json.loads(line) for line in first.read_text().splitlines()]
+    assert lines[0]["custom_id"] == "tagger-1"
+    assert lines[0]["url"] == "/v1/chat/completions"
+
+
+def test_backfill_retries_failed_items(entries, server):
+    """测试失败的条目重新提交，达到次数上限后放弃，再次运行不重复写入"""
+    engine, rows = entries
+    server.profiles["default"].error_rate = 1.0
+
+    summary = asyncio.run(
+        run_batch_api_backfill(rows, poll_interval=0.01, max_attempts=2)
+    )
+    assert summary == {"tagged": 0, "scored": 0, "gave_up": 3}
+    assert server.get_stats()["default"]["batch_requests"] == 6
+
+    server.profiles["default"].error_rate = 0.0
+    summary = asyncio.run(
+        run_batch_api_backfill(rows, poll_interval=0.01, max_attempts=3)
+    )
+    assert summary == {"tagged": 3, "scored": 3, "gave_up": 0}
+
+    summary = asyncio.run(
+        run_batch_api_backfill(rows, poll_interval=0.01, max_attempts=3)
+    )
+    assert summary == {"tagged": 0, "scored": 0, "gave_up": 0}
+    assert _count(engine, EntryCategory) == 3
+    assert _count(engine, EntryScore) == 3
+    with Session(engine) as session:
+        assert session.query(LLMBatchJob).count() == 4
+
+
+def test_orphaned_job_is_not_resumed(entries):
+    """测试模型池已不存在的任务标记为 orphaned，不再处理也不计提交次数"""
+    engine, rows = entries
+    asyncio.run(submit_batch("tagger", rows[:1]))
+    with Session(engine) as session:
+        session.query(LLMBatchJob).update({LLMBatchJob.pool: "removed"})
+        session.commit()
+
+    summary = asyncio.run(
+        run_batch_api_backfill(rows, poll_interval=0.01, max_attempts=1)
+    )
+    assert summary == {"tagged": 3, "scored": 3, "gave_up": 0}
+    with Session(engine) as session:
+        jobs = session.query(LLMBatchJob).order_by(LLMBatchJob.id).all()
+        assert [job.status for job in jobs] == [ORPHANED, INGESTED, INGESTED]
+        assert json.loads(jobs[1].entry_ids) == [1, 2, 3]
+
+    summary = asyncio.run(run_batch_api_backfill(rows, poll_interval=0.01))
+    assert summary == {"tagged": 0, "scored": 0, "gave_up": 0}
+    with Session(engine) as session:
+        assert session.query(LLMBatchJob).count() == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
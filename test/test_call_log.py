@@ -0,0 +1,115 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import src.llms.call_log as call_log_module
+from src.llms.call_log import CallLogger, call_context
+from src.models import Base, LLMCallLog
+
+
+@pytest.fixture
+def call_logger(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'calls.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(call_log_module, "db", engine)
+    return CallLogger(flush_every=100)
+
+
+def _response(prompt_tokens: int, cached_tokens: int = 0):
+    response = SimpleNamespace(
+        model="gpt-4o-mini",
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=20,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+        ),
+    )
+    response._hidden_params = {
+        "litellm_model_name": "openai/gpt-4o-mini",
+        "response_cost": 0.001,
+        "additional_headers": {"x-litellm-attempted-retries": 1},
+    }
+    return response
+
+
+def test_record_and_stats(call_logger):
+    """测试调用记录带上节点和条目，并按节点、池和部署汇总"""
+    with call_context(
+        entry_id=7, input_tokens_original=1000, input_tokens_sent=400
+    ):
+        for i in range(10):
+            call_logger.record_response(
+                _response(100 * (i + 1), cached_tokens=10),
+                pool="fast",
+                node="score",
+                prompt_version="scorer:v1",
+                latency=0.1 * (i + 1),
+            )
+    call_logger.record_error(
+        TimeoutError("timeout"),
+        pool="fast",
+        node="tagger",
+        prompt_version="tagger:v1",
+        latency=30,
+    )
+
+    stats = call_logger.get_stats()
+    score = stats["nodes"]["score"]
+    assert score["calls"] == 10
+    assert score["retries"] == 10
+    assert score["cached_tokens"] == 100
+    assert score["cost"] == pytest.approx(0.01)
+    assert score["latency_ms"] == {"p50": 500, "p90": 900, "p99": 1000}
+    assert score["avg_latency_ms"] == pytest.approx(550)
+    assert score["avg_prompt_tokens"] == pytest.approx(550)
+    assert score["input_tokens_original"] == 10000
+    assert score["input_tokens_sent"] == 4000
+    assert stats["nodes"]["tagger"]["input_tokens_original"] == 0
+    assert stats["nodes"]["tagger"]["errors"] == 1
+    assert stats["nodes"]["tagger"]["latency_ms"] is None
+    assert stats["pools"]["fast"]["calls"] == 11
+    assert stats["pools"]["fast"]["latency_ms"]["p50"] == 500
+    deployments = stats["deployments"]["fast"]
+    assert deployments["openai/gpt-4o-mini"]["calls"] == 10
+    assert deployments["unknown"]["errors"] == 1
+
+    with Session(call_log_module.db) as session:
+        record = session.query(LLMCallLog).filter_by(node="score").first()
+        assert record.entry_id == 7
+        assert record.input_tokens_original == 1000
+        assert record.input_tokens_sent == 400
+        assert record.deployment == "openai/gpt-4o-mini"
+
+
+def test_full_buffer_is_written_in_background(call_logger, monkeypatch):
+    """测试缓冲写满后在后台线程中写入数据库，不阻塞调用方"""
+    writers = []
+    session_class = call_log_module.Session
+
+    def tracked_session(*args, **kwargs):
+        writers.append(threading.get_ident())
+        return session_class(*args, **kwargs)
+
+    monkeypatch.setattr(call_log_module, "Session", tracked_session)
+    call_logger.flush_every = 3
+    for _ in range(3):
+        call_logger.record_response(
+            _response(100),
+            pool="fast",
+            node="score",
+            prompt_version=None,
+            latency=0.1,
+        )
+    call_logger._flusher.join()
+
+    assert writers
+    assert threading.get_ident() not in writers
+    with session_class(call_log_module.db) as session:
+        assert session.query(LLMCallLog).count() == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.graph._utils import normalize_scorer_fields
+from src.llms.cascade import (
+    CascadeConfig,
+    CascadeLLM,
+    CascadeStats,
+    check_output,
+)
+from src.llms.pool_config_manager import PoolConfigManager
+
+
+class FakeTier:
+    def __init__(self, content: str):
+        self.content = content
+        self.calls = []
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls.append(messages)
+        if isinstance(self.content, Exception):
+            raise self.content
+        return AIMessage(content=self.content)
+
+
+def test_check_output():
+    """测试无效输出、升级规则和低置信度都会触发升级"""
+    config = CascadeConfig(tiers=["fast", "quality"])
+    valid = '{"tag": "noise", "summary": "摘要"}'
+    assert check_output(valid, "scorer", config) is None
+    invalid = '{"tag": "great", "summary": "摘要"}'
+    assert check_output(invalid, "scorer", config) == "invalid_tag"
+    assert check_output("不是 JSON", "tagger", config) == "invalid_json"
+    # 没有输出格式的调用不检查
+    assert check_output("分片总结", "chunk_summary", config) is None
+
+    config = CascadeConfig(
+        tiers=["fast", "quality"],
+        min_confidence=0.7,
+        escalate_on={"tag": ["systematic"]},
+    )
+    ok = '{"tag": "noise", "summary": "摘要", "confidence": 0.9}'
+    assert check_output(ok, "scorer", config) is None
+    low = '{"tag": "noise", "summary": "摘要", "confidence": 0.3}'
+    assert check_output(low, "scorer", config) == "low_confidence"
+    rule = '{"tag": "systematic", "summary": "摘要", "confidence": 0.9}'
+    assert check_output(rule, "scorer", config) == "rule_tag"
+    batch = '[{"id": 1, "tag": "noise", "summary": "摘要", "confidence": 1}]'
+    assert check_output(batch, "scorer_batch", config) is None
+
+
+def test_accepted_scores_are_kept_after_normalization():
+    """测试级联放行的标签在写入前不会被改成 noise，两边比较规则一致"""
+    config = CascadeConfig(tiers=["fast", "quality"])
+    content = '{"tag": "Actionable", "summary": "摘要"}'
+    assert check_output(content, "scorer", config) is None
+    assert normalize_scorer_fields("Actionable", "摘要") == (
+        "actionable",
+        "摘要",
+    )
+    assert normalize_scorer_fields("great", "摘要") == ("noise", "摘要")
+
+
+def test_cascade_escalates_and_records_stats():
+    """测试第一层输出无效时升级到第二层，并按层级记录统计"""
+    fast = FakeTier('{"tag": "great", "summary": "摘要"}')
+    quality = FakeTier('{"tag": "actionable", "summary": "摘要"}')
+    stats = CascadeStats()
+    llm = CascadeLLM(
+        "score",
+        [("fast", fast), ("quality", quality)],
+        CascadeConfig(tiers=["fast", "quality"]),
+        stats,
+    )
+    messages = [{"role": "system", "content": "评分"}, HumanMessage("内容")]
+
+    response = asyncio.run(llm.ainvoke(messages, prompt_version="scorer:v1"))
+    assert response.content == quality.content
+
+    fast.content = '{"tag": "noise", "summary": "摘要"}'
+    asyncio.run(llm.ainvoke(messages, prompt_version="scorer:v1"))
+    assert len(quality.calls) == 1
+
+    fast.content = RuntimeError("timeout")
+    asyncio.run(llm.ainvoke(messages, prompt_version="scorer:v1"))
+
+    result = stats.get_stats()["score"]
+    assert result["fast"]["calls"] == 3
+    assert result["fast"]["finished"] == 1
+    assert result["fast"]["escalation_reasons"] == {
+        "invalid_tag": 1,
+        "error": 1,
+    }
+    assert result["quality"]["finished"] == 2
+
+
+def test_validate_cascade_config():
+    """测试级联配置引用不存在的池或层级不足时报错"""
+    manager = PoolConfigManager()
+    pools = {"fast": {}, "quality": {}}
+    assert (
+        manager._validate_cascade(
+            "score",
+            {"tiers": ["fast", "quality"], "min_confidence": 0.6},
+            pools,
+        )
+        == []
+    )
+    assert manager._validate_cascade("score", {"tiers": ["fast"]}, pools)
+    assert manager._validate_cascade(
+        "score", {"tiers": ["fast", "missing"]}, pools
+    )
+    assert manager._validate_cascade(
+        "score", {"tiers": ["fast", "quality"], "min_confidence": 2}, pools
+    )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from src.graph import chunked_summary
+from src.graph.chunked_summary import (
+    EMPTY_SUMMARY,
+    build_reduce_content,
+    split_into_chunks,
+    summarize_chunks,
+)
+from src.graph.input_prep import count_tokens
+from src.llms.pool_manager import LiteLLMRouterWrapper
+from src.llms.response_cache import ALWAYS, response_cache
+
+MODEL = "openai/gpt-4o"
+
+
+def _article(changed_section: int = -1) -> str:
+    sections = []
+    for i in range(6):
+        body = "\n\n".join(
+            f"第{i}章第{j}段，介绍大模型推理优化的方法与实验结果。"
+            for j in range(8)
+        )
+        if i == changed_section:
+            body += "\n\n新增的一段内容。"
+        sections.append(f"## 第{i}章\n\n{body}")
+    return "\n\n".join(sections)
+
+
+def test_split_into_chunks_respects_size_and_headings():
+    """测试片段不超过大小，且按标题切分"""
+    chunks = split_into_chunks(_article(), 300, MODEL)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk, MODEL) <= 300 for chunk in chunks)
+    assert all(chunk.startswith("## ") for chunk in chunks)
+    assert "".join(chunks).count("介绍大模型") == 48
+
+
+def test_edit_only_changes_affected_chunks():
+    """测试修改一个章节时，其他片段保持不变，可以命中缓存"""
+    before = split_into_chunks(_article(), 300, MODEL)
+    after = split_into_chunks(_article(changed_section=5), 300, MODEL)
+
+    assert len(set(after) - set(before)) == 1
+
+
+def test_summarize_chunks(monkeypatch):
+    """测试并发总结各片段，失败的片段和无效总结不进入 reduce"""
+    calls = []
+
+    class FakeLLM:
+        async def ainvoke(self, messages, **kwargs):
+            calls.append(kwargs)
+            content = messages[-1].content
+            if "失败" in content:
+                raise RuntimeError("failed")
+            if "目录" in content:
+                return type("R", (), {"content": EMPTY_SUMMARY})
+            return type("R", (), {"content": f" 总结{len(calls)} "})
+
+    monkeypatch.setattr(
+        chunked_summary.unified_llm_manager,
+        "get_llm",
+        lambda node_name=None: FakeLLM(),
+    )
+    summaries = asyncio.run(summarize_chunks(["目录", "正文", "失败"]))
+
+    assert summaries[0] == EMPTY_SUMMARY
+    assert summaries[2] == ""
+    assert all(kwargs["cache"] == ALWAYS for kwargs in calls)
+    assert build_reduce_content(summaries) == f"第 2 部分: {summaries[1]}"
+
+
+def test_chunk_cache_ignores_global_switch(monkeypatch):
+    """测试全局关闭响应缓存时片段总结仍然使用缓存，普通调用不使用"""
+    monkeypatch.setattr(response_cache, "enabled", False)
+    assert LiteLLMRouterWrapper._should_cache(ALWAYS)
+    assert not LiteLLMRouterWrapper._should_cache(True)
+
+    monkeypatch.setattr(response_cache, "enabled", True)
+    assert LiteLLMRouterWrapper._should_cache(True)
+    assert not LiteLLMRouterWrapper._should_cache(False)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
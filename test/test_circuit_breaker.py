@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import litellm
+import pytest
+from litellm.types.router import RouterRateLimitError
+
+from src.llms.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    circuit_breakers,
+)
+from src.llms.litellm_factory import ModelConfig
+from src.llms.pool_manager import PoolConfig, PoolManager
+
+DEPLOYMENT = {"model_info": {"id": "openai/fast-m@default"}}
+
+
+@pytest.fixture(autouse=True)
+def reset_breakers():
+    # 熔断状态是全局的，避免影响其他测试中同名的部署
+    yield
+    circuit_breakers.clear()
+
+
+def test_breaker_state_transitions(monkeypatch):
+    """测试连续失败后熔断，恢复时间后半开只放行一个试探请求"""
+    registry = CircuitBreakerRegistry()
+    registry.configure("openai/fast-m@default", threshold=2, recovery_time=10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+
+    registry.record_failure("openai/fast-m@default")
+    registry.record_success("openai/fast-m@default")
+    registry.record_failure("openai/fast-m@default")
+    assert (
+        registry.get_states(["openai/fast-m@default"])["openai/fast-m@default"][
+            "state"
+        ]
+        == CLOSED
+    )
+
+    registry.record_failure("openai/fast-m@default")
+    state = registry.get_states(["openai/fast-m@default"])
+    assert state["openai/fast-m@default"]["state"] == OPEN
+    with pytest.raises(CircuitOpenError):
+        registry.pre_call_check(DEPLOYMENT)
+    assert not asyncio.run(registry.async_filter_deployments("p", [DEPLOYMENT]))
+
+    now += 11
+    registry.pre_call_check(DEPLOYMENT)
+    state = registry.get_states(["openai/fast-m@default"])
+    assert state["openai/fast-m@default"]["state"] == HALF_OPEN
+    # 试探请求进行中时不放行其他请求
+    with pytest.raises(CircuitOpenError):
+        registry.pre_call_check(DEPLOYMENT)
+
+    # 试探失败重新熔断，成功后恢复
+    registry.record_failure("openai/fast-m@default")
+    state = registry.get_states(["openai/fast-m@default"])
+    assert state["openai/fast-m@default"]["times_opened"] == 2
+    now += 11
+    registry.pre_call_check(DEPLOYMENT)
+    registry.record_success("openai/fast-m@default")
+    state = registry.get_states(["openai/fast-m@default"])
+    assert state["openai/fast-m@default"]["state"] == CLOSED
+
+
+def test_open_breaker_reroutes_and_fails_fast(monkeypatch):
+    """测试熔断的部署不再被路由，所有部署熔断时立即失败"""
+    failing = {"openai/bad-m@default"}
+    calls = []
+
+    async def fake_acompletion(model, messages, model_info, **kwargs):
+        # 代替真实请求，按 litellm 的方式把结果回调给熔断器
+        deployment_id = model_info["id"]
+        calls.append(deployment_id)
+        callback_kwargs = {"litellm_params": {"model_info": model_info}}
+        if deployment_id in failing:
+            error = litellm.Timeout(
+                message="timeout", model=model, llm_provider="openai"
+            )
+            callback_kwargs["exception"] = error
+            await circuit_breakers.async_log_failure_event(
+                callback_kwargs, None, None, None
+            )
+            raise error
+        await circuit_breakers.async_log_success_event(
+            callback_kwargs, None, None, None
+        )
+        return litellm.ModelResponse(
+            model=model,
+            choices=[{"message": {"role": "assistant", "content": "ok"}}],
+        )
+
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+    manager = PoolManager()
+    manager.create_pool(
+        "fast",
+        [
+            ModelConfig(provider="openai", model="good-m", api_key="x"),
+            ModelConfig(provider="openai", model="bad-m", api_key="x"),
+        ],
+        load_balance_strategy="simple-shuffle",
+        pool_config=PoolConfig(
+            max_retries=2,
+            cache=False,
+            circuit_breaker_threshold=2,
+            circuit_breaker_timeout=30,
+        ),
+    )
+    llm = manager.pools["fast"].get_model()
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def run():
+        # 随机路由，调用到失败部署熔断为止，失败的请求由 Router 重试到正常部署
+        contents = []
+        for _ in range(50):
+            contents.append((await llm.ainvoke(messages)).content)
+            states = circuit_breakers.get_states(
+                ["openai/good-m@default", "openai/bad-m@default"]
+            )
+            if states["openai/bad-m@default"]["state"] == OPEN:
+                break
+        assert states["openai/bad-m@default"]["state"] == OPEN
+        assert states["openai/good-m@default"]["state"] == CLOSED
+        # 熔断后请求只发往正常的部署
+        calls.clear()
+        for _ in range(4):
+            await llm.ainvoke(messages)
+        assert calls == ["openai/good-m@default"] * 4
+
+        failing.add("openai/good-m@default")
+        for _ in range(3):
+            try:
+                await llm.ainvoke(messages)
+            except Exception:
+                pass
+        states = circuit_breakers.get_states(["openai/good-m@default"])
+        assert states["openai/good-m@default"]["state"] == OPEN
+
+        calls.clear()
+        started = time.monotonic()
+        with pytest.raises(RouterRateLimitError):
+            await llm.ainvoke(messages)
+        return contents, time.monotonic() - started
+
+    contents, elapsed = asyncio.run(run())
+    assert set(contents) == {"ok"}
+    # 所有部署熔断时不再发出请求，也不等待重试
+    assert calls == []
+    assert elapsed < 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
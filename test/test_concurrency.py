@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import litellm
+import pytest
+
+import src.llms.concurrency as concurrency_module
+from src.llms.concurrency import ConcurrencyController, derive_limits
+from src.llms.litellm_factory import ModelConfig
+from src.llms.pool_manager import PoolConfig, PoolManager
+
+
+def _rate_limited():
+    return litellm.RateLimitError(
+        message="rate limited", llm_provider="openai", model="m"
+    )
+
+
+def test_additive_increase_multiplicative_decrease():
+    """测试成功时逐轮增加并发，429 时减半，收缩前发出的调用不重复收缩"""
+    controller = ConcurrencyController()
+    controller.configure(["fast"], max_limit=8, initial=2)
+
+    for _ in range(2 + 3 + 4):
+        controller.record_success(0.1)
+    assert controller.limit == 5
+
+    controller.record_failure(_rate_limited(), datetime.now())
+    assert controller.limit == 2
+    controller.record_failure(
+        _rate_limited(), datetime.now() - timedelta(seconds=1)
+    )
+    assert controller.limit == 2
+    # 其他错误只计入错误率，不收缩
+    controller.record_failure(ValueError("bad"), datetime.now())
+    assert controller.limit == 2
+
+    history = controller.get_stats()["history"]
+    assert [item["limit"] for item in history] == [2, 3, 4, 5, 2]
+    assert history[-1]["reason"] == "decrease: RateLimitError"
+
+
+def test_unhealthy_latency_holds_limit():
+    """测试延迟明显上升时不再增加并发，范围变化时并发被限制在新范围内"""
+    controller = ConcurrencyController(latency_tolerance=2.0)
+    controller.configure(["fast"], max_limit=8, initial=2)
+    for latency in (0.1, 0.1, 0.5, 0.5, 0.5, 0.5):
+        controller.record_success(latency)
+    assert controller.limit == 3
+
+    controller.configure(["fast"], max_limit=2)
+    assert controller.limit == 2
+
+
+def test_derive_limits_from_pools(monkeypatch):
+    """测试并发上限取池的 concurrent_limit 与 rpm 估算值的较小值"""
+    manager = PoolManager()
+    manager.create_pool(
+        "wide",
+        [
+            ModelConfig(provider="openai", model=f"m{i}", api_key="x", rpm=60)
+            for i in range(3)
+        ],
+        load_balance_strategy="simple-shuffle",
+        pool_config=PoolConfig(concurrent_limit=20, timeout=5),
+    )
+    manager.create_pool(
+        "narrow",
+        [ModelConfig(provider="openai", model="n", api_key="x", rpm=12)],
+        load_balance_strategy="simple-shuffle",
+        pool_config=PoolConfig(concurrent_limit=10, timeout=30),
+    )
+    manager.set_node_pool("tagger", "wide")
+    manager.set_node_pool("score", "narrow")
+    monkeypatch.setattr(concurrency_module, "pool_manager", manager)
+
+    assert derive_limits(["tagger"]) == (3, 15)
+    assert derive_limits(["tagger", "score"]) == (1, 6)
+
+
+def test_slot_follows_limit_from_pool_calls():
+    """测试槽位数跟随池内调用结果调整"""
+    manager = PoolManager()
+    manager.create_pool(
+        "fast",
+        [ModelConfig(provider="openai", model="m", api_key="x")],
+        load_balance_strategy="simple-shuffle",
+        pool_config=PoolConfig(max_retries=0, cache=False),
+    )
+    model_list = manager.pools["fast"]._router.model_list
+    model_list[0]["litellm_params"]["mock_response"] = "ok"
+    llm = manager.pools["fast"].get_model()
+    messages = [{"role": "user", "content": "hi"}]
+    controller = ConcurrencyController()
+    controller.configure(["fast"], max_limit=4, initial=1)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        async with controller.slot():
+            peak = max(peak, controller.get_stats()["in_flight"])
+            await llm.ainvoke(messages)
+            await asyncio.sleep(0.05)
+
+    async def run():
+        await asyncio.gather(*[work() for _ in range(12)])
+        await asyncio.sleep(0.1)
+        model_list[0]["litellm_params"]["mock_response"] = _rate_limited()
+        with pytest.raises(litellm.RateLimitError):
+            await llm.ainvoke(messages)
+        await asyncio.sleep(0.1)
+
+    try:
+        asyncio.run(run())
+    finally:
+        litellm.callbacks.remove(controller)
+    reasons = [item["reason"] for item in controller.get_stats()["history"]]
+    assert "increase" in reasons
+    assert reasons[-1] == "decrease: RateLimitError"
+    assert 1 < peak <= 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+import yaml
+
+from src.llms.circuit_breaker import circuit_breakers
+from src.llms.config_watcher import ConfigWatcher
+from src.llms.pool_config_manager import pool_config_manager
+from src.llms.pool_manager import ModelPool, PoolManager, pool_manager
+from src.llms.response_cache import response_cache
+from src.llms.unified_manager import unified_llm_manager
+
+CONFIG = {
+    "providers": {
+        "local": {
+            "api_base": "http://localhost:9999/v1",
+            "api_key": "x",
+            "provider": "openai",
+            "models": [{"model": "m1"}, {"model": "m2"}],
+        }
+    },
+    "pools": {
+        "fast": {
+            "models": ["local:m1", "local:m2"],
+            "load_balance_strategy": "simple-shuffle",
+        },
+        "quality": {
+            "models": ["local:m1"],
+            "load_balance_strategy": "simple-shuffle",
+        },
+    },
+    "nodes": {"tagger": "fast", "score": "quality"},
+}
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    path = tmp_path / "llm_pools.yaml"
+    path.write_text(yaml.safe_dump(CONFIG), encoding="utf-8")
+    monkeypatch.setattr(pool_config_manager, "config_file_path", path)
+    unified_llm_manager.initialize()
+    yield path
+    pool_manager.clear_all()
+    unified_llm_manager.initialized = False
+
+
+def test_reload_keeps_unchanged_pools(config_file):
+    """测试重新加载时未变的池保留 Router，变化的池沿用部署的冷却状态"""
+    fast_router = pool_manager.pools["fast"]._router
+    quality_router = pool_manager.pools["quality"]._router
+    old_llm = unified_llm_manager.get_llm("score")
+    fast_router.cooldown_cache.add_deployment_to_cooldown(
+        model_id="openai/m2@http://localhost:9999/v1",
+        original_exception=Exception("down"),
+        exception_status=503,
+        cooldown_time=60,
+    )
+
+    config = yaml.safe_load(config_file.read_text(encoding="utf-8"))
+    config["pools"]["fast"]["pool_config"] = {"max_retries": 1}
+    config["pools"]["quality"]["models"] = ["local:m1", "local:m2"]
+    config["nodes"]["tagger"] = "quality"
+    config_file.write_text(yaml.safe_dump(config), encoding="utf-8")
+    assert unified_llm_manager.reload_config()
+
+    new_fast = pool_manager.pools["fast"]._router
+    assert new_fast is not fast_router
+    assert new_fast.cooldown_cache.get_active_cooldowns(
+        ["openai/m2@http://localhost:9999/v1"], None
+    )
+    assert pool_manager.pools["quality"]._router is not quality_router
+    assert unified_llm_manager.get_llm("tagger").pool_name == "quality"
+    # 重新加载前取得的模型仍使用旧 Router
+    assert old_llm.router is quality_router
+
+    # 配置未变时保留 Router
+    assert unified_llm_manager.reload_config()
+    assert pool_manager.pools["fast"]._router is new_fast
+
+
+def test_invalid_config_keeps_current_pools(config_file):
+    """测试配置文件有误时保留当前配置"""
+    router = pool_manager.pools["fast"]._router
+    config_file.write_text(
+        yaml.safe_dump({"pools": {"fast": {"models": []}}}), encoding="utf-8"
+    )
+    assert not unified_llm_manager.reload_config()
+    assert pool_manager.pools["fast"]._router is router
+    assert unified_llm_manager.get_llm("tagger").pool_name == "fast"
+
+
+def test_reload_builds_only_changed_pools(config_file, monkeypatch):
+    """测试重新加载只为配置变化的池创建 Router"""
+    built = []
+    setup_router = ModelPool._setup_router
+
+    def counting_setup(self):
+        built.append(self.name)
+        setup_router(self)
+
+    monkeypatch.setattr(ModelPool, "_setup_router", counting_setup)
+    config = yaml.safe_load(config_file.read_text(encoding="utf-8"))
+    config["pools"]["fast"]["pool_config"] = {"max_retries": 1}
+    config_file.write_text(yaml.safe_dump(config), encoding="utf-8")
+
+    assert unified_llm_manager.reload_config()
+    assert built == ["fast"]
+
+
+def test_failed_reload_keeps_global_state(config_file, monkeypatch):
+    """测试替换前失败的重新加载不改变熔断参数和缓存配置"""
+    deployment_id = "openai/m1@http://localhost:9999/v1"
+    breaker = circuit_breakers._breakers[deployment_id]
+    threshold, ttl_seconds = breaker.threshold, response_cache.ttl_seconds
+    routers = {name: pool._router for name, pool in pool_manager.pools.items()}
+
+    config = yaml.safe_load(config_file.read_text(encoding="utf-8"))
+    config["pools"]["quality"]["pool_config"] = {
+        "circuit_breaker_threshold": threshold + 3
+    }
+    config["cache"] = {"ttl_seconds": ttl_seconds + 60}
+    config_file.write_text(yaml.safe_dump(config), encoding="utf-8")
+
+    def fail(self, node_name, pool_name):
+        raise ValueError("映射失败")
+
+    monkeypatch.setattr(PoolManager, "set_node_pool", fail)
+    assert not unified_llm_manager.reload_config()
+    assert breaker.threshold == threshold
+    assert response_cache.ttl_seconds == ttl_seconds
+    assert {
+        name: pool._router for name, pool in pool_manager.pools.items()
+    } == routers
+
+    monkeypatch.undo()
+    monkeypatch.setattr(pool_config_manager, "config_file_path", config_file)
+    assert unified_llm_manager.reload_config()
+    assert breaker.threshold == threshold + 3
+    assert response_cache.ttl_seconds == ttl_seconds + 60
+
+
+def test_watcher_reloads_modified_file(tmp_path):
+    """测试文件修改并稳定后触发重新加载"""
+    path = tmp_path / "llm_pools.yaml"
+    path.write_text("a: 1", encoding="utf-8")
+    reloads = []
+    watcher = ConfigWatcher(path, lambda: reloads.append(1), interval=0.05)
+
+    async def run():
+        watcher.start()
+        await asyncio.sleep(0.1)
+        path.write_text("a: 22", encoding="utf-8")
+        await asyncio.sleep(0.3)
+        await watcher.stop()
+
+    asyncio.run(run())
+    assert reloads == [1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
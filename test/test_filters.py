@@ -0,0 +1,103 @@
+import pytest
+
+from src.filters import FilterEngine, FilterRule, FilterTarget
+from src.utils.text import detect_language
+
+
+def _engine(**kwargs) -> FilterEngine:
+    data = {
+        "rules": [
+            {"type": "min_length", "min_words": 5},
+            {"type": "language", "allowed": ["zh", "en"]},
+            {
+                "type": "keyword",
+                "name": "job_ads",
+                "keywords": ["招聘"],
+                "fields": ["title"],
+            },
+            {"type": "regex", "patterns": [r"(?i)\bsponsored\b"]},
+        ]
+    }
+    data.update(kwargs)
+    return FilterEngine.from_dict(data)
+
+
+def test_detect_language():
+    """测试基于字符集的语言判断"""
+    assert detect_language("这是一篇关于大模型推理优化的中文文章") == "zh"
+    assert detect_language("This is an article about inference") == "en"
+    assert detect_language("Это статья о выводе больших моделей") == "ru"
+    assert detect_language("12345 !!!") is None
+
+
+def test_engine_passes_normal_entry():
+    """测试正常条目通过所有规则"""
+    target = FilterTarget(
+        title="推理优化", content="这是一篇关于大模型推理优化的中文文章"
+    )
+    assert _engine().evaluate(target) is None
+
+
+def test_engine_rejects_by_rules_in_order():
+    """测试按规则顺序拒绝并给出原因"""
+    engine = _engine()
+
+    result = engine.evaluate(FilterTarget(title="短", content="太短"))
+    assert result.rule == "min_length"
+
+    result = engine.evaluate(
+        FilterTarget(title="招聘后端工程师", content="岗位职责包括服务端开发")
+    )
+    assert result.rule == "job_ads"
+    assert result.to_reason().startswith("rule:job_ads:")
+
+    result = engine.evaluate(
+        FilterTarget(title="News", content="This post is Sponsored by a vendor")
+    )
+    assert result.rule == "regex"
+
+
+def test_engine_feed_allow_and_deny():
+    """测试 feed 允许列表跳过规则，拒绝列表直接判定为噪音"""
+    engine = _engine(feeds={"allow": ["1"], "deny": ["https://spam.com"]})
+
+    assert engine.evaluate(FilterTarget(content="太短", feed_id=1)) is None
+
+    result = engine.evaluate(
+        FilterTarget(
+            content="这是一篇关于大模型推理优化的中文文章",
+            feed_link="https://spam.com",
+        )
+    )
+    assert result.rule == "feed_deny"
+
+
+def test_engine_invalid_rule_type():
+    """测试未知规则类型报错"""
+    with pytest.raises(ValueError):
+        FilterEngine.from_dict({"rules": [{"type": "unknown"}]})
+
+
+def test_incomplete_rule_type():
+    """测试没有实现 check 的规则类型在创建时报错"""
+
+    class IncompleteRule(FilterRule):
+        type_name = "incomplete"
+
+        @classmethod
+        def from_dict(cls, data: dict) -> "IncompleteRule":
+            return cls(name=data.get("name"))
+
+    with pytest.raises(TypeError):
+        IncompleteRule.from_dict({})
+
+
+def test_engine_missing_file_disabled(tmp_path):
+    """测试规则文件不存在时不做过滤"""
+    engine = FilterEngine.from_file(tmp_path / "missing.yaml")
+    assert not engine.enabled
+    assert engine.evaluate(FilterTarget(content="")) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
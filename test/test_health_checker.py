@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from src.llms.litellm_factory import ModelConfig
+from src.llms.pool_manager import PoolConfig, PoolManager
+
+
+@pytest.fixture
+def manager():
+    manager = PoolManager()
+    manager.create_pool(
+        "fast",
+        [
+            ModelConfig(provider="openai", model="good-m", api_key="x"),
+            ModelConfig(provider="openai", model="bad-m", api_key="x"),
+        ],
+        load_balance_strategy="simple-shuffle",
+        pool_config=PoolConfig(max_retries=0, cache=False),
+    )
+    model_list = manager.pools["fast"]._router.model_list
+    model_list[0]["litellm_params"]["mock_response"] = "ok"
+    model_list[1]["litellm_params"]["mock_response"] = Exception("boom")
+    return manager
+
+
+def test_status_reads_cached_health(manager):
+    """测试尚未探测时状态中没有健康数，探测后读取缓存的结果"""
+    status = manager.list_pools()["fast"]
+    assert status["healthy_models"] is None
+
+    asyncio.run(manager.health_checker.check_pool(manager.pools["fast"]))
+    status = manager.list_pools()["fast"]
+    assert status["healthy_models"] == 1
+    health = status["health"]
+    assert health["openai/good-m@default"]["healthy"]
+    assert not health["openai/bad-m@default"]["healthy"]
+    assert "boom" in health["openai/bad-m@default"]["error"]
+
+
+def test_unhealthy_deployment_is_not_routed(manager):
+    """测试探测失败的部署被冷却，请求只路由到健康的部署"""
+    pool = manager.pools["fast"]
+
+    async def run():
+        await manager.health_checker.check_pool(pool)
+        llm = pool.get_model()
+        return [
+            await llm.ainvoke([{"role": "user", "content": "hi"}])
+            for _ in range(5)
+        ]
+
+    responses = asyncio.run(run())
+    assert all(response.content == "ok" for response in responses)
+
+    # 恢复后移出冷却列表
+    pool._router.model_list[1]["litellm_params"]["mock_response"] = "ok"
+    asyncio.run(manager.health_checker.check_pool(pool))
+    assert manager.list_pools()["fast"]["healthy_models"] == 2
+    assert not pool._router.cooldown_cache.get_active_cooldowns(
+        ["openai/bad-m@default"], None
+    )
+
+
+def test_router_cooldown_is_kept(manager):
+    """测试检查器只清除自己设置的冷却，Router 设置的冷却保留"""
+    pool = manager.pools["fast"]
+    cooldowns = pool._router.cooldown_cache
+    asyncio.run(manager.health_checker.check_pool(pool))
+
+    # 部署在检查器冷却期间又被 Router 冷却
+    cooldowns.add_deployment_to_cooldown(
+        model_id="openai/bad-m@default",
+        original_exception=Exception("router"),
+        exception_status=500,
+        cooldown_time=60,
+    )
+    pool._router.model_list[1]["litellm_params"]["mock_response"] = "ok"
+    asyncio.run(manager.health_checker.check_pool(pool))
+    assert cooldowns.get_active_cooldowns(["openai/bad-m@default"], None)
+
+    # 没有被检查器冷却过的部署，恢复健康时也不清除 Router 的冷却
+    cooldowns.add_deployment_to_cooldown(
+        model_id="openai/good-m@default",
+        original_exception=Exception("router"),
+        exception_status=500,
+        cooldown_time=60,
+    )
+    asyncio.run(manager.health_checker.check_pool(pool))
+    assert (
+        len(
+            cooldowns.get_active_cooldowns(
+                ["openai/good-m@default", "openai/bad-m@default"], None
+            )
+        )
+        == 2
+    )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
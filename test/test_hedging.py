@@ -0,0 +1,101 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.llms.hedging import HedgeManager
+
+DELAYS = {"slow@default": 2.0, "fast@default": 0.05}
+
+
+class FakeCooldowns:
+    def get_active_cooldowns(self, model_ids, parent_otel_span):
+        return []
+
+
+@pytest.fixture
+def router():
+    return SimpleNamespace(
+        model_list=[
+            {"model_info": {"id": deployment_id}} for deployment_id in DELAYS
+        ],
+        cooldown_cache=FakeCooldowns(),
+    )
+
+
+def _sender(manager: HedgeManager, sent: list, cancelled: list):
+    async def send(model: str) -> str:
+        # 按池名发送的主请求总是路由到 slow
+        deployment_id = "slow@default" if model == "fast" else model
+        await manager.async_pre_call_check(
+            {"model_info": {"id": deployment_id}}
+        )
+        sent.append(deployment_id)
+        try:
+            await asyncio.sleep(DELAYS[deployment_id])
+        except asyncio.CancelledError:
+            cancelled.append(deployment_id)
+            raise
+        return deployment_id
+
+    return send
+
+
+def _seed(manager: HedgeManager, latency: float):
+    for _ in range(20):
+        manager._latencies["slow@default"].append(latency)
+
+
+def test_hedge_wins_and_loser_is_cancelled(router):
+    """测试主请求超过 p95 后对冲到其他部署，先返回的结果胜出并取消另一个"""
+    manager = HedgeManager()
+    _seed(manager, 0.1)
+    sent, cancelled = [], []
+
+    async def run():
+        started = time.monotonic()
+        result = await manager.call(
+            router, "fast", 1.0, _sender(manager, sent, cancelled)
+        )
+        await asyncio.sleep(0)
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(run())
+    assert result == "fast@default"
+    assert elapsed < 1
+    assert sent == ["slow@default", "fast@default"]
+    assert cancelled == ["slow@default"]
+    stats = manager.get_stats("fast")
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_hedge_budget_and_min_samples(router):
+    """测试样本不足时不对冲，超出对冲比例上限时不再对冲"""
+    manager = HedgeManager()
+    sent, cancelled = [], []
+    send = _sender(manager, sent, cancelled)
+    DELAYS["slow@default"] = 0.3
+
+    async def run(times: int):
+        for _ in range(times):
+            await manager.call(router, "fast", 0.5, send)
+
+    try:
+        asyncio.run(run(2))
+        assert manager.get_stats("fast")["hedged"] == 0
+
+        _seed(manager, 0.01)
+        asyncio.run(run(4))
+    finally:
+        DELAYS["slow@default"] = 2.0
+    stats = manager.get_stats("fast")
+    # 6 次调用最多对冲 3 次
+    assert stats["hedged"] == 3
+    assert stats["skipped_budget"] == 1
+    assert stats["hedge_wins"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
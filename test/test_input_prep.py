@@ -0,0 +1,76 @@
+import pytest
+
+from src.graph import input_prep
+from src.graph.input_prep import (
+    clean_content,
+    count_tokens,
+    prepare_input,
+    trim_to_budget,
+)
+from src.llms.call_log import get_call_context
+from src.llms.pool_manager import PoolConfig
+
+MODEL = "openai/gpt-4o"
+
+
+def test_clean_content():
+    """测试去除图片、链接地址、裸 URL 和重复行"""
+    text = (
+        "# 标题\n![img](http://a/b.png)\n"
+        "看 [链接](https://x.com/y) 和 https://foo.bar/baz 内容\n"
+        "订阅我们\n订阅我们\n\n\n\n结尾"
+    )
+    cleaned = clean_content(text)
+    assert "http" not in cleaned
+    assert "看 链接 和 内容" in cleaned
+    assert cleaned.count("订阅我们") == 1
+    assert "\n\n\n" not in cleaned
+
+
+def test_trim_to_budget_keeps_head_and_key_sentences():
+    """测试压缩结果不超出预算，保留开头和高频词所在的句子"""
+    lines = ["大模型推理优化综述。"]
+    lines += [f"无关的填充内容第{i}行。" for i in range(100)]
+    lines += ["transformer 推理 KV cache 推理 transformer 优化。"] * 3
+    text = "\n".join(lines)
+
+    trimmed = trim_to_budget(text, 200, MODEL)
+    assert count_tokens(trimmed, MODEL) <= 200
+    assert trimmed.startswith("大模型推理优化综述。")
+    assert "KV cache" in trimmed
+
+
+def test_prepare_input_uses_pool_budget(monkeypatch):
+    """测试超出池的 max_input_tokens 时压缩并记录 token 数"""
+    monkeypatch.setattr(
+        input_prep.pool_manager,
+        "get_pool_config",
+        lambda node_name=None: PoolConfig(max_input_tokens=100),
+    )
+    monkeypatch.setattr(
+        input_prep.pool_manager,
+        "get_primary_model",
+        lambda node_name=None: MODEL,
+    )
+    short = prepare_input("一段很短的内容", "tagger")
+    assert not short.trimmed
+    assert short.original_tokens == short.prepared_tokens
+
+    long = prepare_input(
+        "\n".join(f"第{i}段内容。" for i in range(200)), "tagger"
+    )
+    assert long.trimmed
+    assert long.prepared_tokens <= 100 < long.original_tokens
+
+    # 调用记录中保存预处理前和实际发送的 token 数
+    with long.token_context():
+        context = get_call_context()
+    assert context["input_tokens_original"] == long.original_tokens
+    assert context["input_tokens_sent"] == long.prepared_tokens
+    with long.token_context(sent_tokens=42):
+        assert get_call_context()["input_tokens_sent"] == 42
+    assert "input_tokens_sent" not in get_call_context()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,241 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import src.graph.batch as batch_module
+import src.graph.classify_graph as classify_graph_module
+import src.graph.score as score_module
+import src.graph.tagger as tagger_module
+import src.llms.call_log as call_log_module
+import src.prompts.prompts as prompts_module
+import src.workflows as workflows_module
+from src.graph.lineage import (
+    STALE_CATEGORY,
+    STALE_SCORE,
+    find_stale,
+    result_lineage,
+    served_model_id,
+)
+from src.llms.cascade import CascadeConfig
+from src.llms.circuit_breaker import circuit_breakers
+from src.llms.litellm_factory import ModelConfig
+from src.llms.pool_manager import PoolConfig, pool_manager
+from src.llms.unified_manager import unified_llm_manager
+from src.models import Base
+from src.models.entry_summary import EntrySummary
+from src.models.rss_entry import RssEntry
+from src.models.score import EntryScore
+from src.models.tags import EntryCategory
+
+OLD_PROMPT = "0123456789abcdef"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'lineage.db'}")
+    Base.metadata.create_all(engine)
+    pool_manager.create_pool(
+        "fast",
+        [ModelConfig(provider="openai", model="m1", api_key="x")],
+        load_balance_strategy="simple-shuffle",
+        pool_config=PoolConfig(max_retries=0, cache=False),
+    )
+    pool_manager.set_node_pool("tagger", "fast")
+    pool_manager.set_node_pool("score", "fast")
+
+    with Session(engine) as session:
+        for i in range(1, 6):
+            session.add(
+                RssEntry(
+                    id=i,
+                    link=f"https://example.com/{i}",
+                    content=f"正文 {i}",
+                    title=f"文章 {i}",
+                    author="",
+                    summary="",
+                    published_at=datetime(2024, 1, i),
+                )
+            )
+            category = result_lineage("tagger", "tagger", f"正文 {i}")
+            score = result_lineage("score", "scorer", f"正文 {i}")
+            if i == 2:
+                # 正文在分类之后被修改
+                category = result_lineage("tagger", "tagger", "旧正文")
+            elif i == 3:
+                score["prompt_hash"] = OLD_PROMPT
+            elif i == 4:
+                score["model_id"] = "openai/old"
+            elif i == 5:
+                # 引入来源字段之前的结果
+                category = score = {}
+            session.add(
+                EntryCategory(
+                    entry_id=i, category="tech", reason="", **category
+                )
+            )
+            session.add(EntryScore(entry_id=i, score="systematic", **score))
+            session.add(EntrySummary(entry_id=i, ai_summary="摘要", **score))
+        session.commit()
+    yield engine
+    pool_manager.clear_all()
+
+
+def _stale(engine, **kwargs) -> dict[int, str]:
+    with Session(engine) as session:
+        return find_stale(session, session.query(RssEntry).all(), **kwargs)
+
+
+def test_find_stale(engine):
+    """测试正文、提示词或模型变化的结果需要重新计算，没有来源的结果默认跳过"""
+    assert result_lineage("tagger", "tagger", "x")["model_id"] == "openai/m1"
+    assert _stale(engine) == {
+        2: STALE_CATEGORY,
+        3: STALE_SCORE,
+        4: STALE_SCORE,
+    }
+    assert _stale(engine, prompt_hash=OLD_PROMPT) == {
+        2: STALE_CATEGORY,
+        3: STALE_SCORE,
+    }
+    assert _stale(engine, model_id="openai/old") == {
+        2: STALE_CATEGORY,
+        4: STALE_SCORE,
+    }
+    assert _stale(engine, include_unversioned=True)[5] == STALE_CATEGORY
+
+
+def test_cascade_records_serving_tier(engine):
+    """测试级联节点记录实际采用的层级的模型，任一层级产生的结果都不过期"""
+    pool_manager.create_pool(
+        "quality",
+        [ModelConfig(provider="openai", model="m2", api_key="x")],
+        load_balance_strategy="simple-shuffle",
+        pool_config=PoolConfig(cache=False),
+    )
+    pool_manager.set_node_cascade(
+        "score", CascadeConfig(tiers=["fast", "quality"])
+    )
+    for pool_name, content in (
+        ("fast", "不是 JSON"),
+        ("quality", '{"tag": "noise", "summary": "摘要"}'),
+    ):
+        model_list = pool_manager.pools[pool_name]._router.model_list
+        model_list[0]["litellm_params"]["mock_response"] = content
+
+    llm = pool_manager.get_model_for_node("score")
+    response = asyncio.run(
+        llm.ainvoke(
+            [{"role": "user", "content": "hi"}], prompt_version="scorer:v1"
+        )
+    )
+    assert served_model_id(response) == "openai/m2"
+    lineage = result_lineage(
+        "score", "scorer", "正文 1", served_model_id(response)
+    )
+    assert lineage["model_id"] == "openai/m2"
+
+    with Session(engine) as session:
+        session.query(EntryScore).filter_by(entry_id=1).update(lineage)
+        session.commit()
+    assert _stale(engine) == {
+        2: STALE_CATEGORY,
+        3: STALE_SCORE,
+        4: STALE_SCORE,
+    }
+
+
+def test_current_prompt_change_marks_results_stale(engine, monkeypatch):
+    """测试模板修改后，由旧模板产生的结果需要重新计算"""
+    monkeypatch.setitem(prompts_module.PROMPT_TEMPLATES, "scorer", "新的模板")
+    assert set(_stale(engine)) == {1, 2, 3, 4}
+
+
+def test_recompute_dry_run(engine, monkeypatch):
+    """测试 dry_run 只统计过期的条目，不运行分类图"""
+    monkeypatch.setattr(workflows_module, "db", engine)
+    calls = []
+
+    async def fake_run_classify_graph(**kwargs):
+        calls.append(kwargs)
+
+    monkeypatch.setattr(
+        workflows_module, "run_classify_graph", fake_run_classify_graph
+    )
+    summary = asyncio.run(workflows_module.run_recompute(dry_run=True))
+    assert summary == {"stale": 3, "category": 1, "score": 2}
+    assert calls == []
+
+
+def _rows(engine) -> dict[str, dict[int, str]]:
+    with Session(engine) as session:
+        return {
+            "category": dict(
+                session.query(EntryCategory.entry_id, EntryCategory.category)
+            ),
+            "score": dict(session.query(EntryScore.entry_id, EntryScore.score)),
+            "summary": dict(
+                session.query(EntrySummary.entry_id, EntrySummary.ai_summary)
+            ),
+        }
+
+
+def test_recompute_overwrites_stale_results(engine, monkeypatch):
+    """测试重新计算时覆盖过期的结果，调用失败时保留原有结果"""
+    for module in (
+        workflows_module,
+        batch_module,
+        classify_graph_module,
+        tagger_module,
+        score_module,
+        call_log_module,
+    ):
+        monkeypatch.setattr(module, "db", engine)
+    monkeypatch.setattr(unified_llm_manager, "initialized", True)
+    monkeypatch.setattr(workflows_module.config, "PRECLASSIFIER_ENABLED", False)
+    model_list = pool_manager.pools["fast"]._router.model_list
+    before = _rows(engine)
+
+    model_list[0]["litellm_params"]["mock_response"] = Exception("boom")
+    summary = asyncio.run(workflows_module.run_recompute())
+    assert summary["stale"] == 3
+    assert _rows(engine) == before
+    # 上一轮的失败使部署熔断
+    circuit_breakers.clear()
+
+    model_list[0]["litellm_params"]["mock_response"] = json.dumps(
+        {
+            "name": "business",
+            "classification_rationale": "理由",
+            "tag": "actionable",
+            "summary": "新的摘要",
+        },
+        ensure_ascii=False,
+    )
+    summary = asyncio.run(workflows_module.run_recompute())
+    assert summary["processed"] == 3
+    rows = _rows(engine)
+    assert rows["category"] == {
+        1: "tech",
+        2: "business",
+        3: "tech",
+        4: "tech",
+        5: "tech",
+    }
+    assert rows["score"] == {
+        1: "systematic",
+        2: "actionable",
+        3: "actionable",
+        4: "actionable",
+        5: "systematic",
+    }
+    assert rows["summary"][3] == "新的摘要"
+    assert rows["summary"][1] == "摘要"
+    assert _stale(engine) == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.models import (
+    Base,
+    EntryCategory,
+    EntryScore,
+    PreclassifierPrediction,
+    RssEntry,
+)
+from src.preclassifier import PreClassifier
+
+KEYWORDS = ["广告", "模型", "灌水"]
+
+
+def fake_embed(texts: list[str]) -> np.ndarray:
+    """按关键词生成 one-hot 向量，代替句向量模型"""
+    embedded.extend(texts)
+    return np.array(
+        [[1.0 if word in text else 0.0 for word in KEYWORDS] for text in texts]
+    )
+
+
+embedded: list[str] = []
+
+
+def _add_entry(session: Session, title: str) -> int:
+    entry = RssEntry(
+        link=f"https://example.com/{title}",
+        content=f"{title} 的正文",
+        title=title,
+        author="作者",
+        summary="",
+        published_at=datetime.now(),
+    )
+    session.add(entry)
+    session.flush()
+    return entry.id
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(3):
+            entry_id = _add_entry(session, f"广告{i}")
+            session.add(
+                EntryCategory(
+                    entry_id=entry_id, category="other", reason="广告"
+                )
+            )
+            for word, score in (("模型", "actionable"), ("灌水", "noise")):
+                entry_id = _add_entry(session, f"{word}{i}")
+                session.add(
+                    EntryCategory(
+                        entry_id=entry_id, category="tech", reason="技术"
+                    )
+                )
+                session.add(EntryScore(entry_id=entry_id, score=score))
+        session.commit()
+        yield session
+
+
+def test_preclassifier_applies_and_tracks_agreement(session, tmp_path):
+    """测试高置信度时直接写入分类和噪音评分，其余预测与 LLM 结果对比"""
+    embedded.clear()
+    classifier = PreClassifier(
+        path=str(tmp_path / "preclassifier.npz"),
+        k=3,
+        threshold=0.9,
+        sample_rate=0,
+        min_samples=3,
+        embed=fake_embed,
+    )
+    assert classifier.train(session) == 9
+
+    new_ids = {
+        word: _add_entry(session, f"新{word}")
+        for word in ("广告", "模型", "灌水")
+    }
+    entries = session.query(RssEntry).filter(RssEntry.id.in_(new_ids.values()))
+    assert classifier.run(session, entries.all()) == {
+        "category": 3,
+        "score": 1,
+    }
+
+    categories = dict(
+        session.query(EntryCategory.entry_id, EntryCategory.category)
+    )
+    scores = dict(session.query(EntryScore.entry_id, EntryScore.score))
+    assert categories[new_ids["广告"]] == "other"
+    assert scores[new_ids["灌水"]] == "noise"
+    # 非噪音评分需要 LLM 生成摘要，只记录预测
+    assert new_ids["模型"] not in scores
+
+    # LLM 评分后对比预测结果，并且增量训练只编码新增的条目
+    session.add(EntryScore(entry_id=new_ids["模型"], score="actionable"))
+    session.commit()
+    report = classifier.agreement_report(session, thresholds=[0.9])
+    assert report["score"][0]["agreement"] == 1.0
+
+    embedded.clear()
+    reloaded = PreClassifier(
+        path=classifier.path, k=3, min_samples=3, embed=fake_embed
+    )
+    assert reloaded.train(session) == 1
+    assert embedded == ["新模型\n新模型 的正文"]
+    assert session.query(PreclassifierPrediction).count() == 5
+
+
+def test_preclassifier_embeds_only_usable_entries(session, tmp_path):
+    """测试样本不足的目标不编码条目，样本都不足时不做任何编码"""
+    embedded.clear()
+    classifier = PreClassifier(
+        path=str(tmp_path / "preclassifier.npz"),
+        k=3,
+        sample_rate=0,
+        min_samples=7,
+        embed=fake_embed,
+    )
+    # 分类样本 9 条，评分样本 6 条
+    classifier.train(session)
+    untagged = _add_entry(session, "新模型")
+    tagged = _add_entry(session, "新灌水")
+    session.add(EntryCategory(entry_id=tagged, category="tech", reason="技术"))
+    session.commit()
+    entries = (
+        session.query(RssEntry)
+        .filter(RssEntry.id.in_([untagged, tagged]))
+        .all()
+    )
+
+    embedded.clear()
+    classifier.run(session, entries)
+    assert embedded == ["新模型\n新模型 的正文"]
+
+    embedded.clear()
+    classifier.min_samples = 10
+    assert classifier.run(session, entries) == {"category": 0, "score": 0}
+    assert embedded == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from src.llms.litellm_factory import ModelConfig
+from src.llms.pool_manager import PoolConfig, PoolManager
+from src.llms.priority import BACKFILL, FRESH, PriorityDispatcher, priority_lane
+
+
+class Recorder:
+    """记录获得槽位的顺序，由测试逐个放行"""
+
+    def __init__(self, dispatcher: PriorityDispatcher):
+        self.dispatcher = dispatcher
+        self.granted: list[tuple[str, asyncio.Event]] = []
+
+    async def call(self, lane: str):
+        async with self.dispatcher.slot(lane):
+            done = asyncio.Event()
+            self.granted.append((lane, done))
+            await done.wait()
+
+    async def release_next(self, index: int):
+        self.granted[index][1].set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+
+def test_weighted_fair_order():
+    """测试排队的请求按权重分配槽位，回填请求不会被饿死"""
+    dispatcher = PriorityDispatcher(limit=1)
+    recorder = Recorder(dispatcher)
+
+    async def run():
+        tasks = [asyncio.create_task(recorder.call(BACKFILL))]
+        await asyncio.sleep(0)
+        tasks += [
+            asyncio.create_task(recorder.call(lane))
+            for lane in [BACKFILL] * 10 + [FRESH] * 10
+        ]
+        await asyncio.sleep(0)
+        assert dispatcher.get_stats()["lanes"][BACKFILL]["waiting"] == 10
+        for index in range(11):
+            await recorder.release_next(index)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+    lanes = [lane for lane, _ in recorder.granted[1:11]]
+    # 后到的新条目插队到排队的回填请求之前，回填仍按权重获得槽位
+    assert lanes.count(FRESH) >= 7
+    assert BACKFILL in lanes
+    assert dispatcher.get_stats()["in_flight"] == 0
+
+
+def test_backfill_leaves_headroom():
+    """测试回填请求不占满所有槽位，新条目到达时不需要排队"""
+    dispatcher = PriorityDispatcher(limit=4)
+    recorder = Recorder(dispatcher)
+
+    async def run():
+        tasks = [asyncio.create_task(recorder.call(BACKFILL)) for _ in range(6)]
+        await asyncio.sleep(0)
+        assert dispatcher.get_stats()["lanes"][BACKFILL]["in_flight"] == 3
+        tasks.append(asyncio.create_task(recorder.call(FRESH)))
+        await asyncio.sleep(0)
+        stats = dispatcher.get_stats()["lanes"]
+        assert stats[FRESH]["in_flight"] == 1
+        assert stats[BACKFILL]["waiting"] == 3
+
+        # 取消排队中的请求后槽位不泄漏
+        tasks[-2].cancel()
+        await asyncio.sleep(0)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+    stats = dispatcher.get_stats()
+    assert stats["in_flight"] == 0
+    assert all(lane["in_flight"] == 0 for lane in stats["lanes"].values())
+
+
+def test_pool_calls_use_context_lane():
+    """测试池的异步调用按上下文的通道排队，并在池状态中显示"""
+    manager = PoolManager()
+    manager.create_pool(
+        "fast",
+        [ModelConfig(provider="openai", model="m", api_key="x")],
+        load_balance_strategy="simple-shuffle",
+        pool_config=PoolConfig(max_retries=0, cache=False),
+    )
+    pool = manager.pools["fast"]
+    pool._router.model_list[0]["litellm_params"]["mock_response"] = "ok"
+    llm = pool.get_model()
+
+    async def run():
+        with priority_lane(BACKFILL):
+            await llm.ainvoke([{"role": "user", "content": "hi"}])
+        await llm.ainvoke([{"role": "user", "content": "hi"}])
+
+    asyncio.run(run())
+    lanes = manager.list_pools()["fast"]["priority"]["lanes"]
+    assert lanes[BACKFILL]["dispatched"] == 1
+    assert lanes[FRESH]["dispatched"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
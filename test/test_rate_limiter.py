@@ -0,0 +1,105 @@
+import asyncio
+import multiprocessing
+from types import SimpleNamespace
+
+import litellm
+import pytest
+
+from src.llms.rate_limiter import RateLimiter, TokenBucketStore
+
+DEPLOYMENT = {
+    "model_name": "fast",
+    "litellm_params": {"model": "openai/fast-m"},
+    "model_info": {"id": "openai/fast-m@default"},
+    "tpm": 6000,
+    "rpm": 60,
+}
+
+
+def _acquire_in_process(path: str, count: int, queue):
+    store = TokenBucketStore(path)
+    granted = sum(
+        store.try_acquire("openai/fast-m@default", 1000, 6000, None) == 0
+        for _ in range(count)
+    )
+    queue.put(granted)
+
+
+def test_bucket_shared_across_processes(tmp_path):
+    """测试多个进程共享同一个令牌桶，总共放行的请求不超过容量"""
+    path = str(tmp_path / "rate_limits.db")
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_acquire_in_process, args=(path, 5, queue)
+        )
+        for _ in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+
+    granted = sum(queue.get(timeout=5) for _ in processes)
+    assert granted == 6
+
+    wait = TokenBucketStore(path).try_acquire(
+        "openai/fast-m@default", 1000, 6000, None
+    )
+    assert 0 < wait <= 10.5
+
+
+def test_reconcile_with_actual_usage(tmp_path):
+    """测试调用结束后按实际用量对账，失败的调用归还预占额度"""
+    limiter = RateLimiter(str(tmp_path / "rate_limits.db"), max_wait=1)
+    limiter.enabled = True
+    messages = [{"role": "user", "content": "hi"}]
+
+    def tokens() -> float:
+        return (
+            limiter.store._connect()
+            .execute("SELECT tokens FROM token_buckets")
+            .fetchone()[0]
+        )
+
+    token = limiter.begin(messages, {"max_tokens": 1000})
+    asyncio.run(limiter.callback.async_pre_call_check(DEPLOYMENT))
+    assert tokens() < 5000
+    response = SimpleNamespace(usage=SimpleNamespace(total_tokens=100))
+    response._hidden_params = {"model_id": "openai/fast-m@default"}
+    limiter.finish(token, response)
+    assert tokens() == pytest.approx(5900, abs=5)
+
+    token = limiter.begin(messages, {"max_tokens": 1000})
+    limiter.callback.pre_call_check(DEPLOYMENT)
+    limiter.finish(token)
+    assert tokens() == pytest.approx(5900, abs=5)
+
+    async def call_async():
+        token = limiter.begin(messages, {"max_tokens": 1000})
+        await limiter.callback.async_pre_call_check(DEPLOYMENT)
+        await limiter.afinish(token, response)
+
+    asyncio.run(call_async())
+    assert tokens() == pytest.approx(5800, abs=5)
+
+
+def test_raises_rate_limit_error_after_max_wait(tmp_path):
+    """测试额度不足且等待超过 max_wait 时抛出 RateLimitError"""
+    limiter = RateLimiter(str(tmp_path / "rate_limits.db"), max_wait=0.5)
+    limiter.enabled = True
+    deployment = {**DEPLOYMENT, "tpm": None, "rpm": 1}
+    messages = [{"role": "user", "content": "hi"}]
+
+    token = limiter.begin(messages, {})
+    limiter.callback.pre_call_check(deployment)
+    limiter.finish(token)
+
+    token = limiter.begin(messages, {})
+    with pytest.raises(litellm.RateLimitError):
+        asyncio.run(limiter.callback.async_pre_call_check(deployment))
+    limiter.finish(token)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import src.llms.response_cache as cache_module
+from src.llms.response_cache import ResponseCache
+from src.models import Base, LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(cache_module, "db", engine)
+    return ResponseCache(ttl_seconds=3600, max_entries=3, evict_every=1)
+
+
+def test_make_key_normalizes_messages(cache):
+    """测试空白差异不影响缓存键，提示词版本和模型会影响缓存键"""
+    messages = [{"role": "user", "content": "  你好\n\n  世界 "}]
+    same = [{"role": "user", "content": "你好 世界"}]
+
+    key = cache.make_key(messages, "pool", ["a/b"], "tagger:v1")
+    assert key == cache.make_key(same, "pool", ["a/b"], "tagger:v1")
+    assert key != cache.make_key(same, "pool", ["a/b"], "tagger:v2")
+    assert key != cache.make_key(same, "pool", ["a/c"], "tagger:v1")
+
+
+def test_ttl_and_eviction(cache):
+    """测试过期记录不再命中，超出容量时淘汰最久未命中的记录"""
+    cache.ttl_seconds = 0
+    for i in range(5):
+        cache.set(f"key{i}", f"value{i}", pool="pool")
+        time.sleep(0.01)
+    assert cache.get("key4") == "value4"
+
+    with Session(cache_module.db) as session:
+        keys = {record.cache_key for record in session.query(LLMResponseCache)}
+    assert len(keys) <= 4
+    assert "key0" not in keys
+
+    cache.ttl_seconds = 1
+    cache.set("short", "value", pool="pool")
+    time.sleep(1.1)
+    assert cache.get("short") is None
+
+
+def test_async_coalescing(cache):
+    """测试并发的相同请求只发起一次调用"""
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(
+            *[cache.aget_or_call("same", "pool", call) for _ in range(5)]
+        )
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert calls == 1
+    assert asyncio.run(cache.aget_or_call("same", "pool", call)) == "result"
+    assert calls == 1
+
+    stats = cache.get_stats("pool")
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["hits"] == 1
+
+
+def test_sync_coalescing(cache):
+    """测试多线程的相同请求只发起一次调用"""
+    calls = 0
+    results = []
+
+    def call():
+        nonlocal calls
+        calls += 1
+        time.sleep(0.1)
+        return "result"
+
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                cache.get_or_call("same", "pool", call)
+            )
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["result"] * 4
+    assert calls == 1
+
+
+def test_hits_are_buffered(cache):
+    """测试命中不逐次写库，累计到 hit_flush_every 次或淘汰前批量写入"""
+    cache.hit_flush_every = 3
+    cache.set("a", "A", pool="pool")
+    cache.set("b", "B", pool="pool")
+
+    def hit_counts():
+        with Session(cache_module.db) as session:
+            return dict(
+                session.query(
+                    LLMResponseCache.cache_key, LLMResponseCache.hit_count
+                )
+            )
+
+    for _ in range(4):
+        assert cache.get("a") == "A"
+    assert hit_counts() == {"a": 0, "b": 0}
+
+    assert cache.get("b") == "B"
+    assert cache.get("missing") is None
+    cache.hit_flush_every = 2
+    assert cache.get("b") == "B"
+    assert hit_counts() == {"a": 4, "b": 2}
+
+    assert cache.get("a") == "A"
+    cache.evict()
+    assert hit_counts() == {"a": 5, "b": 2}
+
+
+def test_async_reads_run_off_the_event_loop(cache, monkeypatch):
+    """测试异步调用的缓存读写在线程中执行"""
+    loop_thread = threading.get_ident()
+    threads = []
+    get, set_ = cache.get, cache.set
+
+    def tracked_get(key):
+        threads.append(threading.get_ident())
+        return get(key)
+
+    def tracked_set(*args):
+        threads.append(threading.get_ident())
+        return set_(*args)
+
+    monkeypatch.setattr(cache, "get", tracked_get)
+    monkeypatch.setattr(cache, "set", tracked_set)
+
+    async def call():
+        return "result"
+
+    async def main():
+        await cache.aget_or_call("key", "pool", call)
+        return await cache.aget_or_call("key", "pool", call)
+
+    assert asyncio.run(main()) == "result"
+    assert len(threads) == 3
+    assert loop_thread not in threads
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
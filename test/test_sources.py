@@ -0,0 +1,128 @@
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from src.sources import CrawlPolicy, Source, SourceConfig, count_words
+
+
+def test_source_from_dict_without_crawl_policy():
+    """测试未配置爬取策略时使用默认策略"""
+    source = Source.from_dict(
+        {"name": "blog", "url": "https://example.com/feed", "description": ""}
+    )
+
+    assert source.crawl_policy.mode == "auto"
+    assert source.crawl_policy.min_words == 0
+    assert source.crawl_policy.priority == 0
+
+
+def test_source_from_dict_with_crawl_policy():
+    """测试从json配置解析爬取策略"""
+    source = Source.from_dict(
+        {
+            "name": "weixin",
+            "url": "https://example.com/feed",
+            "description": "",
+            "crawl": {
+                "mode": "auto",
+                "min_words": 200,
+                "tier": "strict",
+                "priority": 5,
+                "concurrency": 1,
+                "delay": [10, 20],
+                "same_domain_delay": "30-60",
+            },
+        }
+    )
+    policy = source.crawl_policy
+
+    assert policy.min_words == 200
+    assert policy.tier == "strict"
+    assert policy.priority == 5
+    assert policy.delay == (10.0, 20.0)
+    assert policy.same_domain_delay == (30.0, 60.0)
+
+    crawl_config = policy.build_extractor_config()
+    assert crawl_config.global_max_concurrent == 1
+    assert crawl_config.min_delay == 10.0
+    assert crawl_config.same_domain_max_delay == 60.0
+    # 未覆盖的参数沿用 strict 预设
+    assert crawl_config.max_retries == 5
+
+
+def test_source_from_opml_attributes():
+    """测试从OPML属性解析爬取策略"""
+    element = ET.fromstring(
+        '<outline type="rss" text="full text" xmlUrl="https://example.com/feed"'
+        ' title="desc" crawlMode="never" crawlPriority="3" />'
+    )
+    source = Source.from_xml_element(element)
+
+    assert source.crawl_policy.mode == "never"
+    assert source.crawl_policy.priority == 3
+
+
+def test_should_crawl():
+    """测试不同模式下是否需要爬取"""
+    short_entry = {"link": "https://example.com/a", "content": "只有一句话"}
+    empty_entry = {"link": "https://example.com/b", "content": ""}
+
+    assert CrawlPolicy().should_crawl(empty_entry)
+    assert not CrawlPolicy().should_crawl(short_entry)
+    assert CrawlPolicy(min_words=100).should_crawl(short_entry)
+    assert CrawlPolicy(mode="always").should_crawl(short_entry)
+    assert not CrawlPolicy(mode="never").should_crawl(empty_entry)
+    assert not CrawlPolicy().should_crawl({"content": ""})
+
+
+def test_invalid_crawl_policy():
+    """测试非法配置"""
+    with pytest.raises(ValueError):
+        CrawlPolicy(mode="sometimes")
+    with pytest.raises(ValueError):
+        CrawlPolicy(tier="turbo")
+
+
+def test_priority_groups(tmp_path):
+    """测试数据源按优先级从高到低分组，同一优先级保持配置顺序"""
+    path = tmp_path / "sources.json"
+    path.write_text(
+        json.dumps(
+            {
+                "sources": [
+                    {
+                        "name": name,
+                        "url": f"https://{name}.example.com/feed",
+                        "description": "",
+                        "crawl": {"priority": priority},
+                    }
+                    for name, priority in [
+                        ("a", 0),
+                        ("b", 5),
+                        ("c", 0),
+                        ("d", 5),
+                    ]
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    groups = SourceConfig(source_path=str(path)).priority_groups()
+
+    assert [[source.name for source in group] for group in groups] == [
+        ["b", "d"],
+        ["a", "c"],
+    ]
+
+
+def test_count_words():
+    """测试中英文混合字数统计"""
+    assert count_words("") == 0
+    assert count_words("hello world") == 2
+    assert count_words("大模型 inference") == 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
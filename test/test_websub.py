@@ -0,0 +1,221 @@
+import hashlib
+import hmac
+import threading
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import src.app as app_module
+import src.sources as sources_module
+import src.websub as websub_module
+from src.models import Base, RssEntry
+from src.models.websub import WebSubSubscription
+from src.sources import Source
+from src.websub import WebSubManager, verify_signature
+
+
+def _atom_feed(base_url: str, entries: int = 0) -> bytes:
+    now = datetime.now(UTC).replace(microsecond=0)
+    items = "".join(
+        f"""
+        <entry>
+            <title>推送文章 {i}</title>
+            <link href="https://blog.example.com/post/{i}"/>
+            <id>https://blog.example.com/post/{i}</id>
+            <published>{(now - timedelta(hours=i + 1)).isoformat()}</published>
+            <updated>{(now - timedelta(hours=i + 1)).isoformat()}</updated>
+            <author><name>作者</name></author>
+            <summary>摘要 {i}</summary>
+            <content type="html">&lt;p&gt;推送的正文内容 {i}&lt;/p&gt;</content>
+        </entry>"""
+        for i in range(entries)
+    )
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+    <title>Example Blog</title>
+    <id>https://blog.example.com/</id>
+    <link href="https://blog.example.com/"/>
+    <link rel="self" href="{base_url}/feed.xml"/>
+    <link rel="hub" href="{base_url}/hub"/>
+    <updated>{now.isoformat()}</updated>{items}
+</feed>""".encode()
+
+
+class StandInHub:
+    """本地 hub 替身：提供带 hub 链接的 feed，并记录收到的订阅请求"""
+
+    def __init__(self):
+        self.requests: list[dict] = []
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = _atom_feed(hub.base_url)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/atom+xml")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                hub.requests.append({k: v[0] for k, v in form.items()})
+                self.send_response(202)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'websub.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(websub_module, "db", engine)
+    monkeypatch.setattr(sources_module, "db", engine)
+    return engine
+
+
+def _sign(secret: str, body: bytes) -> str:
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def test_verify_signature():
+    """测试推送签名校验"""
+    body = b"<feed/>"
+    assert verify_signature("secret", body, _sign("secret", body))
+    assert not verify_signature("secret", body, _sign("other", body))
+    assert not verify_signature("secret", body, None)
+    assert not verify_signature("secret", body, "md5=abc")
+
+
+def test_subscribe_verify_and_push(engine, monkeypatch):
+    """测试发现 hub、订阅、确认和签名推送的完整流程"""
+    manager = WebSubManager(
+        callback_url="http://testserver", source_dir="./missing"
+    )
+    monkeypatch.setattr(manager, "get_source", lambda url: source)
+    monkeypatch.setattr(app_module, "websub_manager", manager)
+    client = TestClient(app_module.app)
+
+    with StandInHub() as hub:
+        source = Source(
+            name="example", url=f"{hub.base_url}/feed.xml", description=""
+        )
+        manager.sync([source])
+
+        assert len(hub.requests) == 1
+        request = hub.requests[0]
+        assert request["hub.mode"] == "subscribe"
+        assert request["hub.topic"] == f"{hub.base_url}/feed.xml"
+        callback = urlparse(request["hub.callback"]).path
+
+        # topic 不匹配时拒绝确认
+        response = client.get(
+            callback,
+            params={
+                "hub.mode": "subscribe",
+                "hub.topic": "https://other.example.com/feed",
+                "hub.challenge": "nope",
+            },
+        )
+        assert response.status_code == 404
+
+        response = client.get(
+            callback,
+            params={
+                "hub.mode": "subscribe",
+                "hub.topic": request["hub.topic"],
+                "hub.challenge": "challenge-123",
+                "hub.lease_seconds": "3600",
+            },
+        )
+        assert response.status_code == 200
+        assert response.text == "challenge-123"
+        assert manager.should_poll(source.url)
+
+        body = _atom_feed(hub.base_url, entries=2)
+
+        # 签名错误的推送被忽略
+        response = client.post(
+            callback,
+            content=body,
+            headers={"X-Hub-Signature": _sign("wrong", body)},
+        )
+        assert response.status_code == 202
+        with Session(engine) as session:
+            assert session.query(RssEntry).count() == 0
+
+        response = client.post(
+            callback,
+            content=body,
+            headers={"X-Hub-Signature": _sign(request["hub.secret"], body)},
+        )
+        assert response.status_code == 202
+        with Session(engine) as session:
+            titles = {entry.title for entry in session.query(RssEntry)}
+        assert titles == {"推送文章 0", "推送文章 1"}
+
+        # 收到推送后不再轮询
+        assert not manager.should_poll(source.url)
+
+        # 租约未到期时不会重复订阅
+        manager.sync([source])
+        assert len(hub.requests) == 1
+
+
+def test_fallback_poll_does_not_hide_missing_pushes(engine):
+    """测试回退轮询不更新推送时间，推送中断期间每次都轮询，收到推送后停止"""
+    manager = WebSubManager(
+        callback_url="http://testserver", poll_fallback=timedelta(hours=1)
+    )
+    now = datetime.now(UTC).replace(tzinfo=None)
+    with Session(engine) as session:
+        session.add(
+            WebSubSubscription(
+                source_url="https://blog.example.com/feed.xml",
+                callback_token="token",
+                secret="secret",
+                state="active",
+                expires_at=now + timedelta(days=1),
+                last_push_at=now - timedelta(hours=2),
+                checked_at=now,
+            )
+        )
+        session.commit()
+
+    url = "https://blog.example.com/feed.xml"
+    assert manager.should_poll(url)
+    manager.mark_polled(url)
+    assert manager.should_poll(url)
+    with Session(engine) as session:
+        subscription = session.query(WebSubSubscription).one()
+        assert subscription.last_polled_at is not None
+        assert subscription.last_push_at < now
+
+    assert manager.accept_push("token", b"<feed/>", _sign("secret", b"<feed/>"))
+    assert not manager.should_poll(url)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])